@@ -179,5 +179,581 @@ myNoddys = Noddy.objects()
     t = timeit.Timer(stmt=stmt, setup=setup)
     print(t.timeit(1))
 
+def lookup_field_main():
+    """
+    Resolving field paths on a deeply nested schema, comparing a cold lookup
+    (the per class field path trie emptied before every lookup) with lookups
+    served from the trie.  The paths go through list indexes that change
+    from one lookup to the next.  No database connection is needed.
+    """
+    setup = """
+from mongoengine import (Document, EmbeddedDocument, EmbeddedDocumentField,
+                         ListField, StringField)
+from mongoengine.queryset import QuerySet
+
+class Level4(EmbeddedDocument):
+    name = StringField(db_field='n')
+
+class Level3(EmbeddedDocument):
+    children = ListField(EmbeddedDocumentField(Level4), db_field='c')
+
+class Level2(EmbeddedDocument):
+    children = ListField(EmbeddedDocumentField(Level3), db_field='c')
+
+class Level1(EmbeddedDocument):
+    children = ListField(EmbeddedDocumentField(Level2), db_field='c')
+
+class Root(Document):
+    child = EmbeddedDocumentField(Level1, db_field='c')
+
+paths = [['child', 'children', str(i), 'children', str(i % 7), 'children',
+          'name'] for i in range(100)]
+trie = Root._field_path_trie
+"""
+
+    stmt = """
+for i in range(10000):
+    trie.clear()
+    QuerySet._lookup_field(Root, paths[i % 100])
+"""
+
+    print("-" * 100)
+    print("""Resolving 10000 nested field paths - cold""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+    stmt = """
+for i in range(10000):
+    QuerySet._lookup_field(Root, paths[i % 100])
+"""
+
+    print("-" * 100)
+    print("""Resolving 10000 nested field paths - field path trie""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+
+def prepared_main():
+    """
+    Building the query for the same filter shape over and over, comparing
+    a filtered queryset with binding values to a prepared query.  Only the
+    query dict is built, no database connection is needed.
+    """
+    setup = """
+from bson import ObjectId
+from mongoengine import Document, ObjectIdField, StringField
+from mongoengine.queryset import Param, QuerySet
+
+class Ticket(Document):
+    account = ObjectIdField(db_field='a')
+    status = StringField(db_field='s')
+    meta = {'allow_inheritance': False}
+
+account = ObjectId()
+statuses = ['open', 'pending']
+prepared = QuerySet(Ticket, None).prepare(account=Param('account'),
+                                          status__in=Param('statuses'))
+"""
+
+    stmt = """
+for i in range(10000):
+    QuerySet(Ticket, None)(account=account, status__in=statuses)._query
+"""
+
+    print("-" * 100)
+    print("""Building 10000 queries - filtered queryset""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+    stmt = """
+for i in range(10000):
+    prepared.bind(account=account, statuses=statuses)._query
+"""
+
+    print("-" * 100)
+    print("""Building 10000 queries - prepared query""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+
+def from_son_main():
+    """
+    Hydrating 100000 documents from their SON, as iterating over a queryset
+    does, comparing construction through __init__ with the _from_son fast
+    path.  No database connection is needed.
+    """
+    setup = """
+import datetime
+from bson import ObjectId
+from mongoengine import (Document, DateTimeField, IntField, ListField,
+                         StringField)
+
+class Event(Document):
+    name = StringField(db_field='n')
+    kind = StringField(choices=('click', 'view'))
+    count = IntField(default=0)
+    score = IntField()
+    tags = ListField(StringField())
+    created = DateTimeField(default=datetime.datetime.now)
+    meta = {'allow_inheritance': False}
+
+sons = [Event(id=ObjectId(), name='event %d' % i, kind='click', count=i,
+              score=i % 7, tags=['a', 'b'],
+              created=datetime.datetime.now()).to_mongo()
+        for i in range(100000)]
+"""
+
+    stmt = """
+for son in sons:
+    Event._from_son_init(son)
+"""
+
+    print("-" * 100)
+    print("""Creating 100000 documents from SON - __init__""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+    stmt = """
+for son in sons:
+    Event._from_son(son)
+"""
+
+    print("-" * 100)
+    print("""Creating 100000 documents from SON - _from_son""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+
+def lazy_decode_main():
+    """
+    Reading 3 of the 60 fields of 10000 documents fetched as raw BSON,
+    comparing decoding every field up front with lazy decoding.  No database
+    connection is needed.
+    """
+    setup = """
+import bson
+from bson.raw_bson import RawBSONDocument
+from mongoengine import Document, IntField, ListField, StringField
+
+attrs = {'meta': {'allow_inheritance': False}}
+for i in range(30):
+    attrs['name%d' % i] = StringField()
+    attrs['counts%d' % i] = ListField(IntField())
+Wide = type('Wide', (Document,), attrs)
+
+values = {}
+for i in range(30):
+    values['name%d' % i] = 'value %d' % i
+    values['counts%d' % i] = list(range(20))
+raws = [RawBSONDocument(bson.BSON.encode(Wide(**values).to_mongo()))
+        for i in range(10000)]
+"""
+
+    stmt = """
+for raw in raws:
+    doc = Wide._from_son(bson.BSON(raw.raw).decode())
+    doc.name0, doc.counts1, doc.name2
+"""
+
+    print("-" * 100)
+    print("""Reading 3 of 60 fields of 10000 raw documents - eager""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+    stmt = """
+for raw in raws:
+    doc = Wide._from_son(raw)
+    doc.name0, doc.counts1, doc.name2
+"""
+
+    print("-" * 100)
+    print("""Reading 3 of 60 fields of 10000 raw documents - lazy""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+
+def to_mongo_main():
+    """
+    Converting 10000 documents with an embedded document to SON, comparing
+    the generic field by field conversion with the generated one.  No
+    database connection is needed.
+    """
+    setup = """
+from datetime import datetime
+from mongoengine import (Document, EmbeddedDocument, EmbeddedDocumentField,
+                         BooleanField, DateTimeField, IntField, ListField,
+                         StringField)
+
+class Address(EmbeddedDocument):
+    street = StringField(db_field='s')
+    city = StringField(db_field='c')
+    number = IntField(db_field='n')
+
+class Person(Document):
+    name = StringField(db_field='n')
+    email = StringField(db_field='e')
+    age = IntField(db_field='a')
+    active = BooleanField(db_field='ac')
+    created = DateTimeField(db_field='cr')
+    tags = ListField(StringField(), db_field='t')
+    address = EmbeddedDocumentField(Address, db_field='ad')
+
+people = [Person(name=u'Ross %d' % i, email=u'ross@example.com', age=i,
+                 active=True, created=datetime(2012, 1, 1), tags=[u'a'],
+                 address=Address(street=u'Main', city=u'Leeds', number=i))
+          for i in range(10000)]
+"""
+
+    stmt = """
+for person in people:
+    person._generic_to_mongo()
+"""
+
+    print("-" * 100)
+    print("""Converting 10000 documents to SON - generic""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+    stmt = """
+for person in people:
+    person.to_mongo()
+"""
+
+    print("-" * 100)
+    print("""Converting 10000 documents to SON - generated""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+
+def delta_main():
+    """
+    Working out what to save after editing one field of 1000 documents of
+    about 50KB each, comparing converting the whole document (twice, as
+    saves used to) with converting only the changed value.  No database
+    connection is needed.
+    """
+    setup = """
+from bson import ObjectId
+from mongoengine import (Document, EmbeddedDocument, EmbeddedDocumentField,
+                         IntField, ListField, StringField)
+
+class Comment(EmbeddedDocument):
+    author = StringField()
+    text = StringField()
+    votes = IntField()
+
+class Post(Document):
+    title = StringField()
+    body = StringField()
+    comments = ListField(EmbeddedDocumentField(Comment))
+    meta = {'allow_inheritance': False}
+
+son = Post(title=u'Title', body=u'x' * 10000,
+           comments=[Comment(author=u'Ross', text=u'y' * 100, votes=i)
+                     for i in range(250)]).to_mongo()
+posts = []
+for i in range(1000):
+    son['_id'] = ObjectId()
+    posts.append(Post._from_son(son))
+"""
+
+    stmt = """
+for post in posts:
+    post.title = u'New title'
+    post.to_mongo()
+    post.to_mongo()
+"""
+
+    print("-" * 100)
+    print("""Single field edits of 1000 50KB documents - whole document""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+    stmt = """
+for post in posts:
+    post.title = u'New title'
+    post._delta()
+"""
+
+    print("-" * 100)
+    print("""Single field edits of 1000 50KB documents - changed paths""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+
+def dict_key_main():
+    """
+    The DictField benchmark above with large maps: working out what to save
+    after updating one key in each of 1000 dictionaries of 5000 keys,
+    comparing setting the whole dictionary with setting the key.  No
+    database connection is needed.
+    """
+    setup = """
+from bson import ObjectId
+from mongoengine import Document, DictField
+
+class Noddy(Document):
+    fields = DictField()
+    meta = {'allow_inheritance': False}
+
+son = Noddy(fields=dict(("key" + str(j), "value " + str(j))
+                        for j in range(5000))).to_mongo()
+noddys = []
+for i in range(1000):
+    son['_id'] = ObjectId()
+    noddys.append(Noddy._from_son(son))
+for noddy in noddys:
+    noddy.fields["key0"] = "changed"
+"""
+
+    stmt = """
+for noddy in noddys:
+    noddy._mark_as_changed('fields')
+    noddy._delta()
+    noddy._changed_fields.remove('fields')
+"""
+
+    print("-" * 100)
+    print("""One key of 1000 dictionaries of 5000 keys - whole dictionary""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+    stmt = """
+for noddy in noddys:
+    noddy._delta()
+"""
+
+    print("-" * 100)
+    print("""One key of 1000 dictionaries of 5000 keys - changed key""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+
+def list_append_main():
+    """
+    Working out what to save after appending one comment to each of 1000
+    documents holding 5000 comments, comparing setting the whole list with
+    pushing the new comment.  No database connection is needed.
+    """
+    setup = """
+from bson import ObjectId
+from mongoengine import (Document, EmbeddedDocument, EmbeddedDocumentField,
+                         IntField, ListField, StringField)
+
+class Comment(EmbeddedDocument):
+    author = StringField()
+    votes = IntField()
+
+class Feed(Document):
+    comments = ListField(EmbeddedDocumentField(Comment))
+    meta = {'allow_inheritance': False}
+
+son = Feed(comments=[Comment(author=u'Ross', votes=i)
+                     for i in range(5000)]).to_mongo()
+feeds = []
+for i in range(1000):
+    son['_id'] = ObjectId()
+    feeds.append(Feed._from_son(son))
+for feed in feeds:
+    feed.comments.append(Comment(author=u'Ross', votes=0))
+"""
+
+    stmt = """
+for feed in feeds:
+    feed._delta_update(list_operations=False)
+"""
+
+    print("-" * 100)
+    print("""One append to 1000 lists of 5000 comments - $set""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+    stmt = """
+for feed in feeds:
+    feed._delta_update()
+"""
+
+    print("-" * 100)
+    print("""One append to 1000 lists of 5000 comments - $push""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+
+def to_columns_main():
+    """
+    Reading two numeric and a datetime field of 100000 documents into
+    arrays, comparing iterating the queryset with filling columns.
+    """
+    setup = """
+import array
+from datetime import datetime, timedelta
+from mongoengine import Document, DateTimeField, FloatField, IntField, connect
+from mongoengine.connection import register_db
+
+connect(alias='default')
+register_db('timeit_test')
+
+class Sale(Document):
+    price = FloatField()
+    quantity = IntField()
+    created = DateTimeField()
+    meta = {'allow_inheritance': False}
+
+Sale.drop_collection()
+start = datetime(2012, 1, 1)
+Sale._get_collection().insert_many([
+    {'price': i * 0.5, 'quantity': i % 10,
+     'created': start + timedelta(seconds=i)} for i in range(100000)])
+"""
+
+    stmt = """
+price, quantity, created = array.array('d'), array.array('q'), []
+for sale in Sale.objects:
+    price.append(sale.price)
+    quantity.append(sale.quantity)
+    created.append(sale.created)
+"""
+
+    print("-" * 100)
+    print("""Reading 3 fields of 100000 documents - iterating""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+    stmt = """
+Sale.objects.to_columns('price', 'quantity', 'created')
+"""
+
+    print("-" * 100)
+    print("""Reading 3 fields of 100000 documents - to_columns""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+
+def insert_iter_main():
+    """
+    Inserting 100000 documents, comparing building the list for a bulk
+    insert with inserting from a generator, also overlapping the encoding
+    of a batch with the write of the last.
+    """
+    setup = """
+from mongoengine import Document, IntField, StringField, connect
+from mongoengine.connection import register_db
+
+connect(alias='default')
+register_db('timeit_test')
+
+class Noddy(Document):
+    name = StringField()
+    number = IntField()
+    meta = {'allow_inheritance': False}
+
+Noddy.drop_collection()
+
+def noddys():
+    for i in range(100000):
+        yield Noddy(name=u'noddy %d' % i, number=i)
+"""
+
+    stmt = """
+Noddy.objects.insert(list(noddys()), load_bulk=False)
+"""
+
+    print("-" * 100)
+    print("""Inserting 100000 documents - insert""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+    stmt = """
+for object_id in Noddy.objects.insert_iter(noddys()):
+    pass
+"""
+
+    print("-" * 100)
+    print("""Inserting 100000 documents - insert_iter""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+    stmt = """
+for object_id in Noddy.objects.insert_iter(noddys(), overlap=True):
+    pass
+"""
+
+    print("-" * 100)
+    print("""Inserting 100000 documents - insert_iter, overlap=True""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+
+def prefetch_main():
+    """
+    Iterating 20000 documents in batches of 500 over a link with 10ms of
+    latency per round trip, comparing serial iteration with prefetching the
+    next batches while the current one is converted.  The latency is added
+    to each batch pymongo fetches.
+    """
+    setup = """
+import time
+from pymongo.cursor import Cursor
+from mongoengine import Document, IntField, ListField, StringField, connect
+from mongoengine.connection import register_db
+
+connect(alias='default')
+register_db('timeit_test')
+
+class Noddy(Document):
+    name = StringField()
+    numbers = ListField(IntField())
+    meta = {'allow_inheritance': False}
+
+Noddy.drop_collection()
+for object_id in Noddy.objects.insert_iter(
+        Noddy(name=u'noddy %d' % i, numbers=list(range(20)))
+        for i in range(20000)):
+    pass
+
+_refresh = Cursor._refresh
+
+def slow_refresh(self):
+    time.sleep(0.01)
+    return _refresh(self)
+Cursor._refresh = slow_refresh
+"""
+
+    stmt = """
+for noddy in Noddy.objects.batch_size(500):
+    noddy.name
+"""
+
+    print("-" * 100)
+    print("""Iterating 20000 documents with 10ms latency - serial""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+    stmt = """
+for noddy in Noddy.objects.batch_size(500).prefetch(depth=2):
+    noddy.name
+"""
+
+    print("-" * 100)
+    print("""Iterating 20000 documents with 10ms latency - prefetch""")
+    t = timeit.Timer(stmt=stmt, setup=setup)
+    print(t.timeit(1))
+
+
 if __name__ == "__main__":
-    main()
+    import sys
+    benchmarks = {
+        'main': main,
+        'lookup_field': lookup_field_main,
+        'prepared': prepared_main,
+        'from_son': from_son_main,
+        'lazy_decode': lazy_decode_main,
+        'to_mongo': to_mongo_main,
+        'delta': delta_main,
+        'list_append': list_append_main,
+        'dict_key': dict_key_main,
+        'to_columns': to_columns_main,
+        'insert_iter': insert_iter_main,
+        'prefetch': prefetch_main,
+    }
+    benchmarks[sys.argv[1] if len(sys.argv) > 1 else 'main']()
@@ -10,9 +10,14 @@ from . import queryset
 from .queryset import *
 from . import signals
 from .signals import *
+from . import unitofwork
+from .unitofwork import *
+from . import writebehind
+from .writebehind import *
 
 __all__ = (document.__all__ + fields.__all__ + connection.__all__ +
-           queryset.__all__ + signals.__all__)
+           queryset.__all__ + signals.__all__ + unitofwork.__all__ +
+           writebehind.__all__)
 
 VERSION = (0, 7, 8)
 
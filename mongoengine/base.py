@@ -8,10 +8,13 @@ from .queryset import QuerySet, QuerySetManager
 from .queryset import DoesNotExist, MultipleObjectsReturned
 from .queryset import DO_NOTHING
 
-from . import signals
+from . import signals, unitofwork
 
 import sys
-from bson import ObjectId
+import struct
+from bson import BSON, ObjectId
+from bson.codec_options import DEFAULT_CODEC_OPTIONS
+from bson.raw_bson import RawBSONDocument
 import operator
 
 from functools import partial
@@ -102,6 +105,9 @@ class ValidationError(AssertionError):
 
 
 _document_registry = {}
+# Bumped whenever a document class is registered, so that cached field path
+# resolutions made before a string reference could be resolved are dropped
+_document_registry_generation = 0
 
 
 def get_document(name):
@@ -122,6 +128,95 @@ def get_document(name):
     return doc
 
 
+# The key, and the placeholder in the resolved fields, that list indexes
+# share in a FieldPathTrie
+_LIST_INDEX = object()
+
+
+class FieldPathNode(object):
+    """A node of a :class:`FieldPathTrie`: the fields resolved along the path
+    leading to it, the field further segments are resolved against and the
+    child nodes keyed by path segment.
+    """
+
+    __slots__ = ('fields', 'field', 'children')
+
+    def __init__(self, fields=(), field=None):
+        self.fields = fields
+        self.field = field
+        self.children = {}
+
+
+class FieldPathTrie(object):
+    """Resolved field paths of a document class, used by
+    :meth:`~mongoengine.queryset.QuerySet._lookup_field`.
+
+    Each document class gets its own trie from its metaclass.  It starts out
+    empty and every path segment is resolved once, on first lookup, through
+    the fields' ``lookup_member`` (embedded documents, list and dict members)
+    and list indexes.  Later lookups of a known path are plain dict hits.
+    All list indexes share one child, as an index doesn't change how the
+    rest of the path resolves.  Segments that aren't part of the schema,
+    dict keys and dynamic field names, are resolved on every lookup rather
+    than kept, so that the trie stays as small as the schema.  The trie is
+    emptied whenever a new document class is registered, as that may change
+    how string named or recursive references resolve.
+    """
+
+    __slots__ = ('root', 'generation')
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.root = FieldPathNode()
+        self.generation = _document_registry_generation
+
+    def lookup(self, document, parts):
+        """Return the list of fields for the path `parts` of `document`.
+        """
+        if self.generation != _document_registry_generation:
+            self.clear()
+
+        from .fields import DictField
+
+        node = self.root
+        cached = True
+        indexes = []
+        for position, part in enumerate(parts):
+            key = part
+            if part.isdigit():
+                key = _LIST_INDEX
+                indexes.append((position, part))
+            child = node.children.get(key) if cached else None
+            if child is None:
+                resolved, field = QuerySet._lookup_field_part(
+                    document, node.field, part, parts)
+                if key is _LIST_INDEX:
+                    resolved = _LIST_INDEX
+                cached = cached and (key is _LIST_INDEX or not (
+                    isinstance(resolved, six.string_types) or
+                    isinstance(field, BaseDynamicField) or
+                    isinstance(node.field, DictField)))
+                child = FieldPathNode(node.fields + (resolved,), field)
+                if cached:
+                    node.children[key] = child
+            node = child
+        fields = list(node.fields)
+        for position, part in indexes:
+            fields[position] = part
+        return fields
+
+    def __len__(self):
+        count = 0
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            count += len(node.children)
+            nodes.extend(node.children.values())
+        return count
+
+
 class BaseField(object):
     """A base class for fields in a MongoDB document. Instances of this class
     may be added to subclasses of `Document` to define a document's schema.
@@ -591,6 +686,7 @@ class DocumentMetaclass(type):
             if k != v.db_field}
         attrs['_reverse_db_field_map'] = {
             v: k for k, v in attrs['_db_field_map'].items()}
+        attrs['_field_path_trie'] = FieldPathTrie()
 
         from .document import Document, EmbeddedDocument
         from .fields import DictField
@@ -638,8 +734,9 @@ class DocumentMetaclass(type):
         exc = subclass_exception('MultipleObjectsReturned', base_excs, module)
         new_class.add_to_class('MultipleObjectsReturned', exc)
 
-        global _document_registry
+        global _document_registry, _document_registry_generation
         _document_registry[doc_class_name] = new_class
+        _document_registry_generation += 1
 
         return new_class
 
@@ -702,6 +799,8 @@ class TopLevelDocumentMetaclass(DocumentMetaclass):
                     'allow_inheritance',
                     'queryset_class',
                     'db_alias',
+                    'lazy_decode',
+                    'write_behind',
                 )
                 for key in keys_to_propogate:
                     if key in base._meta:
@@ -738,7 +837,9 @@ class TopLevelDocumentMetaclass(DocumentMetaclass):
             'index_opts': {},
             'queryset_class': QuerySet,
             'delete_rules': {},
-            'allow_inheritance': True
+            'allow_inheritance': True,
+            'lazy_decode': False,
+            'write_behind': None,
         }
 
         allow_inheritance_defined = (
@@ -790,12 +891,47 @@ class TopLevelDocumentMetaclass(DocumentMetaclass):
         return new_class
 
 
+def _identity_conversions():
+    """Return a ``to_python -> type`` mapping of the field conversions
+    that give back values of that exact type unchanged.
+    """
+    from .fields import BooleanField, FloatField, IntField, StringField
+
+    identities = {}
+    for field_type, python_type in ((BooleanField, bool),
+                                    (FloatField, float),
+                                    (IntField, int),
+                                    (StringField, six.text_type)):
+        to_python = six.get_unbound_function(field_type.to_python)
+        identities[to_python] = python_type
+    return identities
+
+
+def _holds_embedded_documents(field):
+    """Return whether the values of `field` may be, or directly contain,
+    embedded documents.
+    """
+    from .fields import EmbeddedDocumentField, GenericEmbeddedDocumentField
+
+    if isinstance(field, ComplexBaseField):
+        if field.field is None:
+            return True
+        field = field.field
+    return isinstance(field, (EmbeddedDocumentField,
+                              GenericEmbeddedDocumentField, BaseDynamicField))
+
+
 @six.python_2_unicode_compatible
 class BaseDocument(object):
     _dynamic = False
     _created = True
     _dynamic_lock = True
     _initialised = False
+    _embedded = False
+    # The document, list or dict holding an embedded document and its key
+    # there
+    _instance = None
+    _name = None
 
     def __init__(self, **values):
         signals.pre_init.send(self.__class__, document=self, values=values)
@@ -930,6 +1066,15 @@ class BaseDocument(object):
     def to_mongo(self):
         """Return data dictionary ready for use with MongoDB.
         """
+        serializer = type(self).__dict__.get('_to_mongo_serializer')
+        if serializer is None:
+            serializer = type(self)._build_to_mongo_serializer()
+        return serializer(self)
+
+    def _generic_to_mongo(self):
+        """The field by field conversion :meth:`to_mongo` is generated
+        from, used as is for classes it cannot be generated for.
+        """
         data = {}
         for field_name, field in self._fields.items():
             value = getattr(self, field_name, None)
@@ -949,6 +1094,106 @@ class BaseDocument(object):
             data[name] = field.to_mongo(self._data.get(name, None))
         return data
 
+    @classmethod
+    def _build_to_mongo_serializer(cls):
+        """Generate the function :meth:`to_mongo` uses for instances of
+        this class: the fields' db names are inlined, values that are
+        already of the type a plain field converts to are stored as they
+        are and embedded documents go straight to their own class' function.
+        The output is the same as :meth:`_generic_to_mongo`'s.
+        """
+        from .fields import EmbeddedDocumentField
+
+        identities = _identity_conversions()
+        plain_get = six.get_unbound_function(BaseField.__get__)
+        plain_to_mongo = six.get_unbound_function(BaseField.to_mongo)
+        base_to_mongo = six.get_unbound_function(BaseDocument.to_mongo)
+
+        def class_attribute(name):
+            for klass in cls.__mro__:
+                if name in klass.__dict__:
+                    return klass.__dict__[name]
+
+        namespace = {}
+        lines = ['def to_mongo(self):',
+                 '    data = {}',
+                 '    _data = self._data']
+        for i, (name, field) in enumerate(cls._fields.items()):
+            field_type = type(field)
+            key = repr(field.db_field)
+            namespace['field%d' % i] = field
+            namespace['to_mongo%d' % i] = field.to_mongo
+
+            if (class_attribute(name) is field and six.get_unbound_function(
+                    field_type.__get__) is plain_get):
+                lines.append('    value = _data.get(%r)' % name)
+                if field.default is not None:
+                    lines.append('    if value is None:')
+                    if callable(field.default):
+                        lines.append('        value = field%d.default()' % i)
+                    else:
+                        lines.append('        value = field%d.default' % i)
+            else:
+                lines.append('    value = getattr(self, %r, None)' % name)
+            lines.append('    if value is not None:')
+
+            python_type = None
+            if six.get_unbound_function(field_type.to_mongo) is plain_to_mongo:
+                python_type = identities.get(
+                    six.get_unbound_function(field_type.to_python))
+            document_type = None
+            if (isinstance(field, EmbeddedDocumentField) and
+                    six.get_unbound_function(
+                        field_type.to_mongo) is six.get_unbound_function(
+                            EmbeddedDocumentField.to_mongo)):
+                document_type = field.document_type_obj
+                if (isinstance(document_type, six.string_types) or
+                        six.get_unbound_function(
+                            document_type.to_mongo) is not base_to_mongo):
+                    document_type = None
+
+            if python_type is not None:
+                namespace['type%d' % i] = python_type
+                lines.append('        if value.__class__ is type%d:' % i)
+                lines.append('            data[%s] = value' % key)
+                lines.append('        else:')
+                lines.append('            data[%s] = to_mongo%d(value)'
+                             % (key, i))
+            elif document_type is not None:
+                namespace['type%d' % i] = document_type
+                namespace['serializer%d' % i] = document_type.__dict__.get
+                namespace['build%d' % i] = (
+                    document_type._build_to_mongo_serializer)
+                lines.append('        if value.__class__ is type%d:' % i)
+                lines.append("            serializer = serializer%d("
+                             "'_to_mongo_serializer') or build%d()" % (i, i))
+                lines.append('            data[%s] = serializer(value)' % key)
+                lines.append('        else:')
+                lines.append('            data[%s] = to_mongo%d(value)'
+                             % (key, i))
+            else:
+                lines.append('        data[%s] = to_mongo%d(value)' % (key, i))
+
+        # Only add _cls if allow_inheritance is not False
+        if not (hasattr(cls, '_meta') and
+                cls._meta.get('allow_inheritance', True) is False):
+            lines.append("    data['_cls'] = %r" % cls._class_name)
+        if any(f.db_field == '_id' for f in cls._fields.values()):
+            lines.append("    if '_id' in data and data['_id'] is None:")
+            lines.append("        del data['_id']")
+        if cls._dynamic:
+            lines.append('    for name, field in '
+                         'self._dynamic_fields.items():')
+            lines.append('        data[name] = field.to_mongo('
+                         '_data.get(name, None))')
+        lines.append('    return data')
+
+        source = '\n'.join(lines) + '\n'
+        code = compile(source, '<%s.to_mongo>' % cls.__name__, 'exec')
+        six.exec_(code, namespace)
+        cls._to_mongo_serializer = namespace['to_mongo']
+        return cls._to_mongo_serializer
+
     @classmethod
     def _get_collection_name(cls):
         """Returns the collection name for this class.
@@ -956,21 +1201,172 @@ class BaseDocument(object):
         return cls._meta.get('collection', None)
 
     @classmethod
-    def _from_son(cls, son):
+    def _from_son(cls, son, codec_options=None):
         """Create an instance of a Document (subclass) from a PyMongo SON.
+        The fields of a :class:`~bson.raw_bson.RawBSONDocument` are only
+        decoded, using `codec_options`, when they are first read.
         """
+        raw = None
+        if isinstance(son, RawBSONDocument):
+            raw = son.raw
+            codec_options = codec_options or DEFAULT_CODEC_OPTIONS
+            elements = scan_bson_elements(raw)
+
         # get the class name from the document, falling back to the given
         # class if unavailable
-        class_name = son.get(u'_cls', cls._class_name)
-        data = {str(key): value for key, value in son.items()}
-
-        if '_cls' in data:
-            del data['_cls']
+        if raw is None:
+            class_name = son.get(u'_cls', cls._class_name)
+        elif '_cls' in elements:
+            start, end = elements['_cls']
+            class_name = decode_bson_element(raw, start, end, codec_options)
+        else:
+            class_name = cls._class_name
 
         # Return correct subclass for document type
         if class_name != cls._class_name:
             cls = get_document(class_name)
 
+        plan = cls.__dict__.get('_from_son_plan')
+        if plan is None:
+            plan = cls._build_from_son_plan()
+        if (not plan or signals.pre_init.has_receivers_for(cls) or
+                signals.post_init.has_receivers_for(cls)):
+            if raw is not None:
+                son = BSON(raw).decode(codec_options=codec_options)
+            return cls._from_son_init(son)
+
+        # Build the instance's data directly rather than going through
+        # __init__, which would set every field through its descriptor
+        son_fields, defaults, choice_fields = plan
+        obj = cls.__new__(cls)
+        if raw is None:
+            data = {}
+            items = son.items()
+        else:
+            # Fields stored straight into _data are left to be decoded when
+            # they are read, the others are decoded now
+            data = LazyData(raw, codec_options, obj)
+            items = []
+            for key, (start, end) in elements.items():
+                entry = son_fields.get(key)
+                if entry is not None and entry[3] and key != '_id':
+                    name, to_python, python_type, direct, linked = entry
+                    data._pending[name] = (start, end, to_python,
+                                           python_type, linked)
+                else:
+                    items.append((key, decode_bson_element(
+                        raw, start, end, codec_options)))
+
+        # None of the internal attributes need BaseDocument.__setattr__
+        state = obj.__dict__
+        state['_data'] = data
+        extra = []
+        for key, value in items:
+            entry = son_fields.get(key)
+            if entry is None:
+                if key != '_cls':
+                    extra.append((str(key), value))
+                continue
+            name, to_python, python_type, direct, linked = entry
+            if key == '_id':
+                # __init__ used to keep the raw _id as an attribute too
+                state['_id'] = value
+            if value is not None and type(value) is not python_type:
+                value = to_python(value)
+            if linked and value is not None:
+                value = obj._link_value(name, value)
+            if direct or value is None:
+                data[name] = value
+            else:
+                extra.append((name, value))
+
+        changed_fields = []
+        for name, default, direct in defaults:
+            if len(data) == len(defaults):
+                break
+            if name in data:
+                continue
+            if direct:
+                value = default() if callable(default) else default
+                data[name] = value
+            else:
+                value = getattr(obj, name, None)
+                setattr(obj, name, value)
+                value = data.get(name)
+            if value is not None and default and isinstance(value,
+                                                            BaseDocument):
+                changed_fields.append(name)
+
+        for key, value in extra:
+            setattr(obj, key, value)
+
+        for field in choice_fields:
+            state['get_%s_display' % field.name] = partial(
+                obj.__get_field_display, field=field)
+
+        state['_initialised'] = True
+        state['_changed_fields'] = changed_fields
+        state['_created'] = False
+        return obj
+
+    @classmethod
+    def _build_from_son_plan(cls):
+        """Precompute how a SON from the database maps onto the fields of
+        this class for :meth:`_from_son`: a ``db_field -> (attr_name,
+        to_python, python_type, direct, linked)`` table, the ``(attr_name,
+        default, direct)`` entries used for fields missing from the SON and
+        the fields with choices.  Values that already are of a field's
+        `python_type` need no conversion.  `direct` fields may be stored
+        straight into `_data`, the others go through their descriptors.
+        The embedded documents in `linked` fields are linked to the new
+        document.  Classes that override
+        `__init__` or `__setattr__`, and dynamic documents, get an empty
+        plan and are always created through `__init__`.
+        """
+        from .document import EmbeddedDocument
+
+        identities = _identity_conversions()
+        plan = ()
+        init = six.get_unbound_function(cls.__init__)
+        setter = six.get_unbound_function(cls.__setattr__)
+        if (not cls._dynamic and
+                init in (six.get_unbound_function(BaseDocument.__init__),
+                         six.get_unbound_function(EmbeddedDocument.__init__))
+                and setter is six.get_unbound_function(
+                    BaseDocument.__setattr__)):
+            plain_get = six.get_unbound_function(BaseField.__get__)
+            plain_sets = (six.get_unbound_function(BaseField.__set__),
+                          six.get_unbound_function(ComplexBaseField.__set__))
+            son_fields = {}
+            defaults = []
+            linked = cls._embedded_field_names()
+            for name, field in cls._fields.items():
+                field_type = type(field)
+                direct_set = six.get_unbound_function(
+                    field_type.__set__) in plain_sets
+                direct_get = direct_set and six.get_unbound_function(
+                    field_type.__get__) is plain_get
+                python_type = identities.get(
+                    six.get_unbound_function(field_type.to_python))
+                son_fields[field.db_field] = (
+                    name, field.to_python, python_type, direct_set,
+                    name in linked)
+                defaults.append((name, field.default, direct_get))
+            choice_fields = [f for f in cls._fields.values() if f.choices]
+            plan = (son_fields, defaults, choice_fields)
+
+        cls._from_son_plan = plan
+        return plan
+
+    @classmethod
+    def _from_son_init(cls, son):
+        """Create an instance from a PyMongo SON through `__init__`.
+        """
+        data = {str(key): value for key, value in son.items()}
+
+        if '_cls' in data:
+            del data['_cls']
+
         changed_fields = []
         for field_name, field in cls._fields.items():
             if field.db_field in data:
@@ -997,13 +1393,67 @@ class BaseDocument(object):
         if not key:
             return
         key = self._db_field_map.get(key, key)
-        if hasattr(self, '_changed_fields') and key not in self._changed_fields:
-            self._changed_fields.append(key)
+        state = self.__dict__
+        changed_fields = state.get('_changed_fields')
+        if changed_fields is None:
+            return
+        # A set of the changed keys, rebuilt whenever the list is replaced
+        index = state.get('_changed_index')
+        if (index is None or index[0] is not changed_fields or
+                len(index[1]) != len(changed_fields)):
+            index = (changed_fields, set(changed_fields))
+            state['_changed_index'] = index
+        if key not in index[1]:
+            changed_fields.append(key)
+            index[1].add(key)
+            _propagate_changes(self)
+            if not self._embedded:
+                _track_changes(self)
+
+    def _mark_child_changed(self, child):
+        """Record that the embedded document, list or dict `child` holds
+        changes.
+        """
+        children = self.__dict__.setdefault('_changed_children', set())
+        if child._name not in children:
+            children.add(child._name)
+            if not self._embedded:
+                _track_changes(self)
+
+    def _link_value(self, name, value):
+        """Make the embedded documents in `value`, the value of the field
+        `name`, report their changes to this document.  Lists and dicts are
+        returned wrapped so that they do.
+        """
+        if isinstance(value, BaseDocument):
+            if value._embedded:
+                _link(value, self, name)
+        elif isinstance(value, (list, tuple)):
+            if not isinstance(value, BaseList):
+                value = BaseList(value, self, name)
+        elif isinstance(value, dict):
+            if not isinstance(value, BaseDict):
+                value = BaseDict(value, self, name)
+        return value
+
+    @classmethod
+    def _embedded_field_names(cls):
+        """Return the names of the fields that may hold embedded documents.
+        """
+        names = cls.__dict__.get('_embedded_fields')
+        if names is None:
+            names = tuple(name for name, field in cls._fields.items()
+                          if _holds_embedded_documents(field))
+            cls._embedded_fields = names
+        return names
 
     def _get_changed_fields(self, key='', inspected=None):
         """Returns a list of all fields that have explicitly been changed.
+
+        Embedded documents report their changes up to the documents, lists
+        and dicts holding them, so only the values that did, or that are not
+        linked to this document yet, are looked into.
         """
-        from .document import EmbeddedDocument, DynamicEmbeddedDocument
         _changed_fields = []
         _changed_fields += getattr(self, '_changed_fields', [])
 
@@ -1013,30 +1463,60 @@ class BaseDocument(object):
                 return _changed_fields
             inspected.add(self.id)
 
-        field_list = self._fields.copy()
+        field_list = self._embedded_field_names()
         if self._dynamic:
-            field_list.update(self._dynamic_fields)
+            field_list += tuple(self._dynamic_fields)
 
+        changed = set(_changed_fields)
+        changed_children = self.__dict__.get('_changed_children', set())
+        # Fields still to be decoded can't have changed
+        pending = getattr(self._data, '_pending', ())
         for field_name in field_list:
             db_field_name = self._db_field_map.get(field_name, field_name)
+            if db_field_name in changed or field_name in pending:
+                continue
             key = '%s.' % db_field_name
-            field = getattr(self, field_name, None)
+            field = dict.get(self._data, field_name)
+            if field is None or type(field) in (list, tuple, dict):
+                # Defaults, and lists and dicts that are linked once read
+                field = getattr(self, field_name, None)
+            linked = (getattr(field, '_instance', None) is self and
+                      field._name == field_name)
+            if linked and field_name not in changed_children:
+                continue
             if hasattr(field, 'id'):
                 if field.id in inspected:
                     continue
                 inspected.add(field.id)
 
-            # Grab all embedded fields that have been changed
-            if isinstance(field,
-                          (EmbeddedDocument, DynamicEmbeddedDocument)) and \
-                    db_field_name not in _changed_fields:
+            if linked:
+                if isinstance(field, BaseDocument):
+                    children = [(key, field)]
+                else:
+                    children = [("%s%s." % (key, index), value) for
+                                index, value in field._changed_documents()]
+                found = False
+                for list_key, value in children:
+                    value_changes = [
+                        "%s%s" % (list_key, k) for k in
+                        value._get_changed_fields(list_key, inspected) if k]
+                    if value_changes:
+                        found = True
+                        _changed_fields += value_changes
+                    elif field is not value:
+                        field._forget_child(value)
+                if not found:
+                    changed_children.discard(field_name)
+
+            # Values not linked yet are searched as a whole
+            elif isinstance(field, BaseDocument) and field._embedded:
                 _changed_fields += [
                     "%s%s" % (key, k) for k in
                     field._get_changed_fields(key, inspected) if k]
+                _link(field, self, field_name)
 
             # Loop list / dict fields as they contain documents
-            elif isinstance(field, (list, tuple, dict)) and \
-                    db_field_name not in _changed_fields:
+            elif isinstance(field, (list, tuple, dict)):
                 # Determine the iterator to use
                 if isinstance(field, dict):
                     iterator = six.iteritems(field)
@@ -1051,81 +1531,155 @@ class BaseDocument(object):
                         value._get_changed_fields(list_key, inspected) if k]
         return _changed_fields
 
+    def _path_to_mongo(self, path):
+        """Return the value at the db field `path` as :meth:`to_mongo` would
+        give it, along with the document and name of the field it is in.
+        Only the value itself is converted.  The document is ``None`` when
+        the path doesn't lead through documents, lists and dicts.
+        """
+        value, field, document, name = self._resolve_path(path)
+        if value is not None:
+            value = field.to_mongo(value)
+        return value, document, name
+
+    def _resolve_path(self, path):
+        """Return the unconverted value at the db field `path` with the
+        field, document and name it is found under, or four ``None`` when
+        the path can't be followed.
+        """
+        parts = path.split('.')
+        last = len(parts) - 1
+        document = self
+        i = 0
+        while True:
+            name = document._reverse_db_field_map.get(parts[i], parts[i])
+            field = document._fields.get(name)
+            if field is None and document._dynamic:
+                field = document._dynamic_fields.get(name)
+            if field is None:
+                return None, None, None, None
+            value = getattr(document, name, None)
+            if i == last:
+                return value, field, document, name
+            i += 1
+            try:
+                if isinstance(value, (list, tuple)):
+                    value = value[int(parts[i])]
+                    i += 1
+                elif isinstance(value, dict):
+                    if i == last:
+                        return self._resolve_key(value, parts[i], field,
+                                                 document)
+                    value = value[parts[i]]
+                    i += 1
+            except (IndexError, KeyError, ValueError):
+                return None, None, None, None
+            if not isinstance(value, BaseDocument) or i > last:
+                return None, None, None, None
+            document = value
+
+    @staticmethod
+    def _resolve_key(value, key, field, document):
+        """Return the item at `key` of the dict `value` of `field` as
+        :meth:`_resolve_path` does, with the field converting it and a
+        ``None`` name.  A missing key has no field either.
+        """
+        if key not in value:
+            return None, None, document, None
+        item = value[key]
+        item_field = getattr(field, 'field', None)
+        if item_field is None:
+            if isinstance(item, BaseDocument) and not item._embedded:
+                # Referenced documents are only converted within the dict
+                return None, None, None, None
+            item_field = field
+        return item, item_field, document, None
+
     def _delta(self):
         """Returns the delta (set, unset) of the changes for a document.
-        Gets any values that have been explicitly changed.
+        Gets any values that have been explicitly changed, converting only
+        those values rather than the whole document.
+        """
+        update = self._delta_update(list_operations=False)
+        return update.get('$set', {}), update.get('$unset', {})
+
+    def _delta_update(self, list_operations=True):
+        """Returns the update document for the changes, as :meth:`_delta`
+        but with lists that were only appended to, popped or removed from
+        sent as ``$push``, ``$pop`` or ``$pull`` rather than rewritten.
         """
-        # Handles cases where not loaded from_son but has _id
-        doc = self.to_mongo()
-        set_fields = self._get_changed_fields()
+        update = {}
         set_data = {}
         unset_data = {}
-        parts = []
         if hasattr(self, '_changed_fields'):
-            set_data = {}
-            # Fetch each set item from its path
-            for path in set_fields:
-                parts = path.split('.')
-                d = doc
-                for p in parts:
-                    if hasattr(d, '__getattr__'):
-                        d = getattr(p, d)
-                    elif p.isdigit():
-                        d = d[int(p)]
+            changes = []
+            doc = None
+            paths = self._get_changed_fields()
+            marked = set(paths)
+            for path in paths:
+                if any(path[:i] in marked
+                       for i, c in enumerate(path) if c == '.'):
+                    # Within a value that is set as a whole
+                    continue
+                value, field, document, name = self._resolve_path(path)
+                if document is not None and name is None:
+                    # A key of a dict, kept whatever its value unless removed
+                    if field is None:
+                        unset_data[path] = 1
                     else:
-                        d = d.get(p)
-                set_data[path] = d
+                        set_data[path] = field.to_mongo(value)
+                    continue
+                if list_operations and value and isinstance(value, BaseList):
+                    operation = value._list_operation(document, name, field)
+                    if operation is not None:
+                        update.setdefault(operation[0], {})[path] = \
+                            operation[1]
+                        continue
+                if value is not None:
+                    value = field.to_mongo(value)
+                if document is None:
+                    # Fetch the value from the whole document instead
+                    if doc is None:
+                        doc = self.to_mongo()
+                    value = doc
+                    for p in path.split('.'):
+                        if p.isdigit() and isinstance(value, list):
+                            value = value[int(p)]
+                        else:
+                            value = value.get(p)
+                changes.append((path, value, document, name))
         else:
-            set_data = doc
-            if '_id' in set_data:
-                del(set_data['_id'])
+            # Handles cases where not loaded from_son but has _id
+            changes = [(key, value, self,
+                        self._reverse_db_field_map.get(key, key))
+                       for key, value in self.to_mongo().items()
+                       if key != '_id']
 
-        # Determine if any changed items were actually unset.
-        for path, value in list(set_data.items()):
+        for path, value, document, name in changes:
             if value or isinstance(value, bool):
+                set_data[path] = value
                 continue
 
-            # If we've set a value that ain't the default value dont unset it.
-            default = None
-            if self._dynamic and len(parts) and \
-                    parts[0] in self._dynamic_fields:
-                del(set_data[path])
+            # Determine if any changed items were actually unset.
+            if self._dynamic and path.split('.')[0] in self._dynamic_fields:
                 unset_data[path] = 1
                 continue
-            elif path in self._fields:
-                default = self._fields[path].default
-            else:  # Perform a full lookup for lists / embedded lookups
-                d = self
-                parts = path.split('.')
-                db_field_name = parts.pop()
-                for p in parts:
-                    if p.isdigit():
-                        d = d[int(p)]
-                    elif hasattr(d, '__getattribute__') and \
-                            not isinstance(d, dict):
-                        real_path = d._reverse_db_field_map.get(p, p)
-                        d = getattr(d, real_path)
-                    else:
-                        d = d.get(p)
-
-                if hasattr(d, '_fields'):
-                    field_name = d._reverse_db_field_map.get(db_field_name,
-                                                             db_field_name)
-
-                    if field_name in d._fields:
-                        default = d._fields.get(field_name).default
-                    else:
-                        default = None
 
-            if default is not None:
+            # If we've set a value that ain't the default value dont unset it.
+            default = None
+            if document is not None and name in document._fields:
+                default = document._fields[name].default
                 if callable(default):
                     default = default()
             if default != value:
-                continue
-
-            del(set_data[path])
-            unset_data[path] = 1
-        return set_data, unset_data
+                set_data[path] = value
+            else:
+                unset_data[path] = 1
+        if set_data:
+            update['$set'] = set_data
+        if unset_data:
+            update['$unset'] = unset_data
+        return update
 
     @classmethod
     def _geo_indices(cls, inspected=None):
@@ -1149,7 +1703,11 @@ class BaseDocument(object):
         for k in removals:
             if hasattr(self, k):
                 delattr(self, k)
-        return self.__dict__
+        # The links to the documents holding this one are not kept
+        state = self.__dict__.copy()
+        for k in ('_instance', '_name', '_changed_children', '_changed_index'):
+            state.pop(k, None)
+        return state
 
     def __setstate__(self, __dict__):
         self.__dict__ = __dict__
@@ -1231,6 +1789,44 @@ class BaseDocument(object):
             return hash(self.pk)
 
 
+def _link(child, parent, name):
+    """Make the embedded document `child`, found at `name` in `parent`,
+    report its changes to `parent`.
+    """
+    state = child.__dict__
+    state['_instance'] = parent
+    state['_name'] = name
+    if state.get('_changed_fields') or state.get('_changed_children'):
+        _propagate_changes(child)
+
+
+def _track_changes(document):
+    """Record the changed `document` in the open session, if any."""
+    session = unitofwork.current_session()
+    if session is not None:
+        session._changed(document)
+
+
+def _propagate_changes(child):
+    """Record in each of `child`'s ancestors, up to the root document, that
+    the way down to `child` leads to changes.
+    """
+    parent = child._instance
+    while parent is not None:
+        parent._mark_child_changed(child)
+        child, parent = parent, parent._instance
+
+
+def _field_value(container):
+    """Return the value of the field that the list or dict `container` was
+    made for.  Lists and dicts nested in it carry the same field name.
+    """
+    instance = container._instance
+    if not isinstance(instance, BaseDocument):
+        return None
+    return dict.get(instance._data, container._name)
+
+
 class BaseList(list):
     """A special list so we can watch any changes
     """
@@ -1243,15 +1839,26 @@ class BaseList(list):
         self._instance = instance
         self._name = name
         super(BaseList, self).__init__(list_items)
+        for index, value in enumerate(self):
+            if isinstance(value, BaseDocument) and value._embedded:
+                _link(value, self, index)
 
-    def __setitem__(self, *args, **kwargs):
+    def __setitem__(self, key, value):
         self._mark_as_changed()
-        super(BaseList, self).__setitem__(*args, **kwargs)
+        super(BaseList, self).__setitem__(key, value)
+        if isinstance(key, slice):
+            self._link_items(range(len(self))[key])
+        else:
+            self._link_items([key])
 
     def __delitem__(self, *args, **kwargs):
         self._mark_as_changed()
         super(BaseList, self).__delitem__(*args, **kwargs)
 
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
     def __getstate__(self):
         self.observer = None
         return self
@@ -1260,25 +1867,43 @@ class BaseList(list):
         self = state
         return self
 
-    def append(self, *args, **kwargs):
-        self._mark_as_changed()
-        return super(BaseList, self).append(*args, **kwargs)
-
-    def extend(self, *args, **kwargs):
-        self._mark_as_changed()
-        return super(BaseList, self).extend(*args, **kwargs)
+    def append(self, value):
+        self._mark_as_changed('$push', [value])
+        super(BaseList, self).append(value)
+        self._link_items([len(self) - 1])
 
-    def insert(self, *args, **kwargs):
-        self._mark_as_changed()
-        return super(BaseList, self).insert(*args, **kwargs)
+    def extend(self, values):
+        values = list(values)
+        self._mark_as_changed('$push', values)
+        start = len(self)
+        super(BaseList, self).extend(values)
+        self._link_items(range(start, len(self)))
 
-    def pop(self, *args, **kwargs):
+    def insert(self, index, value):
         self._mark_as_changed()
-        return super(BaseList, self).pop(*args, **kwargs)
+        position = min(max(index + len(self) if index < 0 else index, 0),
+                       len(self))
+        super(BaseList, self).insert(index, value)
+        self._link_items([position])
+
+    def pop(self, index=-1):
+        value = super(BaseList, self).pop(index)
+        if index in (-1, len(self)):
+            self._mark_as_changed('$pop', 1)
+        elif index in (0, -1 - len(self)):
+            self._mark_as_changed('$pop', -1)
+        else:
+            self._mark_as_changed()
+        return value
 
-    def remove(self, *args, **kwargs):
-        self._mark_as_changed()
-        return super(BaseList, self).remove(*args, **kwargs)
+    def remove(self, value):
+        super(BaseList, self).remove(value)
+        # $pull removes every equal value, remove() only the first
+        if (isinstance(value, (dict, list, tuple, BaseDocument)) or
+                value in self):
+            self._mark_as_changed()
+        else:
+            self._mark_as_changed('$pull', [value])
 
     def reverse(self, *args, **kwargs):
         self._mark_as_changed()
@@ -1288,9 +1913,109 @@ class BaseList(list):
         self._mark_as_changed()
         return super(BaseList, self).sort(*args, **kwargs)
 
-    def _mark_as_changed(self):
-        if hasattr(self._instance, '_mark_as_changed'):
-            self._instance._mark_as_changed(self._name)
+    def _mark_as_changed(self, operator=None, value=None):
+        """Mark the list as changed, logging the change as `operator` and
+        `value` if it can be sent as an atomic list update.
+        """
+        instance = self._instance
+        if not hasattr(instance, '_mark_as_changed'):
+            return
+        instance._mark_as_changed(self._name)
+        outer = _field_value(self)
+        if outer is not self:
+            # Nested in the field's value, which has to be set whole
+            if isinstance(outer, BaseList):
+                outer._log_operation(None, None)
+            return
+        self._log_operation(operator, value)
+
+    def _log_operation(self, operator, value):
+        save_count = self._root_save_count()
+        state = self.__dict__
+        log = state.get('_operations')
+        if log is None or log[0] != save_count:
+            # Saved since the log was started, the database has it all
+            log = state['_operations'] = [save_count, None, None]
+        if operator is None or log[1] is False:
+            log[1] = False
+        elif log[1] is None:
+            log[1:] = [operator, value]
+        elif log[1] == operator and operator != '$pop':
+            log[2].extend(value)
+        else:
+            # Mixed operators on one field can't go in a single update
+            log[1] = False
+
+    def _root_save_count(self):
+        """Return how many times the root document has been saved, or
+        ``None`` when the list isn't in a document.
+        """
+        node = self._instance
+        if node is None:
+            return None
+        while node._instance is not None:
+            node = node._instance
+        return node.__dict__.get('_save_count', 0)
+
+    def _list_operation(self, document, name, field):
+        """Return the ``(operator, value)`` that brings the list in the
+        database up to date, or ``None`` when it has to be set whole.
+        """
+        log = self.__dict__.get('_operations')
+        if (not log or not log[1] or self._instance is not document or
+                self._name != name or log[0] != self._root_save_count() or
+                self.__dict__.get('_changed_items')):
+            return None
+        to_mongo = six.get_unbound_function(type(field).to_mongo)
+        if to_mongo not in (ComplexBaseField.to_mongo,
+                            BaseDynamicField.to_mongo):
+            # The field rewrites the list, eg. by sorting it
+            return None
+        operator, value = log[1:]
+        if operator == '$pop':
+            return operator, value
+        value = field.to_mongo(value)
+        if operator == '$push':
+            return operator, {'$each': value}
+        if len(value) == 1:
+            return operator, value[0]
+        return operator, {'$in': value}
+
+    def _link_items(self, indexes):
+        for index in indexes:
+            value = self[index]
+            if isinstance(value, BaseDocument) and value._embedded:
+                _link(value, self, index)
+
+    def _mark_child_changed(self, child):
+        self.__dict__.setdefault('_changed_items', {})[id(child)] = child
+
+    def _changed_documents(self):
+        """Return the ``(index, document)`` pairs of the embedded documents
+        that reported changes, in list order. Documents no longer in the
+        list are forgotten.
+        """
+        items = self.__dict__.get('_changed_items')
+        if not items:
+            return []
+        children = []
+        for child in list(items.values()):
+            index = child._name
+            if not (isinstance(index, int) and index < len(self) and
+                    self[index] is child):
+                # Items have moved since the document was linked
+                index = next((i for i, value in enumerate(self)
+                              if value is child), None)
+                if index is None:
+                    del items[id(child)]
+                    continue
+                child.__dict__['_name'] = index
+            children.append((index, child))
+        children.sort(key=operator.itemgetter(0))
+        return children
+
+    def _forget_child(self, child):
+        self.__dict__.get('_changed_items', {}).pop(id(child), None)
 
 
 class BaseDict(dict):
@@ -1305,18 +2030,22 @@ class BaseDict(dict):
         self._instance = instance
         self._name = name
         super(BaseDict, self).__init__(dict_items)
+        for key, value in six.iteritems(self):
+            if isinstance(value, BaseDocument) and value._embedded:
+                _link(value, self, key)
 
-    def __setitem__(self, *args, **kwargs):
-        self._mark_as_changed()
-        super(BaseDict, self).__setitem__(*args, **kwargs)
+    def __setitem__(self, key, value):
+        self._mark_as_changed(key)
+        super(BaseDict, self).__setitem__(key, value)
+        self._link_items([key])
 
     def __delete__(self, *args, **kwargs):
         self._mark_as_changed()
         super(BaseDict, self).__delete__(*args, **kwargs)
 
-    def __delitem__(self, *args, **kwargs):
-        self._mark_as_changed()
-        super(BaseDict, self).__delitem__(*args, **kwargs)
+    def __delitem__(self, key):
+        super(BaseDict, self).__delitem__(key)
+        self._mark_as_changed(key)
 
     def __delattr__(self, *args, **kwargs):
         self._mark_as_changed()
@@ -1335,21 +2064,273 @@ class BaseDict(dict):
         self._mark_as_changed()
         super(BaseDict, self).clear(*args, **kwargs)
 
-    def pop(self, *args, **kwargs):
-        self._mark_as_changed()
-        super(BaseDict, self).pop(*args, **kwargs)
+    def pop(self, key, *args):
+        if key in self:
+            self._mark_as_changed(key)
+        return super(BaseDict, self).pop(key, *args)
 
-    def popitem(self, *args, **kwargs):
-        self._mark_as_changed()
-        super(BaseDict, self).popitem(*args, **kwargs)
+    def popitem(self):
+        item = super(BaseDict, self).popitem()
+        self._mark_as_changed(item[0])
+        return item
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
 
     def update(self, *args, **kwargs):
-        self._mark_as_changed()
-        super(BaseDict, self).update(*args, **kwargs)
+        values = dict(*args, **kwargs)
+        for key in values:
+            self._mark_as_changed(key)
+        super(BaseDict, self).update(values)
+        self._link_items(values)
+
+    def _mark_as_changed(self, key=None):
+        """Mark `key` as changed, or the whole dict when no key is given or
+        the key can't be used in a field path.
+        """
+        instance = self._instance
+        if not hasattr(instance, '_mark_as_changed'):
+            return
+        outer = _field_value(self)
+        if outer is not self:
+            # Nested in the field's value, which has to be set whole
+            instance._mark_as_changed(self._name)
+            if isinstance(outer, BaseList):
+                outer._log_operation(None, None)
+        elif (key is None or not isinstance(key, six.string_types) or
+                not key or '.' in key or '$' in key):
+            instance._mark_as_changed(self._name)
+        else:
+            name = instance._db_field_map.get(self._name, self._name)
+            instance._mark_as_changed('%s.%s' % (name, key))
+
+    def _link_items(self, keys):
+        for key in keys:
+            value = self[key]
+            if isinstance(value, BaseDocument) and value._embedded:
+                _link(value, self, key)
+
+    def _mark_child_changed(self, child):
+        self.__dict__.setdefault('_changed_items', {})[id(child)] = child
+
+    def _changed_documents(self):
+        """Return the ``(key, document)`` pairs of the embedded documents
+        that reported changes, in dict order. Documents no longer in the
+        dict are forgotten.
+        """
+        items = self.__dict__.get('_changed_items')
+        if not items:
+            return []
+        children = []
+        for child in list(items.values()):
+            key = child._name
+            if dict.get(self, key) is not child:
+                key = next((k for k, value in six.iteritems(self)
+                            if value is child), None)
+                if key is None:
+                    del items[id(child)]
+                    continue
+                child.__dict__['_name'] = key
+            children.append((key, child))
+        if len(children) > 1:
+            order = {key: i for i, key in enumerate(self)}
+            children.sort(key=lambda item: order[item[0]])
+        return children
+
+    def _forget_child(self, child):
+        self.__dict__.get('_changed_items', {}).pop(id(child), None)
+
+
+# Sizes of the BSON element values that have a fixed length, by type
+_BSON_FIXED_SIZES = {
+    0x01: 8, 0x06: 0, 0x07: 12, 0x08: 1, 0x09: 8, 0x0A: 0, 0x10: 4,
+    0x11: 8, 0x12: 8, 0x13: 16, 0x7F: 0, 0xFF: 0,
+}
+
+
+def scan_bson_elements(raw):
+    """Index the top level elements of a raw BSON document without decoding
+    them. Returns a dict mapping element names to the ``(start, end)``
+    offsets of the whole element in `raw`.
+    """
+    elements = {}
+    position = 4
+    last = len(raw) - 1
+    while position < last:
+        start = position
+        element_type = six.indexbytes(raw, position)
+        name_end = raw.index(b'\x00', position + 1)
+        name = raw[position + 1:name_end].decode('utf-8')
+        position = name_end + 1
+        if element_type in _BSON_FIXED_SIZES:
+            position += _BSON_FIXED_SIZES[element_type]
+        elif element_type in (0x03, 0x04, 0x0F):
+            # Documents, arrays and code with scope include their own size
+            position += struct.unpack_from('<i', raw, position)[0]
+        elif element_type in (0x02, 0x0D, 0x0E):
+            position += 4 + struct.unpack_from('<i', raw, position)[0]
+        elif element_type == 0x05:
+            position += 5 + struct.unpack_from('<i', raw, position)[0]
+        elif element_type == 0x0B:
+            # A regular expression is a pattern and options cstring
+            position = raw.index(b'\x00', raw.index(b'\x00', position) + 1)
+            position += 1
+        elif element_type == 0x0C:
+            position += 16 + struct.unpack_from('<i', raw, position)[0]
+        else:
+            raise ValueError('Unknown BSON element type 0x%02x' % element_type)
+        elements[name] = (start, position)
+    return elements
+
+
+def decode_bson_element(raw, start, end, codec_options=DEFAULT_CODEC_OPTIONS):
+    """Decode the value of the single element found at ``raw[start:end]``
+    by wrapping it in a document of its own.
+    """
+    element = raw[start:end]
+    document = BSON(struct.pack('<i', len(element) + 5) + element + b'\x00')
+    for value in document.decode(codec_options=codec_options).values():
+        return value
+
+
+class LazyData(dict):
+    """The `_data` of a document created from a raw BSON document. Fields
+    are only decoded and converted with their `to_python` the first time
+    they are read, iterating or copying the data decodes everything left.
+    """
+
+    def __init__(self, raw, codec_options, document=None):
+        super(LazyData, self).__init__()
+        self._raw = raw
+        self._codec_options = codec_options
+        self._document = document
+        # name -> (start, end, to_python, python_type, linked) of undecoded
+        # fields
+        self._pending = {}
+
+    def _decode(self, name):
+        start, end, to_python, python_type, linked = self._pending.pop(name)
+        value = decode_bson_element(self._raw, start, end,
+                                    self._codec_options)
+        if value is not None and type(value) is not python_type:
+            value = to_python(value)
+        if linked and value is not None:
+            value = self._document._link_value(name, value)
+        dict.__setitem__(self, name, value)
+        if not self._pending:
+            self._raw = None
+        return value
+
+    def materialize(self):
+        """Decode every field that hasn't been read yet.
+        """
+        for name in list(self._pending):
+            self._decode(name)
+
+    @property
+    def pending(self):
+        """The names of the fields that haven't been decoded yet.
+        """
+        return set(self._pending)
+
+    def __missing__(self, name):
+        if name in self._pending:
+            return self._decode(name)
+        raise KeyError(name)
+
+    def get(self, name, default=None):
+        if name in self._pending:
+            return self._decode(name)
+        return dict.get(self, name, default)
+
+    def setdefault(self, name, default=None):
+        if name in self._pending:
+            return self._decode(name)
+        return dict.setdefault(self, name, default)
+
+    def pop(self, name, *default):
+        if name in self._pending:
+            self._decode(name)
+        return dict.pop(self, name, *default)
+
+    def __contains__(self, name):
+        return name in self._pending or dict.__contains__(self, name)
+
+    def __setitem__(self, name, value):
+        self._pending.pop(name, None)
+        dict.__setitem__(self, name, value)
+
+    def __delitem__(self, name):
+        if name in self._pending:
+            self._decode(name)
+        dict.__delitem__(self, name)
+
+    def __len__(self):
+        return dict.__len__(self) + len(self._pending)
+
+    def __iter__(self):
+        self.materialize()
+        return dict.__iter__(self)
+
+    def __eq__(self, other):
+        self.materialize()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        self.materialize()
+        return dict.__repr__(self)
+
+    def __reduce__(self):
+        # Copies and pickles are plain dicts
+        return dict, (self.copy(),)
+
+    def copy(self):
+        self.materialize()
+        return dict(dict.items(self))
+
+    def keys(self):
+        self.materialize()
+        return dict.keys(self)
+
+    def values(self):
+        self.materialize()
+        return dict.values(self)
+
+    def items(self):
+        self.materialize()
+        return dict.items(self)
+
+    def update(self, *args, **kwargs):
+        for name, value in dict(*args, **kwargs).items():
+            self[name] = value
+
+    def popitem(self):
+        self.materialize()
+        return dict.popitem(self)
+
+    def clear(self):
+        self._pending.clear()
+        self._raw = None
+        dict.clear(self)
+
+    if six.PY2:
+        def iterkeys(self):
+            return iter(self.keys())
+
+        def itervalues(self):
+            return iter(self.values())
+
+        def iteritems(self):
+            return iter(self.items())
+
+        def has_key(self, name):
+            return name in self
 
-    def _mark_as_changed(self):
-        if hasattr(self._instance, '_mark_as_changed'):
-            self._instance._mark_as_changed(self._name)
 
 if sys.version_info < (2, 5):
     # Prior to Python 2.5, Exception was an old-style class
@@ -4,7 +4,7 @@ import pymongo
 import six
 from bson.dbref import DBRef
 
-from . import signals
+from . import signals, unitofwork, writebehind
 from .base import (DocumentMetaclass, TopLevelDocumentMetaclass, BaseDocument,
                   BaseDict, BaseList)
 from .queryset import OperationError, QuerySet
@@ -26,6 +26,7 @@ class EmbeddedDocument(six.with_metaclass(DocumentMetaclass, BaseDocument)):
     :class:`~mongoengine.EmbeddedDocumentField` field type.
     """
     _base = True
+    _embedded = True
 
     def __init__(self, *args, **kwargs):
         super(EmbeddedDocument, self).__init__(*args, **kwargs)
@@ -141,10 +142,15 @@ class Document(six.with_metaclass(TopLevelDocumentMetaclass, BaseDocument)):
         return cls._collection
 
     def save(self, force_insert=False, validate=True, write_options=None,
-             cascade=None, cascade_kwargs=None, _refs=None):
+             cascade=None, cascade_kwargs=None):
         """Save the :class:`~mongoengine.Document` to the database. If the
         document already exists, it will be updated, otherwise it will be
-        created.
+        created.  In a :func:`~mongoengine.session` the document is only
+        recorded, to be written when the session is flushed, though a new
+        document is given its :class:`~bson.objectid.ObjectId` straight away.
+        New documents whose meta sets ``write_behind`` are queued, to be
+        inserted in the background by their
+        :class:`~mongoengine.writebehind.WriteBehindQueue`.
 
         :param force_insert: only try to create a new document, don't allow
             updates of existing documents
@@ -161,7 +167,6 @@ class Document(six.with_metaclass(TopLevelDocumentMetaclass, BaseDocument)):
             default by setting "cascade" in the document __meta__
         :param cascade_kwargs: optional kwargs dictionary to be passed throw
             to cascading saves
-        :param _refs: A list of processed references used in cascading saves
 
         .. versionchanged:: 0.5
             In existing documents it only saves changed fields using set / unset
@@ -175,59 +180,58 @@ class Document(six.with_metaclass(TopLevelDocumentMetaclass, BaseDocument)):
             cascade_kwargs which overwrites the existing kwargs with custom
             values
         """
+        session = unitofwork.current_session()
+        if session is not None:
+            session.add(self, validate=validate, cascade=cascade)
+            return
+
         signals.pre_save.send(self.__class__, document=self)
 
         if validate:
             self.validate()
 
+        cascade_write_options = write_options
         if not write_options:
             write_options = {"w": 1}
 
-        doc = self.to_mongo()
-
-        created = force_insert or '_id' not in doc
+        # Only new documents are converted as a whole
+        object_id = self._path_to_mongo('_id')[0]
+        created = force_insert or object_id is None
 
         try:
             collection = self.__class__.objects._collection
             if created:
-                if force_insert:
+                doc = self.to_mongo()
+                queue = writebehind.write_behind_queue(self.__class__)
+                if queue is not None:
+                    object_id = queue.put(doc)
+                elif force_insert:
                     object_id = collection.insert(doc, **write_options)
                 else:
                     object_id = collection.save(doc, **write_options)
             else:
-                object_id = doc['_id']
-                updates, removals = self._delta()
-
-                # Need to add shard key to query, or you get an error
-                select_dict = {'_id': object_id}
-                shard_key = self.__class__._meta.get('shard_key', tuple())
-                for k in shard_key:
-                    actual_key = self._db_field_map.get(k, k)
-                    select_dict[actual_key] = doc[actual_key]
-
-                upsert = self._created
-                if updates:
-                    collection.update(select_dict,
-                                      {"$set": updates},
-                                      upsert=upsert,
-                                      **write_options)
-                if removals:
-                    collection.update(select_dict,
-                                      {"$unset": removals},
-                                      upsert=upsert,
-                                      **write_options)
+                # Lists that were only grown or shrunk at the ends are
+                # updated in place
+                update = self._delta_update(not self._created)
+
+                # Everything in a single update, if anything changed
+                if update:
+                    collection.update(self._update_spec(object_id), update,
+                                      upsert=self._created, **write_options)
+            # Logged list operations are now in the database
+            self.__dict__['_save_count'] = \
+                self.__dict__.get('_save_count', 0) + 1
 
             cascade = self._meta.get('cascade', True) if cascade is None else cascade  # noqa
             if cascade:
                 kwargs = {
                     "force_insert": force_insert,
                     "validate": validate,
-                    "write_options": write_options,
+                    "write_options": cascade_write_options,
                     "cascade": cascade
                 }
                 if cascade_kwargs:  # Allow granular control over cascades
                     kwargs.update(cascade_kwargs)
-                kwargs['_refs'] = _refs
                 self.cascade_save(**kwargs)
 
         except pymongo.errors.OperationFailure as err:
@@ -242,22 +246,78 @@ class Document(six.with_metaclass(TopLevelDocumentMetaclass, BaseDocument)):
         self._created = False
         signals.post_save.send(self.__class__, document=self, created=created)
 
+    def _mark_saved(self, object_id=None):
+        """Record that the document was written, with the id `object_id` if
+        it was inserted.
+        """
+        if object_id is not None:
+            id_field = self._meta['id_field']
+            self[id_field] = self._fields[id_field].to_python(object_id)
+        # Logged list operations are now in the database
+        self.__dict__['_save_count'] = self.__dict__.get('_save_count', 0) + 1
+        self._changed_fields = []
+        self._created = False
+
+    def _update_spec(self, object_id):
+        """Returns the spec selecting the document with `object_id` for an
+        update.
+        """
+        # Need to add shard key to query, or you get an error
+        select_dict = {'_id': object_id}
+        shard_key = self.__class__._meta.get('shard_key', tuple())
+        for k in shard_key:
+            actual_key = self._db_field_map.get(k, k)
+            value = self._path_to_mongo(actual_key)[0]
+            if value is None:
+                raise KeyError(actual_key)
+            select_dict[actual_key] = value
+        return select_dict
+
+    def _update_request(self, object_id):
+        """Returns the :class:`~pymongo.UpdateOne` that :meth:`save` would
+        send for the document with `object_id`, or ``None`` when nothing
+        changed.
+        """
+        update = self._delta_update(not self._created)
+        if update:
+            return pymongo.UpdateOne(self._update_spec(object_id), update,
+                                     upsert=self._created)
+
     def cascade_save(self, *args, **kwargs):
-        """Recursively saves any references / generic references on an object"""
-        from .fields import ReferenceField, GenericReferenceField
-        _refs = kwargs.get('_refs', []) or []
-        for name, cls in self._fields.items():
-            if not isinstance(cls, (ReferenceField, GenericReferenceField)):
-                continue
-            ref = getattr(self, name)
-            if not ref:
-                continue
-            ref_id = "%s,%s" % (ref.__class__.__name__, str(ref._data))
-            if ref and ref_id not in _refs:
-                _refs.append(ref_id)
-                kwargs["_refs"] = _refs
-                ref.save(**kwargs)
-                ref._changed_fields = []
+        """Saves the documents reachable through references / generic
+        references on an object that are new or have changes.  They are
+        written as a :class:`~mongoengine.Session` would, with a bulk write
+        per collection and referenced documents first.  References that
+        haven't been dereferenced are left out, as they can't have changed.
+
+        The `validate`, `write_options` and `cascade` keyword arguments of
+        :meth:`save` apply, as do those in its `cascade_kwargs`.  When
+        `cascade` is ``False`` only the direct references are saved.
+        """
+        validate = kwargs.get('validate', True)
+        cascade = kwargs.get('cascade')
+        pending = unitofwork.Session(write_options=kwargs.get('write_options'))
+        seen = set([id(self)])
+        documents = [self]
+        while documents:
+            document = documents.pop(0)
+            for reference in unitofwork._references(document, cascading=True):
+                if id(reference) in seen:
+                    continue
+                seen.add(id(reference))
+                if reference._has_changes():
+                    pending.add(reference, validate=validate, cascade=False)
+                deeper = cascade
+                if deeper is None:
+                    deeper = reference._meta.get('cascade', True)
+                if deeper:
+                    documents.append(reference)
+        pending.flush()
+
+    def _has_changes(self):
+        """Whether saving the document would write anything."""
+        return (self._created or self._path_to_mongo('_id')[0] is None or
+                bool(self._get_changed_fields()))
 
     @property
     def _object_key(self):
@@ -297,8 +357,15 @@ class Document(six.with_metaclass(TopLevelDocumentMetaclass, BaseDocument)):
 
     def delete(self, w=1):
         """Delete the :class:`~mongoengine.Document` from the database. This
-        will only take effect if the document has been previously saved.
+        will only take effect if the document has been previously saved.  In
+        a :func:`~mongoengine.session` it is deleted when the session is
+        flushed.
         """
+        session = unitofwork.current_session()
+        if session is not None:
+            session.delete(self)
+            return
+
         signals.pre_delete.send(self.__class__, document=self)
 
         try:
@@ -1,6 +1,9 @@
 from __future__ import absolute_import
 
+import collections
 import datetime
+import os
+import threading
 import time
 import decimal
 import gridfs
@@ -1154,6 +1157,36 @@ class GeoPointField(BaseField):
             self.error('Both values in point must be float or int')
 
 
+class _SequencePool(object):
+    """The values of a sequence reserved by the process, as consecutive
+    ``[first, last]`` ranges taken from the front.
+    """
+
+    def __init__(self, sequence_id):
+        self.sequence_id = sequence_id
+        self.lock = threading.Lock()
+        self.ranges = collections.deque()
+        self.size = 0
+
+    def add(self, first, last):
+        self.ranges.append([first, last])
+        self.size += last - first + 1
+
+    def take(self):
+        current = self.ranges[0]
+        value = current[0]
+        if value == current[1]:
+            self.ranges.popleft()
+        else:
+            current[0] += 1
+        self.size -= 1
+        return value
+
+
+# Reserved values of the sequences, by process and sequence
+_sequence_pools = {}
+
+
 class SequenceField(IntField):
     """Provides a sequental counter (see http://www.mongodb.org/display/DOCS/Object+IDs#ObjectIDs-SequenceNumbers)  # noqa
 
@@ -1165,25 +1198,58 @@ class SequenceField(IntField):
              cluster of machines, it is easier to create an object ID than have
              global, uniformly increasing sequence numbers.
 
+    With a `block_size` the counter is incremented by that many values at a
+    time, which are handed out from a pool in the process rather than with a
+    round trip each.  Values reserved but not used are skipped, so the
+    sequence has gaps.  Before creating many documents
+    :meth:`reserve` can take all their values at once.
+
     .. versionadded:: 0.5
     """
     def __init__(self, collection_name=None, db_alias=None, *args, **kwargs):
         self.collection_name = collection_name or 'mongoengine.counters'
         self.db_alias = db_alias or DEFAULT_CONNECTION_NAME
+        self.block_size = kwargs.pop('block_size', 1)
+        if self.block_size < 1:
+            raise ValueError('block_size must be at least 1')
         return super(SequenceField, self).__init__(*args, **kwargs)
 
     def generate_new_value(self):
         """
         Generate and Increment the counter
         """
+        pool = self._pool()
+        with pool.lock:
+            if not pool.size:
+                self._reserve(pool, self.block_size)
+            return pool.take()
+
+    def reserve(self, count):
+        """Make sure that the next `count` values are reserved in the
+        process, eg. before inserting that many new documents.
+        """
+        pool = self._pool()
+        with pool.lock:
+            if pool.size < count:
+                self._reserve(pool, count - pool.size)
+
+    def _pool(self):
         sequence_id = "{0}.{1}".format(
             self.owner_document._get_collection_name(), self.name)
+        # Pools of another process, before a fork, can't be used
+        key = (os.getpid(), self.db_alias, self.collection_name, sequence_id)
+        pool = _sequence_pools.get(key)
+        if pool is None:
+            pool = _sequence_pools.setdefault(key, _SequencePool(sequence_id))
+        return pool
+
+    def _reserve(self, pool, count):
         collection = get_db(alias=self.db_alias)[self.collection_name]
-        counter = collection.find_and_modify(query={"_id": sequence_id},
-                                             update={"$inc": {"next": 1}},
+        counter = collection.find_and_modify(query={"_id": pool.sequence_id},
+                                             update={"$inc": {"next": count}},
                                              new=True,
                                              upsert=True)
-        return counter['next']
+        pool.add(counter['next'] - count + 1, counter['next'])
 
     def __get__(self, instance, owner):
 
@@ -2,24 +2,65 @@ from __future__ import absolute_import, division
 
 import pprint
 import re
+import array
 import copy
+import datetime
 import itertools
 import operator
+import sys
+import threading
+import time
+from collections import namedtuple, OrderedDict
 
 import pymongo
 import six
+from bson import BSON
 from bson.code import Code
+from bson.objectid import ObjectId
+from bson.raw_bson import RawBSONDocument
 
 from . import signals
 from functools import reduce
 
-__all__ = ['queryset_manager', 'Q', 'InvalidQueryError',
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = ['queryset_manager', 'Q', 'Param', 'InvalidQueryError',
            'DO_NOTHING', 'NULLIFY', 'CASCADE', 'DENY']
 
 
 # The maximum number of items to display in a QuerySet.__repr__
 REPR_OUTPUT_SIZE = 20
 
+# The most BSON bytes in one batch of QuerySet.insert_iter
+INSERT_BATCH_BYTES = 16 * 1024 * 1024
+
+# The most ids in one `$in` of QuerySet.delete
+DELETE_CHUNK_SIZE = 1000
+
+# The documents in each chunk QuerySet.prefetch reads ahead, when no batch
+# size is set
+PREFETCH_CHUNK_SIZE = 100
+
+# The first batch and the bytes aimed for in each batch of
+# QuerySet.adaptive_batch_size
+ADAPTIVE_INITIAL_BATCH = 10
+ADAPTIVE_BATCH_BYTES = 1024 * 1024
+
+# Batches get smaller when converting one takes this many times longer than
+# fetching it
+ADAPTIVE_SLOW_CONSUMER = 10
+
+# The array typecode QuerySet.to_columns reads integers and datetimes into,
+# 'q' is Python 3 only so Python 2 falls back to a 64-bit long or a double
+try:
+    array.array('q')
+    INT64_TYPECODE = 'q'
+except ValueError:
+    INT64_TYPECODE = 'l' if array.array('l').itemsize == 8 else 'd'
+
 # Delete rules
 DO_NOTHING = 0
 NULLIFY = 1
@@ -45,6 +86,293 @@ class OperationError(Exception):
 
 RE_TYPE = type(re.compile(''))
 
+# A column filled by QuerySet.to_columns, `mask` is set where the value is
+# missing and the field has no default
+Column = namedtuple('Column', ('values', 'mask'))
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+# The outcome of QuerySet.bulk_save, `errors` holds (document, exception)
+# pairs for the documents that weren't saved
+BulkSaveResult = namedtuple('BulkSaveResult', ('saved', 'errors'))
+
+# A step of the plan of QuerySet.delete: `count` documents of `document`
+# deleted (CASCADE) or with `field` unset (NULLIFY), `field` is None for the
+# documents of the queryset itself
+DeleteStep = namedtuple('DeleteStep', ('document', 'field', 'rule', 'count'))
+
+
+def _datetime_to_millis(value):
+    """Convert a datetime to milliseconds since the epoch, the resolution
+    datetimes are stored with in BSON.
+    """
+    if value.tzinfo is not None:
+        value = value.replace(tzinfo=None) - value.utcoffset()
+    delta = value - EPOCH
+    return ((delta.days * 86400 + delta.seconds) * 1000 +
+            delta.microseconds // 1000)
+
+
+def _per_document_delete(document):
+    """Whether the delete signals of `document` have receivers marked with
+    :func:`~mongoengine.signals.per_document`.
+    """
+    return (signals.per_document_receivers(signals.pre_delete, document) or
+            signals.per_document_receivers(signals.post_delete, document))
+
+
+class _Prefetcher(six.Iterator):
+    """Reads the documents of `cursor` from a background thread, keeping up
+    to `depth` chunks of `size` documents ready.  The thread stops when the
+    prefetcher is closed or garbage collected.
+    """
+
+    def __init__(self, cursor, depth, size):
+        self.cursor = cursor
+        self._chunks = six.moves.queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._current = iter(())
+        self._done = False
+        thread = threading.Thread(
+            target=_prefetch, args=(cursor, self._chunks, self._stop, size))
+        thread.daemon = True
+        thread.start()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        for son in self._current:
+            return son
+        if self._done:
+            raise StopIteration
+        chunk = self._chunks.get()
+        if isinstance(chunk, tuple):
+            self._done = True
+            six.reraise(*chunk)
+        if chunk is None:
+            self._done = True
+            raise StopIteration
+        self._current = iter(chunk)
+        return next(self._current)
+
+    def close(self):
+        self._stop.set()
+        # Make room for a chunk the thread is waiting to put
+        try:
+            self._chunks.get_nowait()
+        except six.moves.queue.Empty:
+            pass
+
+    def __del__(self):
+        self._stop.set()
+
+
+def _prefetch(cursor, chunks, stop, size):
+    """Put the documents of `cursor` on the `chunks` queue, followed by
+    ``None`` at the end or the exception info of an error, until `stop` is
+    set.
+    """
+    def put(item):
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except six.moves.queue.Full:
+                pass
+        return False
+
+    try:
+        chunk = []
+        for son in cursor:
+            chunk.append(son)
+            if len(chunk) >= size:
+                if not put(chunk):
+                    return
+                chunk = []
+        if not chunk or put(chunk):
+            put(None)
+    except Exception:
+        put(sys.exc_info())
+    finally:
+        cursor.close()
+
+
+class _AdaptiveBatchSize(object):
+    """Chooses the size of each batch of a cursor.  Batches start at
+    `initial` documents and double while the consumer keeps up with the
+    fetches, up to what the average document size allows in `batch_bytes`.
+    They halve, back towards `initial`, when the consumer is much slower than
+    the fetches, as larger batches would only hold more memory.
+    """
+
+    def __init__(self, initial=ADAPTIVE_INITIAL_BATCH,
+                 batch_bytes=ADAPTIVE_BATCH_BYTES):
+        # A batch of one would close the cursor with legacy queries
+        self.initial = max(initial, 2)
+        self.batch_bytes = batch_bytes
+        self.reset()
+
+    def reset(self):
+        self.size = self.initial
+        self.document_bytes = None
+        self.fetch_time = None
+
+    def fetched(self, document_bytes, elapsed):
+        """Record a batch fetched in `elapsed` seconds, with a document of
+        `document_bytes` in it.
+        """
+        if self.document_bytes is None:
+            self.document_bytes = document_bytes
+        else:
+            self.document_bytes = (3 * self.document_bytes +
+                                   document_bytes) / 4
+        self.fetch_time = elapsed
+
+    def consumed(self, elapsed):
+        """Size the next batch after the last took `elapsed` seconds to
+        consume.
+        """
+        if self.fetch_time is not None and \
+                elapsed > ADAPTIVE_SLOW_CONSUMER * self.fetch_time:
+            size = max(self.size // 2, self.initial)
+        else:
+            size = self.size * 2
+        if self.document_bytes:
+            size = min(size, int(self.batch_bytes // self.document_bytes))
+        self.size = max(size, 2)
+
+
+class _AdaptiveCursor(pymongo.cursor.Cursor):
+    """A cursor that sends each getMore with the batch size `sizer`
+    chooses.
+    """
+
+    def __init__(self, collection, *args, **kwargs):
+        self._sizer = kwargs.pop('sizer', None) or _AdaptiveBatchSize()
+        self._fetched_at = None
+        super(_AdaptiveCursor, self).__init__(collection, *args, **kwargs)
+        self.batch_size(self._sizer.size)
+
+    def _refresh(self):
+        # The batch size of a cursor is private to it once it has been used
+        data = self._Cursor__data
+        if len(data) or self._Cursor__killed:
+            return len(data)
+        started = time.time()
+        if self._fetched_at is not None:
+            self._sizer.consumed(started - self._fetched_at)
+            self._Cursor__batch_size = self._sizer.size
+        count = super(_AdaptiveCursor, self)._refresh()
+        self._fetched_at = time.time()
+        if count:
+            # The refresh replaces the deque of documents
+            self._sizer.fetched(_bson_size(self._Cursor__data[0]),
+                                self._fetched_at - started)
+        return count
+
+    def rewind(self):
+        super(_AdaptiveCursor, self).rewind()
+        self._sizer.reset()
+        self._fetched_at = None
+        self._Cursor__batch_size = self._sizer.size
+        return self
+
+
+def _bson_size(son):
+    """The size of a document returned by a cursor as BSON."""
+    if isinstance(son, RawBSONDocument):
+        return len(son.raw)
+    return len(BSON.encode(son))
+
+
+def _chunks(items, size):
+    """Yield the consecutive slices of the list `items` of `size` items."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+# Query and update operators understood by the Django-style keyword syntax
+QUERY_OPERATORS = ['ne', 'gt', 'gte', 'lt', 'lte', 'in', 'nin', 'mod',
+                   'all', 'size', 'exists', 'not']
+GEO_OPERATORS = ['within_distance', 'within_spherical_distance',
+                 'within_box', 'within_polygon', 'near', 'near_sphere']
+MATCH_OPERATORS = ['contains', 'icontains', 'startswith',
+                   'istartswith', 'endswith', 'iendswith',
+                   'exact', 'iexact']
+CUSTOM_OPERATORS = ['match']
+ALL_QUERY_OPERATORS = frozenset(QUERY_OPERATORS + MATCH_OPERATORS +
+                                GEO_OPERATORS + CUSTOM_OPERATORS)
+SINGULAR_QUERY_OPERATORS = frozenset(
+    [None, 'ne', 'gt', 'gte', 'lt', 'lte', 'not'] + MATCH_OPERATORS)
+UPDATE_OPERATORS = ['set', 'unset', 'inc', 'dec', 'pop', 'push', 'push_all',
+                    'pull', 'pull_all', 'add_to_set']
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class QueryPlanCache(object):
+    """A bounded, thread safe LRU cache of compiled query plans.
+
+    Translating Django-style query, update and ordering keys into their
+    database form means splitting keys, matching operators and resolving
+    every field along the path.  None of that depends on the values being
+    queried, so the result is cached per query shape (document class and
+    keys) and only the value conversion runs on every call.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the plan cached under `key`, or ``None`` on a miss.
+        """
+        with self._lock:
+            try:
+                plan = self._plans.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            self._plans[key] = plan
+            self.hits += 1
+            return plan
+
+    def set(self, key, plan):
+        """Cache `plan` under `key`, evicting the least recently used plans
+        once the cache is full.
+        """
+        with self._lock:
+            self._plans.pop(key, None)
+            self._plans[key] = plan
+            while len(self._plans) > self.maxsize:
+                self._plans.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached plans and reset the hit / miss counters.
+        """
+        with self._lock:
+            self._plans.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """Return a :class:`CacheInfo` with the current cache statistics.
+        """
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize,
+                             len(self._plans))
+
+    def __len__(self):
+        return len(self._plans)
+
+
+query_plan_cache = QueryPlanCache()
+
 
 class QNodeVisitor(object):
     """Base visitor class for visiting Q-object nodes in a query tree.
@@ -144,6 +472,300 @@ class QueryTreeTransformerVisitor(QNodeVisitor):
         return combination
 
 
+class QueryOptimizerVisitor(QNodeVisitor):
+    """Rewrites query trees into smaller, equivalent ones before they are
+    compiled: empty Q-objects are dropped, nested combinations of the same
+    type are flattened, equalities on a field that are ORed together become a
+    single `$in` and `$in` / range conditions that are ANDed together on a
+    scalar field are intersected.  Conditions that can never be satisfied
+    collapse the query into a :class:`NoMatchQ`.
+    """
+
+    # Operators the optimizer can reason about when ANDing conditions
+    RANGE_OPERATORS = {'gt': (1, True), 'gte': (1, False),
+                       'lt': (-1, True), 'lte': (-1, False)}
+
+    def __init__(self, document):
+        self.document = document
+
+    def visit_combination(self, combination):
+        children = []
+        for node in combination.children:
+            if (isinstance(node, QCombination) and
+                    node.operation == combination.operation):
+                children += node.children
+            elif not node.empty:
+                children.append(node)
+
+        if combination.operation == combination.AND:
+            if any(isinstance(node, NoMatchQ) for node in children):
+                return NoMatchQ()
+            leaves = [node for node in children if type(node) is Q]
+            if leaves:
+                merged = self._conjunction(leaves)
+                if isinstance(merged, NoMatchQ):
+                    return merged
+                children = merged + [node for node in children
+                                     if type(node) is not Q]
+        elif combination.operation == combination.OR:
+            matching = [node for node in children
+                        if not isinstance(node, NoMatchQ)]
+            if not matching and children:
+                return NoMatchQ()
+            children = self._disjunction(matching)
+
+        if not children:
+            return Q()
+        if len(children) == 1:
+            return children[0]
+        combination.children = children
+        return combination
+
+    def visit_query(self, query):
+        if type(query) is not Q or query.empty:
+            return query
+        merged = self._conjunction([query])
+        if isinstance(merged, NoMatchQ):
+            return merged
+        return merged[0] if len(merged) == 1 else QCombination(QNode.AND,
+                                                                merged)
+
+    def _analyse_key(self, key):
+        """Return ``(prefix, op, scalar)`` for a query key that only uses
+        equality, `$in` or range operators, where `prefix` is the key without
+        its operator and `scalar` tells whether every field along the path
+        holds a single value.  Keys the optimizer can't reason about give
+        ``None``.
+        """
+        cache_key = ('optimize', self.document, key)
+        plan = query_plan_cache.get(cache_key)
+        if plan is None:
+            plan = self._compile_key(key)
+            query_plan_cache.set(cache_key, plan)
+        return plan or None
+
+    def _compile_key(self, key):
+        from .base import BaseDynamicField, ComplexBaseField
+        from .fields import GeoPointField
+
+        parts = key.split('__')
+        op = None
+        if parts[-1] in self.RANGE_OPERATORS or parts[-1] == 'in':
+            op = parts.pop()
+        if (not parts or key == '__raw__' or parts[-1] == 'not' or
+                parts[-1] in ALL_QUERY_OPERATORS):
+            return ()
+
+        try:
+            fields = QuerySet._lookup_field(self.document, parts)
+        except InvalidQueryError:
+            return ()
+        scalar = all(not isinstance(field, (six.string_types,
+                                            ComplexBaseField,
+                                            BaseDynamicField,
+                                            GeoPointField))
+                     for field in fields)
+        return ('__'.join(parts), op, fields[-1] if scalar else None)
+
+    def _disjunction(self, children):
+        """Merge ORed equality and `$in` conditions on the same field into a
+        single `$in` condition.
+        """
+        merged = OrderedDict()
+        result = []
+        for node in children:
+            values = self._in_values(node)
+            if values is None:
+                result.append(node)
+                continue
+            prefix, values = values
+            if prefix not in merged:
+                merged[prefix] = []
+                result.append(prefix)
+            merged[prefix].extend(values)
+
+        for i, node in enumerate(result):
+            if isinstance(node, six.string_types):
+                values = merged[node]
+                if len(values) == 1:
+                    result[i] = Q(**{node: values[0]})
+                else:
+                    result[i] = Q(**{node + '__in': values})
+        return result
+
+    def _in_values(self, node):
+        """Return ``(prefix, values)`` when `node` is a single equality or
+        `$in` condition that may take part in an `$in` merge.
+        """
+        if type(node) is not Q or len(node.query) != 1 or not self.document:
+            return None
+        key, value = list(node.query.items())[0]
+        plan = self._analyse_key(key)
+        if plan is None:
+            return None
+        prefix, op, field = plan
+        if op is None:
+            values = [value]
+        elif op == 'in' and isinstance(value, (list, tuple)):
+            values = list(value)
+        else:
+            return None
+        for value in values:
+            if isinstance(value, (list, tuple, set, dict, RE_TYPE)):
+                return None
+        return prefix, values
+
+    def _conjunction(self, leaves):
+        """AND together the conditions of several Q-objects.  Returns a list
+        of Q-objects or a :class:`NoMatchQ` if the conditions contradict each
+        other.
+        """
+        groups = OrderedDict()
+        plain = []
+        for leaf in leaves:
+            for key, value in leaf.query.items():
+                plan = self._analyse_key(key) if self.document else None
+                if (plan is not None and plan[1] == 'in' and
+                        isinstance(value, (list, tuple, set)) and not value):
+                    # An empty $in can never match
+                    return NoMatchQ()
+                if plan is None or plan[2] is None:
+                    plain.append((key, value))
+                else:
+                    prefix, op, field = plan
+                    groups.setdefault(prefix, []).append((key, op, value,
+                                                          field))
+
+        query = {}
+        extra = []
+        for prefix, conditions in groups.items():
+            if len(conditions) == 1:
+                key, op, value, field = conditions[0]
+                plain.append((key, value))
+                continue
+            intersected = self._intersect(prefix, conditions)
+            if intersected is None:
+                plain.extend((key, value) for key, op, value, f in conditions)
+            elif isinstance(intersected, NoMatchQ):
+                return intersected
+            else:
+                plain.extend(intersected)
+
+        for key, value in plain:
+            if key in query:
+                # Leave duplicates for the simplification to complain about
+                extra.append(Q(**{key: value}))
+            else:
+                query[key] = value
+        return [Q(**query)] + extra
+
+    def _intersect(self, prefix, conditions):
+        """Intersect the equality, `$in` and range conditions on a single
+        scalar field.  Returns the replacement ``(key, value)`` pairs, a
+        :class:`NoMatchQ` or ``None`` if the conditions can't be merged.
+        """
+        from .base import ValidationError
+
+        candidates = None
+        lower = upper = None
+        try:
+            for key, op, value, field in conditions:
+                if op is None or op == 'in':
+                    if op is None:
+                        values = [value]
+                    elif isinstance(value, (list, tuple, set)):
+                        values = list(value)
+                    else:
+                        return None
+                    allowed = OrderedDict()
+                    for value in values:
+                        converted = field.prepare_query_value(op, value)
+                        if not self._hashable_scalar(converted):
+                            return None
+                        allowed.setdefault(
+                            (isinstance(converted, bool), converted),
+                            (value, converted))
+                    if candidates is not None:
+                        allowed = OrderedDict(
+                            (k, v) for k, v in candidates.items()
+                            if k in allowed)
+                    candidates = allowed
+                else:
+                    converted = field.prepare_query_value(op, value)
+                    if not self._orderable(converted):
+                        return None
+                    direction, strict = self.RANGE_OPERATORS[op]
+                    bound = (converted, strict, key, value)
+                    if direction > 0:
+                        lower = self._tighter(lower, bound, 1)
+                    else:
+                        upper = self._tighter(upper, bound, -1)
+        except (TypeError, ValueError, ValidationError):
+            return None
+
+        bounds = [bound for bound in (lower, upper) if bound is not None]
+        values = [bound[0] for bound in bounds]
+        if candidates is not None:
+            values += [converted for value, converted in candidates.values()]
+        if bounds and not self._comparable(values):
+            return None
+
+        if lower is not None and upper is not None:
+            if (lower[0] > upper[0] or
+                    (lower[0] == upper[0] and (lower[1] or upper[1]))):
+                return NoMatchQ()
+
+        if candidates is None:
+            return [(bound[2], bound[3]) for bound in bounds]
+
+        matching = []
+        for value, converted in candidates.values():
+            if lower is not None and (converted < lower[0] or
+                                      (converted == lower[0] and lower[1])):
+                continue
+            if upper is not None and (converted > upper[0] or
+                                      (converted == upper[0] and upper[1])):
+                continue
+            matching.append(value)
+
+        if not matching:
+            return NoMatchQ()
+        if len(matching) == 1:
+            return [(prefix, matching[0])]
+        return [(prefix + '__in', matching)]
+
+    def _tighter(self, current, bound, direction):
+        """Return the more restrictive of two bounds of the same direction.
+        """
+        if current is None:
+            return bound
+        if bound[0] == current[0]:
+            return bound if bound[1] else current
+        if (bound[0] > current[0]) == (direction > 0):
+            return bound
+        return current
+
+    def _hashable_scalar(self, value):
+        return value is None or isinstance(
+            value, (bool, float, ObjectId) + six.integer_types +
+            six.string_types) and value == value
+
+    def _orderable(self, value):
+        return (not isinstance(value, bool) and
+                isinstance(value, (float,) + six.integer_types +
+                           six.string_types) and value == value)
+
+    def _comparable(self, values):
+        """Only numbers or only strings, which MongoDB orders the same way
+        Python does.
+        """
+        numbers = (float,) + six.integer_types
+        if all(isinstance(value, numbers) and not isinstance(value, bool)
+               for value in values):
+            return True
+        return all(isinstance(value, six.string_types) for value in values)
+
+
 class QueryCompilerVisitor(QNodeVisitor):
     """Compiles the nodes in a query tree to a PyMongo-compatible query
     dictionary.
@@ -201,8 +823,11 @@ class QNode(object):
     OR = 1
 
     def to_query(self, document):
-        query = self.accept(SimplificationVisitor())
+        query = self.accept(QueryOptimizerVisitor(document))
+        query = query.accept(SimplificationVisitor())
         query = query.accept(QueryTreeTransformerVisitor())
+        # Distributing ANDs over ORs may reveal more to optimize
+        query = query.accept(QueryOptimizerVisitor(document))
         query = query.accept(QueryCompilerVisitor(document))
         return query
 
@@ -248,11 +873,12 @@ class QCombination(QNode):
                 self.children.append(node)
 
     def accept(self, visitor):
-        for i in range(len(self.children)):
-            if isinstance(self.children[i], QNode):
-                self.children[i] = self.children[i].accept(visitor)
-
-        return visitor.visit_combination(self)
+        # Visit a copy so that the visitors may rewrite the children without
+        # changing the tree the query was built from
+        children = [node.accept(visitor) if isinstance(node, QNode) else node
+                    for node in self.children]
+        return visitor.visit_combination(QCombination(self.operation,
+                                                      children))
 
     @property
     def empty(self):
@@ -275,6 +901,35 @@ class Q(QNode):
         return not bool(self.query)
 
 
+# The compiled form of a NoMatchQ
+NO_MATCH_QUERY = {'_id': {'$in': []}}
+
+
+class NoMatchQ(Q):
+    """A query that can never match any document, produced by the optimizer
+    when a query tree contains contradictory conditions.
+    """
+
+    def __init__(self):
+        super(NoMatchQ, self).__init__(__raw__={'_id': {'$in': []}})
+
+
+class Param(object):
+    """A named placeholder for a query value, used with
+    :meth:`~mongoengine.queryset.QuerySet.prepare`. ::
+
+        by_status = Post.objects.prepare(author=Param('author'),
+                                         status__in=Param('statuses'))
+        posts = by_status.bind(author=user, statuses=['draft', 'live'])
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return 'Param(%r)' % self.name
+
+
 class QueryFieldList(object):
     """Object that handles combinations of .only() and .exclude() calls"""
     ONLY = 1
@@ -337,6 +992,7 @@ class QuerySet(six.Iterator):
         self._document = document
         self._collection_obj = collection
         self._mongo_query = None
+        self._no_match = False
         self._query_obj = Q()
         self._initial_query = {}
         self._where_clause = None
@@ -345,6 +1001,8 @@ class QuerySet(six.Iterator):
         self._class_check = True
         self._read_preference = None
         self._scalar = []
+        self._scalar_plan = None
+        self._scalar_row = None
 
         # If inheritance is allowed, only return instances and instances of
         # subclasses of the class being used
@@ -359,6 +1017,13 @@ class QuerySet(six.Iterator):
         self._hint = -1  # Using -1 as None is a valid value for hint
         self._batch_size = None
         self._no_cursor_timeout = None
+        self._lazy = document._meta.get('lazy_decode', False)
+        self._as_pymongo = False
+        self._as_pymongo_field_names = False
+        self._as_pymongo_to_python = False
+        self._prefetch = None
+        self._prefetcher = None
+        self._adaptive_batch = None
 
     def clone(self):
         """Creates a copy of the current :class:`~mongoengine.queryset.QuerySet`
@@ -370,7 +1035,9 @@ class QuerySet(six.Iterator):
         copy_props = ('_initial_query', '_query_obj', '_where_clause',
                       '_loaded_fields', '_ordering',
                       '_limit', '_skip',  '_hint', '_batch_size',
-                      '_read_preference',)
+                      '_read_preference', '_lazy', '_as_pymongo',
+                      '_as_pymongo_field_names', '_as_pymongo_to_python',
+                      '_prefetch', '_adaptive_batch',)
 
         for prop in copy_props:
             val = getattr(self, prop)
@@ -378,14 +1045,27 @@ class QuerySet(six.Iterator):
 
         return c
 
+    def _compile_query(self):
+        self._mongo_query = self._query_obj.to_query(self._document)
+        self._no_match = self._mongo_query == NO_MATCH_QUERY
+        if self._class_check:
+            self._mongo_query.update(self._initial_query)
+
     @property
     def _query(self):
         if self._mongo_query is None:
-            self._mongo_query = self._query_obj.to_query(self._document)
-            if self._class_check:
-                self._mongo_query.update(self._initial_query)
+            self._compile_query()
         return self._mongo_query
 
+    @property
+    def _matches_nothing(self):
+        """True if the optimizer found the query's conditions contradictory,
+        in which case there is no need to ask the database.
+        """
+        if self._mongo_query is None:
+            self._compile_query()
+        return self._no_match
+
     def ensure_index(self, key_or_list, drop_dups=False, background=False,
                      **kwargs):
         """Ensure that the given indexes are in place.
@@ -478,6 +1158,23 @@ class QuerySet(six.Iterator):
         """Returns all documents."""
         return self.__call__()
 
+    def prepare(self, **query):
+        """Compile a query shape once and return a
+        :class:`~mongoengine.queryset.PreparedQuery` that builds a ready
+        :class:`~mongoengine.queryset.QuerySet` for each set of values bound
+        to its :class:`~mongoengine.queryset.Param` placeholders. Any
+        filtering, ordering, field selection or limits already applied to this
+        :class:`~mongoengine.queryset.QuerySet` are carried over. ::
+
+            by_author = Post.objects.only('title').prepare(
+                author=Param('author'), published=True)
+            titles = [post.title for post in by_author.bind(author=user)]
+
+        :param query: Django-style query keyword arguments, where each value
+            is either a constant or a :class:`~mongoengine.queryset.Param`
+        """
+        return PreparedQuery(self, query)
+
     @property
     def _collection(self):
         """Property that returns the collection object. This allows us to
@@ -509,9 +1206,20 @@ class QuerySet(six.Iterator):
             if self._read_preference:
                 collection = collection.with_options(
                     read_preference=self._read_preference)
-
-            self._cursor_obj = collection.find(
-                self._query, **self._cursor_args)
+            if (self._lazy and not self._as_pymongo and
+                    self._scalar_plan is None):
+                collection = collection.with_options(
+                    codec_options=collection.codec_options.with_options(
+                        document_class=RawBSONDocument))
+
+            if self._adaptive_batch is not None:
+                self._cursor_obj = _AdaptiveCursor(
+                    collection, self._query,
+                    sizer=_AdaptiveBatchSize(*self._adaptive_batch),
+                    **self._cursor_args)
+            else:
+                self._cursor_obj = collection.find(
+                    self._query, **self._cursor_args)
 
             # Apply where clauses to cursor
             if self._where_clause:
@@ -545,70 +1253,187 @@ class QuerySet(six.Iterator):
         """
         if not isinstance(parts, (list, tuple)):
             parts = [parts]
+
+        # Document classes carry a lazily filled trie of resolved paths
+        trie = document.__dict__.get('_field_path_trie')
+        if trie is not None:
+            return trie.lookup(document, parts)
+
         fields = []
         field = None
-
         for field_name in parts:
-            # Handle ListField indexing:
-            if field_name.isdigit():
-                try:
-                    new_field = field.field
-                except AttributeError as err:
-                    raise InvalidQueryError(
-                        "Can't use index on unsubscriptable field (%s)" % err)
-                fields.append(field_name)
-                continue
-            if field is None:
-                # Look up first field from the document
-                if field_name == 'pk':
-                    # Deal with "primary key" alias
-                    field_name = document._meta['id_field']
-                if field_name in document._fields:
-                    field = document._fields[field_name]
-                elif document._dynamic:
-                    from .base import BaseDynamicField
-                    field = BaseDynamicField(db_field=field_name)
-                else:
-                    raise InvalidQueryError('Cannot resolve field "%s"'
-                                            % field_name)
-            else:
-                from .fields import ReferenceField, GenericReferenceField  # noqa
-                if isinstance(field, (ReferenceField, GenericReferenceField)):
-                    raise InvalidQueryError('Cannot perform join in mongoDB: %s'
-                                            % '__'.join(parts))
-                # Look up subfield on the previous field
-                new_field = field.lookup_member(field_name)
-                from .base import ComplexBaseField
-                if not new_field and isinstance(field, ComplexBaseField):
-                    fields.append(field_name)
-                    continue
-                elif not new_field:
-                    raise InvalidQueryError('Cannot resolve field "%s"'
-                                            % field_name)
-                field = new_field  # update field to the new field type
-            fields.append(field)
+            resolved, field = cls._lookup_field_part(document, field,
+                                                     field_name, parts)
+            fields.append(resolved)
         return fields
 
+    @classmethod
+    def _lookup_field_part(cls, document, field, field_name, parts):
+        """Resolve a single segment of a field path.  `field` is the field
+        resolved so far (``None`` for the first segment).  Returns a tuple of
+        the entry to append to the looked up fields and the field that
+        further segments are resolved against.
+        """
+        # Handle ListField indexing:
+        if field_name.isdigit():
+            try:
+                field.field
+            except AttributeError as err:
+                raise InvalidQueryError(
+                    "Can't use index on unsubscriptable field (%s)" % err)
+            return field_name, field
+        if field is None:
+            # Look up first field from the document
+            if field_name == 'pk':
+                # Deal with "primary key" alias
+                field_name = document._meta['id_field']
+            if field_name in document._fields:
+                field = document._fields[field_name]
+            elif document._dynamic:
+                from .base import BaseDynamicField
+                field = BaseDynamicField(db_field=field_name)
+            else:
+                raise InvalidQueryError('Cannot resolve field "%s"'
+                                        % field_name)
+        else:
+            from .fields import ReferenceField, GenericReferenceField  # noqa
+            if isinstance(field, (ReferenceField, GenericReferenceField)):
+                raise InvalidQueryError('Cannot perform join in mongoDB: %s'
+                                        % '__'.join(parts))
+            # Look up subfield on the previous field
+            new_field = field.lookup_member(field_name)
+            from .base import ComplexBaseField
+            if not new_field and isinstance(field, ComplexBaseField):
+                return field_name, field
+            elif not new_field:
+                raise InvalidQueryError('Cannot resolve field "%s"'
+                                        % field_name)
+            field = new_field  # update field to the new field type
+        return field, field
+
     @classmethod
     def _translate_field_name(cls, doc_cls, field, sep='.'):
         """Translate a field attribute name to a database field name.
         """
-        parts = field.split(sep)
-        parts = [f.db_field for f in QuerySet._lookup_field(doc_cls, parts)]
-        return '.'.join(parts)
+        cache_key = ('translate', doc_cls, field, sep)
+        db_field = query_plan_cache.get(cache_key)
+        if db_field is None:
+            parts = field.split(sep)
+            parts = [f.db_field
+                     for f in QuerySet._lookup_field(doc_cls, parts)]
+            db_field = '.'.join(parts)
+            query_plan_cache.set(cache_key, db_field)
+        return db_field
+
+    @classmethod
+    def _compile_query_key(cls, _doc_cls, key):
+        """Resolve a single Django-style query key into a plan of the form
+        ``(db_key, field, op, negate)``.  The plan only depends on the key and
+        the document class, so it is safe to cache and reuse for any value.
+        """
+        parts = key.split('__')
+        indices = [(i, p) for i, p in enumerate(parts) if p.isdigit()]
+        parts = [part for part in parts if not part.isdigit()]
+        # Check for an operator and transform to mongo-style if there is
+        op = None
+        if parts[-1] in ALL_QUERY_OPERATORS:
+            op = parts.pop()
+
+        negate = False
+        if parts[-1] == 'not':
+            parts.pop()
+            negate = True
+
+        field = None
+        if _doc_cls:
+            # Switch field names to proper names [set in Field(name='foo')]
+            fields = QuerySet._lookup_field(_doc_cls, parts)
+            parts = []
+
+            cleaned_fields = []
+            for field in fields:
+                if isinstance(field, str):
+                    parts.append(field)
+                else:
+                    parts.append(field.db_field)
+                    cleaned_fields.append(field)
+            field = cleaned_fields[-1]
+
+        for i, part in indices:
+            parts.insert(i, part)
+        return ('.'.join(parts), field, op, negate)
+
+    @classmethod
+    def _query_plan(cls, _doc_cls, query):
+        """Return the compiled plans for every key of ``query``, keyed by the
+        original query key.  Plans are cached per query shape.
+        """
+        cache_key = ('query', _doc_cls, tuple(sorted(query)))
+        plans = query_plan_cache.get(cache_key)
+        if plans is None:
+            plans = {}
+            for key in query:
+                if key != '__raw__':
+                    plans[key] = cls._compile_query_key(_doc_cls, key)
+            query_plan_cache.set(cache_key, plans)
+        return plans
+
+    @classmethod
+    def _prepare_query_value(cls, field, op, negate, value):
+        """Convert a query value for the field and operator of a compiled
+        plan into its Mongo form.
+        """
+        if field is not None:
+            # Convert value to proper value
+            if op in SINGULAR_QUERY_OPERATORS:
+                if not isinstance(field, six.string_types):
+                    value = field.prepare_query_value(op, value)
+                elif op in MATCH_OPERATORS and isinstance(
+                        value, six.string_types):
+                    from . import StringField
+                    value = StringField.prepare_query_value(op, value)
+                else:
+                    value = field
+            elif op in ('in', 'nin', 'all', 'near'):
+                # 'in', 'nin' and 'all' require a list of values
+                value = [field.prepare_query_value(op, v) for v in value]
+
+        # if op and op not in match_operators:
+        if op:
+            if op in GEO_OPERATORS:
+                if op == "within_distance":
+                    value = {'$within': {'$center': value}}
+                elif op == "within_spherical_distance":
+                    value = {'$within': {'$centerSphere': value}}
+                elif op == "within_polygon":
+                    value = {'$within': {'$polygon': value}}
+                elif op == "near":
+                    value = {'$near': value}
+                elif op == "near_sphere":
+                    value = {'$nearSphere': value}
+                elif op == 'within_box':
+                    value = {'$within': {'$box': value}}
+                else:
+                    raise NotImplementedError("Geo method '%s' has not "
+                                              "been implemented" % op)
+            elif op in CUSTOM_OPERATORS:
+                if op == 'match':
+                    value = {"$elemMatch": value}
+                else:
+                    NotImplementedError("Custom method '%s' has not "
+                                        "been implemented" % op)
+            elif op not in MATCH_OPERATORS:
+                value = {'$' + op: value}
+
+        if negate:
+            value = {'$not': value}
+        return value
 
     @classmethod
     def _transform_query(cls, _doc_cls=None, _field_operation=False, **query):
         """Transform a query from Django-style format to Mongo format.
         """
-        operators = ['ne', 'gt', 'gte', 'lt', 'lte', 'in', 'nin', 'mod',
-                     'all', 'size', 'exists', 'not']
-        geo_operators = ['within_distance', 'within_spherical_distance',
-                         'within_box', 'within_polygon', 'near', 'near_sphere']
-        match_operators = ['contains', 'icontains', 'startswith',
-                           'istartswith', 'endswith', 'iendswith',
-                           'exact', 'iexact']
-        custom_operators = ['match']
+        plans = cls._query_plan(_doc_cls, query)
 
         mongo_query = {}
         for key, value in query.items():
@@ -616,87 +1441,9 @@ class QuerySet(six.Iterator):
                 mongo_query.update(value)
                 continue
 
-            parts = key.split('__')
-            indices = [(i, p) for i, p in enumerate(parts) if p.isdigit()]
-            parts = [part for part in parts if not part.isdigit()]
-            # Check for an operator and transform to mongo-style if there is
-            op = None
-            if parts[-1] in (operators + match_operators +
-                             geo_operators + custom_operators):
-                op = parts.pop()
-
-            negate = False
-            if parts[-1] == 'not':
-                parts.pop()
-                negate = True
-
-            if _doc_cls:
-                # Switch field names to proper names [set in Field(name='foo')]
-                fields = QuerySet._lookup_field(_doc_cls, parts)
-                parts = []
-
-                cleaned_fields = []
-                for field in fields:
-                    append_field = True
-                    if isinstance(field, str):
-                        parts.append(field)
-                        append_field = False
-                    else:
-                        parts.append(field.db_field)
-                    if append_field:
-                        cleaned_fields.append(field)
-
-                # Convert value to proper value
-                field = cleaned_fields[-1]
-
-                singular_ops = [None, 'ne', 'gt', 'gte', 'lt', 'lte', 'not']
-                singular_ops += match_operators
-                if op in singular_ops:
-                    if not isinstance(field, six.string_types):
-                        value = field.prepare_query_value(op, value)
-                    elif op in match_operators and isinstance(
-                            value, six.string_types):
-                        from . import StringField
-                        value = StringField.prepare_query_value(op, value)
-                    else:
-                        value = field
-                elif op in ('in', 'nin', 'all', 'near'):
-                    # 'in', 'nin' and 'all' require a list of values
-                    value = [field.prepare_query_value(op, v) for v in value]
-
-            # if op and op not in match_operators:
-            if op:
-                if op in geo_operators:
-                    if op == "within_distance":
-                        value = {'$within': {'$center': value}}
-                    elif op == "within_spherical_distance":
-                        value = {'$within': {'$centerSphere': value}}
-                    elif op == "within_polygon":
-                        value = {'$within': {'$polygon': value}}
-                    elif op == "near":
-                        value = {'$near': value}
-                    elif op == "near_sphere":
-                        value = {'$nearSphere': value}
-                    elif op == 'within_box':
-                        value = {'$within': {'$box': value}}
-                    else:
-                        raise NotImplementedError("Geo method '%s' has not "
-                                                  "been implemented" % op)
-                elif op in custom_operators:
-                    if op == 'match':
-                        value = {"$elemMatch": value}
-                    else:
-                        NotImplementedError("Custom method '%s' has not "
-                                            "been implemented" % op)
-                elif op not in match_operators:
-                    value = {'$' + op: value}
-
-            if negate:
-                value = {'$not': value}
+            key, field, op, negate = plans[key]
+            value = cls._prepare_query_value(field, op, negate, value)
 
-            for i, part in indices:
-                parts.insert(i, part)
-            key = '.'.join(parts)
             if op is None or key not in mongo_query:
                 mongo_query[key] = value
             elif key in mongo_query and isinstance(mongo_query[key], dict):
@@ -785,14 +1532,18 @@ class QuerySet(six.Iterator):
             result = None
         return result
 
-    def insert(self, doc_or_docs, load_bulk=True):
+    def insert(self, doc_or_docs, load_bulk=True, reload=False):
         """bulk insert documents
 
         :param docs_or_doc: a document or list of documents to be inserted
         :param load_bulk (optional): If True returns list of document instances
+        :param reload (optional): If True the returned documents are read back
+            from the database, rather than being those inserted
 
         By default returns document instances, set ``load_bulk`` to False to
-        return just ``ObjectIds``
+        return just ``ObjectIds``.  The ids are made before the insert and set
+        on the documents, which are returned rather than read back unless
+        ``reload`` is set, eg. for values set by the server.
 
         .. versionadded:: 0.5
         """
@@ -803,6 +1554,8 @@ class QuerySet(six.Iterator):
         if isinstance(docs, Document) or issubclass(docs.__class__, Document):
             return_one = True
             docs = [docs]
+        else:
+            docs = list(docs)
 
         raw = []
         for doc in docs:
@@ -813,7 +1566,10 @@ class QuerySet(six.Iterator):
             if doc.pk:
                 msg = "Some documents have ObjectIds use doc.update() instead"
                 raise OperationError(msg)
-            raw.append(doc.to_mongo())
+            son = doc.to_mongo()
+            if son.get('_id') is None:
+                son['_id'] = ObjectId()
+            raw.append(son)
 
         signals.pre_bulk_insert.send(self._document, documents=docs)
         ids = self._collection.insert(raw)
@@ -823,14 +1579,218 @@ class QuerySet(six.Iterator):
                     self._document, documents=docs, loaded=False)
             return return_one and ids[0] or ids
 
-        documents = self.in_bulk(ids)
-        results = []
-        for obj_id in ids:
-            results.append(documents.get(obj_id))
+        for doc, son in zip(docs, raw):
+            doc._mark_saved(son['_id'])
+
+        if reload:
+            documents = self.in_bulk(ids)
+            results = []
+            for obj_id in ids:
+                results.append(documents.get(obj_id))
+        else:
+            results = list(docs)
         signals.post_bulk_insert.send(
                 self._document, documents=results, loaded=True)
         return return_one and results[0] or results
 
+    def insert_iter(self, docs, batch_size=1000,
+                    batch_bytes=INSERT_BATCH_BYTES, overlap=False):
+        """Insert the documents of any iterable in unordered batches,
+        yielding the id of each inserted document.  Documents are taken from
+        `docs` as the ids are consumed, so that only a batch or two is held
+        in memory however many there are, and are not read back.
+
+        :param docs: the documents to insert, eg. a generator
+        :param batch_size: the most documents in a batch
+        :param batch_bytes: the most bytes of BSON in a batch
+        :param overlap: encode the next batch while the last one is written,
+            in another thread
+
+        The documents are encoded once, to cut the batches by size, and sent
+        as they are.  Those without a pk are given an
+        :class:`~bson.objectid.ObjectId`, as the driver would.
+        """
+        batches = self._insert_batches(docs, batch_size, batch_bytes)
+        if not overlap:
+            for batch, raws, ids in batches:
+                signals.pre_bulk_insert.send(self._document, documents=batch)
+                self._insert_raw(raws)
+                signals.post_bulk_insert.send(
+                    self._document, documents=batch, loaded=False)
+                for object_id in ids:
+                    yield object_id
+            return
+
+        def write(raws, errors):
+            try:
+                self._insert_raw(raws)
+            except Exception:
+                errors.append(sys.exc_info())
+
+        pending = None
+        for batch in itertools.chain(batches, [None]):
+            if pending is not None:
+                # Wait for the last batch before yielding its ids
+                thread, errors, written, ids = pending
+                thread.join()
+                if errors:
+                    six.reraise(*errors[0])
+                signals.post_bulk_insert.send(
+                    self._document, documents=written, loaded=False)
+                for object_id in ids:
+                    yield object_id
+                pending = None
+            if batch is None:
+                break
+            batch, raws, ids = batch
+            signals.pre_bulk_insert.send(self._document, documents=batch)
+            errors = []
+            thread = threading.Thread(target=write, args=(raws, errors))
+            thread.daemon = True
+            thread.start()
+            pending = (thread, errors, batch, ids)
+
+    def _insert_batches(self, docs, batch_size, batch_bytes):
+        """Yield the ``(documents, raw BSON, ids)`` batches of
+        :meth:`insert_iter`.
+        """
+        codec_options = self._collection.codec_options
+        batch, raws, ids = [], [], []
+        size = 0
+        for doc in docs:
+            if not isinstance(doc, self._document):
+                msg = "Some documents inserted aren't instances of %s" \
+                      % str(self._document)
+                raise OperationError(msg)
+            if doc.pk:
+                msg = "Some documents have ObjectIds use doc.update() instead"
+                raise OperationError(msg)
+            son = doc.to_mongo()
+            if son.get('_id') is None:
+                son['_id'] = ObjectId()
+            raw = BSON.encode(son, codec_options=codec_options)
+            if raws and (len(raws) >= batch_size or
+                         size + len(raw) > batch_bytes):
+                yield batch, raws, ids
+                batch, raws, ids = [], [], []
+                size = 0
+            batch.append(doc)
+            raws.append(raw)
+            ids.append(son['_id'])
+            size += len(raw)
+        if raws:
+            yield batch, raws, ids
+
+    def _insert_raw(self, raws):
+        """Insert a batch of BSON encoded documents.
+        """
+        try:
+            self._collection.insert_many(
+                [RawBSONDocument(raw) for raw in raws], ordered=False)
+        except pymongo.errors.BulkWriteError as err:
+            messages = [error['errmsg']
+                        for error in err.details['writeErrors']]
+            raise OperationError('Could not insert documents (%s)'
+                                 % ', '.join(messages))
+
+    def bulk_save(self, docs, ordered=False, validate=True, batch_size=None):
+        """Save new and changed documents with a single
+        :meth:`~pymongo.collection.Collection.bulk_write`, rather than a
+        round trip each.  New documents are inserted and existing ones
+        updated with their changes, as :meth:`~mongoengine.Document.save`
+        would.  References are not cascaded.
+
+        :param docs: the documents to save
+        :param ordered: stop at the first document that can't be saved,
+            rather than saving all the others
+        :param validate: validate the documents, those that aren't valid are
+            not saved
+        :param batch_size: the number of documents in each bulk write, all
+            of them by default
+
+        Returns a :class:`BulkSaveResult` of the saved documents and the
+        errors of those that weren't, so that a failed write doesn't raise.
+        """
+        result = BulkSaveResult([], [])
+        docs = iter(docs)
+        while True:
+            batch = list(itertools.islice(docs, batch_size))
+            if not batch:
+                break
+            if not self._bulk_save(batch, ordered, validate, result):
+                for doc in docs:
+                    result.errors.append((doc, OperationError(
+                        'Not saved after an earlier error')))
+                break
+        return result
+
+    def _bulk_save(self, docs, ordered, validate, result):
+        """Save a batch of documents for :meth:`bulk_save`, returning
+        ``False`` when an ordered save has to stop.
+        """
+        from .base import ValidationError
+
+        for doc in docs:
+            if not isinstance(doc, self._document):
+                msg = "Some documents saved aren't instances of %s" \
+                      % str(self._document)
+                raise OperationError(msg)
+
+        failed = False
+        writes = []
+        for doc in docs:
+            if failed:
+                result.errors.append((doc, OperationError(
+                    'Not saved after an earlier error')))
+                continue
+            signals.pre_save.send(doc.__class__, document=doc)
+            try:
+                if validate:
+                    doc.validate()
+                object_id = doc._path_to_mongo('_id')[0]
+                if object_id is None:
+                    son = doc.to_mongo()
+                    writes.append((doc, son, pymongo.InsertOne(son)))
+                else:
+                    writes.append((doc, None,
+                                   doc._update_request(object_id)))
+            except (ValidationError, KeyError) as err:
+                result.errors.append((doc, err))
+                failed = ordered
+
+        requests = [request for doc, son, request in writes if request]
+        write_errors = {}
+        if requests:
+            try:
+                self._collection.bulk_write(requests, ordered=ordered)
+            except pymongo.errors.BulkWriteError as err:
+                for error in err.details['writeErrors']:
+                    write_errors[error['index']] = error
+
+        # Ordered writes stop at the first error
+        last = min(write_errors) if ordered and write_errors else None
+        index = -1
+        for doc, son, request in writes:
+            if request:
+                index += 1
+                error = write_errors.get(index)
+                if error is not None:
+                    message = 'Could not save document (%s)'
+                    if error.get('code') == 11000:
+                        message = u'Tried to save duplicate unique keys (%s)'
+                    result.errors.append(
+                        (doc, OperationError(message % error['errmsg'])))
+                    continue
+                if last is not None and index > last:
+                    result.errors.append((doc, OperationError(
+                        'Not saved after an earlier error')))
+                    continue
+            doc._mark_saved(son and son['_id'])
+            result.saved.append(doc)
+            signals.post_save.send(doc.__class__, document=doc,
+                                   created=son is not None)
+        return not (ordered and (failed or write_errors))
+
     def with_id(self, object_id):
         """Retrieve the object matching the id provided.  Uses `object_id` only
         and raises InvalidQueryError if a filter has been applied.
@@ -857,13 +1817,8 @@ class QuerySet(six.Iterator):
 
         docs = self._collection.find({'_id': {'$in': object_ids}},
                                      **self._cursor_args)
-        if self._scalar:
-            for doc in docs:
-                doc_map[doc['_id']] = self._get_scalar(
-                        self._document._from_son(doc))
-        else:
-            for doc in docs:
-                doc_map[doc['_id']] = self._document._from_son(doc)
+        for doc in docs:
+            doc_map[doc['_id']] = self._from_son(doc)
 
         return doc_map
 
@@ -871,27 +1826,59 @@ class QuerySet(six.Iterator):
         """Wrap the result in a :class:`~mongoengine.Document` object.
         """
         try:
-            if self._limit == 0:
+            if self._limit == 0 or self._matches_nothing:
                 raise StopIteration
-            if self._scalar:
-                return self._get_scalar(self._document._from_son(
-                        next(self._cursor)))
-            return self._document._from_son(next(self._cursor))
+            if self._prefetch:
+                return self._from_son(self._next_prefetched())
+            return self._from_son(next(self._cursor))
         except StopIteration as e:
             self.rewind()
             raise e
 
+    def _next_prefetched(self):
+        """Returns the next document read ahead by :meth:`prefetch`."""
+        cursor = self._cursor
+        prefetcher = self._prefetcher
+        if prefetcher is None or prefetcher.cursor is not cursor:
+            if prefetcher is not None:
+                prefetcher.close()
+            prefetcher = self._prefetcher = _Prefetcher(
+                cursor, self._prefetch,
+                self._batch_size or PREFETCH_CHUNK_SIZE)
+        return next(prefetcher)
+
+    def _from_son(self, son):
+        """Create the result for a document returned by the cursor.
+        """
+        if self._as_pymongo:
+            return self._son_as_pymongo(son)
+        if self._scalar_plan is not None:
+            return self._son_to_scalar(son)
+        if self._lazy and isinstance(son, RawBSONDocument):
+            doc = self._document._from_son(
+                son, codec_options=self._collection.codec_options)
+        else:
+            doc = self._document._from_son(son)
+        if self._scalar:
+            return self._get_scalar(doc)
+        return doc
+
     def rewind(self):
         """Rewind the cursor to its unevaluated state.
 
         .. versionadded:: 0.3
         """
+        if self._prefetcher is not None:
+            # The cursor is the prefetching thread's, which closes it
+            self._prefetcher.close()
+            self._prefetcher = None
+            self._cursor_obj = None
         self._cursor.rewind()
 
     def count(self):
         """Count the selected elements in the query.
         """
-        if self._limit == 0:
+        if self._limit == 0 or self._matches_nothing:
             return 0
         return self._cursor.count(with_limit_and_skip=True)
 
@@ -1051,6 +2038,53 @@ class QuerySet(six.Iterator):
             self._cursor_obj.batch_size(size)
 
         self._batch_size = size
+        self._adaptive_batch = None
+        return self
+
+    def adaptive_batch_size(self, initial=ADAPTIVE_INITIAL_BATCH,
+                            batch_bytes=ADAPTIVE_BATCH_BYTES):
+        """Size each batch from how the results are read, rather than with
+        a fixed :meth:`batch_size`.  The first batch has `initial` documents,
+        so that the first results come quickly.  Later batches grow while the
+        results are read as fast as they are fetched, up to about
+        `batch_bytes` of documents, and shrink when reading them is much
+        slower than fetching them.
+
+        :param initial: the size of the first batch
+        :param batch_bytes: the most bytes of documents aimed for in a batch
+        """
+        self._adaptive_batch = (initial, batch_bytes)
+        self._batch_size = None
+        self._cursor_obj = None
+        return self
+
+    def lazy(self, enabled=True):
+        """Fetch the results as raw BSON and only decode each field of a
+        document, and convert it with the field's `to_python`, the first time
+        it is read. This saves time and memory for large documents of which
+        only a few fields are used. Saving a document or calling `to_mongo`
+        decodes the rest of its fields. Enabled by default for documents with
+        ``meta = {'lazy_decode': True}``.
+
+        :param enabled: whether to decode lazily
+        """
+        self._lazy = enabled
+        self._cursor_obj = None
+        return self
+
+    def prefetch(self, depth=2):
+        """Read the results from a background thread while they are being
+        iterated, so that fetching the next batches from the server overlaps
+        with converting the current one.  Up to `depth` chunks of the batch
+        size, or :data:`PREFETCH_CHUNK_SIZE` documents, are kept ready.
+        Leaving a loop over the results early, or rewinding, closes the
+        cursor and stops the thread.
+
+        :param depth: the number of chunks read ahead, ``0`` or ``None`` to
+            disable prefetching
+        """
+        self._prefetch = depth
+        self._cursor_obj = None
         return self
 
     def timeout(self, yes_timeout):
@@ -1081,10 +2115,9 @@ class QuerySet(six.Iterator):
             return self
         # Integer index provided
         elif isinstance(key, int):
-            if self._scalar:
-                return self._get_scalar(self._document._from_son(
-                        self._cursor[key]))
-            return self._document._from_son(self._cursor[key])
+            if self._matches_nothing:
+                raise IndexError('no such item for Cursor instance')
+            return self._from_son(self._cursor[key])
         raise AttributeError
 
     def distinct(self, field):
@@ -1095,6 +2128,8 @@ class QuerySet(six.Iterator):
         .. versionadded:: 0.4
         .. versionchanged:: 0.5 - Fixed handling references
         """
+        if self._matches_nothing:
+            return []
         from .dereference import DeReference
         return DeReference()(self._cursor.distinct(field), 1)
 
@@ -1173,13 +2208,8 @@ class QuerySet(six.Iterator):
 
     def _fields_to_dbfields(self, fields):
         """Translate fields paths to its db equivalents"""
-        ret = []
-        for field in fields:
-            field = ".".join(
-                f.db_field for f in
-                QuerySet._lookup_field(self._document, field.split('.')))
-            ret.append(field)
-        return ret
+        return [QuerySet._translate_field_name(self._document, field)
+                for field in fields]
 
     def order_by(self, *keys):
         """Order the :class:`~mongoengine.queryset.QuerySet` by the keys. The
@@ -1189,23 +2219,27 @@ class QuerySet(six.Iterator):
         :param keys: fields to order the query results by; keys may be
             prefixed with **+** or **-** to determine the ordering direction
         """
-        key_list = []
-        for key in keys:
-            if not key:
-                continue
-            direction = pymongo.ASCENDING
-            if key[0] == '-':
-                direction = pymongo.DESCENDING
-            if key[0] in ('-', '+'):
-                key = key[1:]
-            key = key.replace('__', '.')
-            try:
-                key = QuerySet._translate_field_name(self._document, key)
-            except:
-                pass
-            key_list.append((key, direction))
+        cache_key = ('order_by', self._document, keys)
+        key_list = query_plan_cache.get(cache_key)
+        if key_list is None:
+            key_list = []
+            for key in keys:
+                if not key:
+                    continue
+                direction = pymongo.ASCENDING
+                if key[0] == '-':
+                    direction = pymongo.DESCENDING
+                if key[0] in ('-', '+'):
+                    key = key[1:]
+                key = key.replace('__', '.')
+                try:
+                    key = QuerySet._translate_field_name(self._document, key)
+                except:
+                    pass
+                key_list.append((key, direction))
+            query_plan_cache.set(cache_key, key_list)
 
-        self._ordering = key_list
+        self._ordering = list(key_list)
         return self
 
     def explain(self, format=False):
@@ -1228,109 +2262,213 @@ class QuerySet(six.Iterator):
         self._read_preference = read_preference
         return self
 
-    def delete(self, w=1, _from_doc_delete=False):
+    def delete(self, w=1, dry_run=False, chunk_size=DELETE_CHUNK_SIZE,
+               _from_doc_delete=False):
         """Delete the documents matched by the query.
+
+        The delete rules of the documents are planned before anything is
+        written: the ids of the documents to delete are read once, and those
+        of the documents cascaded to level by level, so that DENY rules are
+        checked for all of them.  Each level is then deleted, and NULLIFY
+        references unset, with `$in` queries of up to `chunk_size` ids.
+
+        :data:`~mongoengine.signals.pre_bulk_delete` and
+        :data:`~mongoengine.signals.post_bulk_delete` are sent with the ids
+        of each chunk deleted.  :data:`~mongoengine.signals.pre_delete` and
+        :data:`~mongoengine.signals.post_delete` are only sent for each
+        document to receivers marked with
+        :func:`~mongoengine.signals.per_document`.
+
+        :param dry_run: don't write anything, return the plan as a list of
+            :class:`DeleteStep` of the number of documents each rule would
+            touch
+        :param chunk_size: the most ids in each `$in` query
         """
         queryset = self.clone()
+        if queryset._matches_nothing:
+            return [] if dry_run else None
 
-        # This is taken from actual MongoEngine, url
-        # https://github.com/MongoEngine/mongoengine/pull/105
-        has_delete_signal = (
-            signals.pre_delete.has_receivers_for(self._document) or
-            signals.post_delete.has_receivers_for(self._document))
-
-        if has_delete_signal and not _from_doc_delete:
+        # Receivers that need each document get them deleted one by one
+        if _per_document_delete(self._document) and \
+                not _from_doc_delete and not dry_run:
             for d in queryset:
                 d.delete()
             return
 
-        # Check for DENY rules before actually deleting/nullifying any other
-        # references
-        for rule_entry in queryset._document._meta['delete_rules']:
-            document_cls, field_name = rule_entry
-            rule = queryset._document._meta['delete_rules'][rule_entry]
-            if rule == DENY \
-                    and document_cls.objects(**{field_name + '__in': self}).count() > 0:  # noqa
-                msg = \
-                    u'Could not delete document (at least %s.%s refers to it)' \
-                    % (document_cls.__name__, field_name)
-                raise OperationError(msg)
+        rules = [(entry, rule) for entry, rule in
+                 six.iteritems(self._document._meta['delete_rules'])
+                 if rule != DO_NOTHING]
+        has_bulk_signal = not _from_doc_delete and (
+            signals.pre_bulk_delete.has_receivers_for(self._document) or
+            signals.post_bulk_delete.has_receivers_for(self._document))
+        if not rules and not has_bulk_signal:
+            if dry_run:
+                return [DeleteStep(self._document, None, CASCADE,
+                                   queryset.count())]
+            self._collection.remove(self._query, w=w)
+            return
 
-        for rule_entry in queryset._document._meta['delete_rules']:
-            document_cls, field_name = rule_entry
-            rule = queryset._document._meta['delete_rules'][rule_entry]
+        cursor = self._collection.find(self._query, {'_id': 1},
+                                       batch_size=chunk_size)
+        ids = [son['_id'] for son in cursor]
+        plan = self._plan_delete(ids, chunk_size)
+        if dry_run:
+            return [DeleteStep(document, field, rule, len(ids))
+                    for document, field, rule, ids in plan]
+
+        for document, field, rule, ids in plan:
+            if rule == NULLIFY:
+                for chunk in _chunks(ids, chunk_size):
+                    document.objects(pk__in=chunk).update(
+                        w=w, **{'unset__%s' % field: 1})
+        # The documents cascaded to go first
+        for document, field, rule, ids in reversed(plan):
             if rule == CASCADE:
-                document_cls.objects(**{field_name + '__in': self}).delete(w=w)
-            elif rule == NULLIFY:
-                document_cls.objects(**{field_name + '__in': self}).update(
-                    w=w,
-                    **{'unset__%s' % field_name: 1})
+                for chunk in _chunks(ids, chunk_size):
+                    QuerySet._remove_ids(
+                        document, chunk, w,
+                        signal=field is not None or not _from_doc_delete)
+
+    def _plan_delete(self, ids, chunk_size):
+        """Returns the ``(document, field, rule, ids)`` steps that deleting
+        the documents with `ids` takes, following the delete rules of each
+        level.  Raises :class:`OperationError` for a DENY rule.
+        """
+        plan = [(self._document, None, CASCADE, ids)]
+        seen = {self._collection.full_name: set(ids)}
+        i = 0
+        while i < len(plan):
+            document, _, rule, ids = plan[i]
+            i += 1
+            if rule != CASCADE or not ids:
+                continue
+            rules = document._meta['delete_rules']
+            for (document_cls, field_name), rule in six.iteritems(rules):
+                if rule == DO_NOTHING:
+                    continue
+                referring = []
+                for chunk in _chunks(ids, chunk_size):
+                    queryset = document_cls.objects(
+                        **{field_name + '__in': chunk})
+                    if rule == DENY:
+                        if queryset._collection.find_one(queryset._query,
+                                                         {'_id': 1}):
+                            msg = (u'Could not delete document (at least '
+                                   u'%s.%s refers to it)' %
+                                   (document_cls.__name__, field_name))
+                            raise OperationError(msg)
+                        continue
+                    cursor = queryset._collection.find(
+                        queryset._query, {'_id': 1}, batch_size=chunk_size)
+                    referring.extend(son['_id'] for son in cursor)
+                if rule == CASCADE:
+                    # Documents already planned are deleted once
+                    name = document_cls._get_collection().full_name
+                    planned = seen.setdefault(name, set())
+                    referring = [id_ for id_ in referring
+                                 if id_ not in planned]
+                    planned.update(referring)
+                if rule != DENY:
+                    plan.append((document_cls, field_name, rule, referring))
+        return plan
+
+    @staticmethod
+    def _remove_ids(document, ids, w, signal=True):
+        """Remove the documents of `document` with `ids`, sending the bulk
+        delete signals if `signal`, and the delete signals for each document
+        to the receivers that want them.
+        """
+        if not signal:
+            document._get_collection().remove({'_id': {'$in': ids}}, w=w)
+            return
+        documents = []
+        if _per_document_delete(document):
+            documents = list(document.objects(pk__in=ids))
+        signals.pre_bulk_delete.send(document, ids=ids)
+        for doc in documents:
+            signals.pre_delete.send(document, document=doc)
+        document._get_collection().remove({'_id': {'$in': ids}}, w=w)
+        for doc in documents:
+            signals.post_delete.send(document, document=doc)
+        signals.post_bulk_delete.send(document, ids=ids)
+
+    @classmethod
+    def _compile_update_key(cls, _doc_cls, key):
+        """Resolve a single Django-style update key into a plan of the form
+        ``(db_key, field, op, flip_sign)``.
+        """
+        parts = key.split('__')
+        # Check for an operator and transform to mongo-style if there is
+        op = None
+        flip_sign = False
+        if parts[0] in UPDATE_OPERATORS:
+            op = parts.pop(0)
+            # Convert Pythonic names to Mongo equivalents
+            if op in ('push_all', 'pull_all'):
+                op = op.replace('_all', 'All')
+            elif op == 'dec':
+                # Support decrement by flipping a positive value's sign
+                # and using 'inc'
+                op = 'inc'
+                flip_sign = True
+            elif op == 'add_to_set':
+                op = op.replace('_to_set', 'ToSet')
+
+        field = None
+        if _doc_cls:
+            # Switch field names to proper names [set in Field(name='foo')]
+            fields = QuerySet._lookup_field(_doc_cls, parts)
+            parts = []
+
+            cleaned_fields = []
+            for field in fields:
+                if isinstance(field, str):
+                    # Convert the S operator to $
+                    if field == 'S':
+                        field = '$'
+                    parts.append(field)
+                else:
+                    parts.append(field.db_field)
+                    cleaned_fields.append(field)
+            field = cleaned_fields[-1]
+
+        if not op:
+            raise InvalidQueryError(
+                "Updates must supply an operation eg: set__FIELD=value")
 
-        self._collection.remove(self._query, w=w)
+        return ('.'.join(parts), field, op, flip_sign)
 
     @classmethod
     def _transform_update(cls, _doc_cls=None, **update):
         """Transform an update spec from Django-style format to Mongo format.
         """
-        operators = ['set', 'unset', 'inc', 'dec', 'pop', 'push', 'push_all',
-                     'pull', 'pull_all', 'add_to_set']
+        cache_key = ('update', _doc_cls, tuple(sorted(update)))
+        plans = query_plan_cache.get(cache_key)
+        if plans is None:
+            plans = {}
+            for key in update:
+                if key != '__raw__':
+                    plans[key] = cls._compile_update_key(_doc_cls, key)
+            query_plan_cache.set(cache_key, plans)
 
         mongo_update = {}
         for key, value in update.items():
             if key == "__raw__":
                 mongo_update.update(value)
                 continue
-            parts = key.split('__')
-            # Check for an operator and transform to mongo-style if there is
-            op = None
-            if parts[0] in operators:
-                op = parts.pop(0)
-                # Convert Pythonic names to Mongo equivalents
-                if op in ('push_all', 'pull_all'):
-                    op = op.replace('_all', 'All')
-                elif op == 'dec':
-                    # Support decrement by flipping a positive value's sign
-                    # and using 'inc'
-                    op = 'inc'
-                    if value > 0:
-                        value = -value
-                elif op == 'add_to_set':
-                    op = op.replace('_to_set', 'ToSet')
-
-            if _doc_cls:
-                # Switch field names to proper names [set in Field(name='foo')]
-                fields = QuerySet._lookup_field(_doc_cls, parts)
-                parts = []
-
-                cleaned_fields = []
-                for field in fields:
-                    append_field = True
-                    if isinstance(field, str):
-                        # Convert the S operator to $
-                        if field == 'S':
-                            field = '$'
-                        parts.append(field)
-                        append_field = False
-                    else:
-                        parts.append(field.db_field)
-                    if append_field:
-                        cleaned_fields.append(field)
 
-                # Convert value to proper value
-                field = cleaned_fields[-1]
+            key, field, op, flip_sign = plans[key]
+            if flip_sign and value > 0:
+                value = -value
 
+            if field is not None:
+                # Convert value to proper value
                 if op in (None, 'set', 'push', 'pull', 'addToSet'):
                     if field.required or value is not None:
                         value = field.prepare_query_value(op, value)
                 elif op in ('pushAll', 'pullAll'):
                     value = [field.prepare_query_value(op, v) for v in value]
 
-            key = '.'.join(parts)
-
-            if not op:
-                raise InvalidQueryError(
-                    "Updates must supply an operation eg: set__FIELD=value")
-
             if op == 'pushAll':
                 op = 'push'  # convert to non-deprecated keyword.
                 if not isinstance(value, (set, tuple, list)):
@@ -1365,6 +2503,8 @@ class QuerySet(six.Iterator):
 
         update = QuerySet._transform_update(self._document, **update)
         query = self._query
+        if self._matches_nothing and not upsert:
+            return 0
 
         try:
             ret = self._collection.update(query, update, multi=multi,
@@ -1395,6 +2535,8 @@ class QuerySet(six.Iterator):
             write_options = {}
         update = QuerySet._transform_update(self._document, **update)
         query = self._query
+        if self._matches_nothing and not upsert:
+            return 0
 
         try:
             # Explicitly provide 'multi=False' to newer versions of PyMongo
@@ -1409,43 +2551,322 @@ class QuerySet(six.Iterator):
 
     def __iter__(self):
         self.rewind()
+        if self._prefetch and not (self._limit == 0 or
+                                   self._matches_nothing):
+            return self._iter_prefetched()
         return self
 
+    def _iter_prefetched(self):
+        """Yield the results read ahead by :meth:`prefetch`.  The thread is
+        stopped and the cursor closed however the iteration ends, including
+        when the loop is left early.
+        """
+        self._prefetcher = prefetcher = _Prefetcher(
+            self._cursor, self._prefetch,
+            self._batch_size or PREFETCH_CHUNK_SIZE)
+        try:
+            for son in prefetcher:
+                yield self._from_son(son)
+        finally:
+            prefetcher.close()
+            if self._prefetcher is prefetcher:
+                # The cursor is the prefetching thread's, which closes it
+                self._prefetcher = None
+                self._cursor_obj = None
+
     def _get_scalar(self, doc):
 
         def lookup(obj, name):
             chunks = name.split('__')
             for chunk in chunks:
                 obj = getattr(obj, chunk)
+                if obj is None:
+                    # A missing embedded document has no fields to read
+                    break
             return obj
 
         data = [lookup(doc, n) for n in self._scalar]
+        if self._scalar_row is not None:
+            return self._scalar_row(*data)
         if len(data) == 1:
             return data[0]
 
         return tuple(data)
 
-    def scalar(self, *fields):
+    def _son_to_scalar(self, son):
+        """Extract the scalar values straight from a document returned by
+        the cursor, without creating a Document.
+        """
+        data = []
+        for parents, key, to_python, default in self._scalar_plan:
+            value = son
+            for parent in parents:
+                value = value.get(parent)
+                if value is None:
+                    # A missing embedded document gives None, as on a
+                    # Document
+                    break
+            else:
+                value = value.get(key)
+                if value is not None:
+                    value = to_python(value)
+                if value is None:
+                    value = default() if callable(default) else default
+            data.append(value)
+
+        if self._scalar_row is not None:
+            return self._scalar_row(*data)
+        if len(data) == 1:
+            return data[0]
+        return tuple(data)
+
+    @classmethod
+    def _compile_scalar_field(cls, document, name):
+        """Return how to read the scalar field `name` from a SON as a tuple
+        of the db field names of the embedded documents along its path, its
+        own db field name, its `to_python` and its default. Only fields whose
+        value is exactly what `to_python` gives and that are reached through
+        embedded documents without defaults can be read this way, ``None`` is
+        returned for the others.
+        """
+        cache_key = ('scalar', document, name)
+        plan = query_plan_cache.get(cache_key)
+        if plan is None:
+            from .base import BaseField
+            from .fields import EmbeddedDocumentField
+
+            plan = ()
+            try:
+                fields = cls._lookup_field(document, name.split('__'))
+            except InvalidQueryError:
+                fields = []
+            parents, field = fields[:-1], fields[-1] if fields else None
+            plain_get = six.get_unbound_function(BaseField.__get__)
+            if (isinstance(field, BaseField) and
+                    six.get_unbound_function(type(field).__get__) is plain_get
+                    and all(isinstance(f, EmbeddedDocumentField) and
+                            f.default is None for f in parents)):
+                plan = (tuple(f.db_field for f in parents), field.db_field,
+                        field.to_python, field.default)
+            query_plan_cache.set(cache_key, plan)
+        return plan or None
+
+    def scalar(self, *fields, **kwargs):
         """Instead of returning Document instances, return either a specific
         value or a tuple of values in order.
 
         This effects all results and can be unset by calling ``scalar``
         without arguments. Calls ``only`` automatically.
 
+        Where possible the values are read straight from the documents
+        returned by the database, with only the requested fields'
+        `to_python`, rather than by creating Document instances.
+
         :param fields: One or more fields to return instead of a Document.
+        :param named: return each row as a :func:`~collections.namedtuple`
+            with the field names as attributes, even for a single field
         """
+        named = kwargs.pop('named', False)
+        if kwargs:
+            raise TypeError('Unexpected keyword arguments: %s'
+                            % ', '.join(sorted(kwargs)))
+
         self._scalar = list(fields)
+        self._scalar_plan = None
+        self._scalar_row = None
+        self._cursor_obj = None
 
         if fields:
             self.only(*fields)
+            plan = [self._compile_scalar_field(self._document, f)
+                    for f in fields]
+            if None not in plan:
+                self._scalar_plan = plan
+            if named:
+                cache_key = ('scalar_row', fields)
+                self._scalar_row = query_plan_cache.get(cache_key)
+                if self._scalar_row is None:
+                    self._scalar_row = namedtuple('Row', fields)
+                    query_plan_cache.set(cache_key, self._scalar_row)
         else:
             self.all_fields()
 
         return self
 
-    def values_list(self, *fields):
+    def as_pymongo(self, field_names=False, to_python=False, enabled=True):
+        """Instead of returning Document instances, return the raw documents
+        from the cursor as plain dicts. Projections, ordering, skip / limit,
+        hints and the batch size all still apply.
+
+        This effects all results and can be unset by calling ``as_pymongo``
+        with ``enabled=False``.
+
+        :param field_names: map the top level keys from their `db_field`
+            names back to the documents' attribute names
+        :param to_python: convert each top level value with its field's
+            `to_python`
+        :param enabled: whether to return plain dicts
+        """
+        self._as_pymongo = enabled
+        self._as_pymongo_field_names = field_names
+        self._as_pymongo_to_python = to_python
+        self._cursor_obj = None
+        return self
+
+    def _son_as_pymongo(self, son):
+        """Return a document from the cursor as configured by
+        :meth:`as_pymongo`.
+        """
+        if not (self._as_pymongo_field_names or self._as_pymongo_to_python):
+            return son
+
+        document = self._document
+        class_name = son.get('_cls', document._class_name)
+        if class_name != document._class_name:
+            from .base import get_document
+            document = get_document(class_name)
+
+        result = {}
+        for key, value in son.items():
+            name = document._reverse_db_field_map.get(key)
+            if name is None:
+                result[key] = value
+                continue
+            if self._as_pymongo_to_python and value is not None:
+                value = document._fields[name].to_python(value)
+            if self._as_pymongo_field_names:
+                key = name
+            result[key] = value
+        return result
+
+    def values_list(self, *fields, **kwargs):
         """An alias for scalar"""
-        return self.scalar(*fields)
+        return self.scalar(*fields, **kwargs)
+
+    @classmethod
+    def _compile_column_field(cls, document, name):
+        """Return how to read the field `name` into a column as a tuple of
+        the db field names along its path, the column's types and
+        conversion and the field's default.
+        """
+        cache_key = ('column', document, name)
+        plan = query_plan_cache.get(cache_key)
+        if plan is None:
+            from .fields import (BooleanField, DateTimeField,
+                                 EmbeddedDocumentField, FloatField, IntField)
+
+            # Field class -> (array typecode, numpy dtype, conversion)
+            column_types = (
+                (BooleanField, ('b', 'bool', bool)),
+                (IntField, (INT64_TYPECODE, 'int64', int)),
+                (FloatField, ('d', 'float64', float)),
+                (DateTimeField, (INT64_TYPECODE, 'datetime64[ms]',
+                                 _datetime_to_millis)),
+            )
+            fields = cls._lookup_field(document, name.split('__'))
+            parents, field = fields[:-1], fields[-1]
+            column_type = None
+            for field_class, types in column_types:
+                if isinstance(field, field_class):
+                    column_type = types
+                    break
+            if (column_type is None or not all(
+                    isinstance(f, EmbeddedDocumentField) for f in parents)):
+                msg = 'Cannot extract "%s" as a column' % name
+                raise InvalidQueryError(msg)
+            keys = tuple(f.db_field for f in fields)
+            plan = (keys,) + column_type + (field.default,)
+            query_plan_cache.set(cache_key, plan)
+        return plan
+
+    def to_columns(self, *fields, **kwargs):
+        """Read the given fields of all the matched documents into one
+        typed, contiguous buffer per field instead of returning Document
+        instances. Returns a dict mapping each field name to a
+        :class:`Column` of its values and a mask. Missing values take the
+        field's default, only those missing from fields without a default are
+        set in the mask.
+
+        Only :class:`~mongoengine.BooleanField`,
+        :class:`~mongoengine.IntField`, :class:`~mongoengine.FloatField` and
+        :class:`~mongoengine.DateTimeField` fields, possibly in embedded
+        documents, can be read this way. Datetimes are given as milliseconds
+        since the epoch. The buffers are sized from :meth:`count` up front
+        and filled as the cursor is read, use :meth:`batch_size` to control
+        how many documents are fetched at a time.
+
+        :param fields: One or more fields to read.
+        :param numpy: fill NumPy arrays rather than :class:`array.array`,
+            defaults to whether NumPy can be imported
+        """
+        use_numpy = kwargs.pop('numpy', numpy is not None)
+        if kwargs:
+            raise TypeError('Unexpected keyword arguments: %s'
+                            % ', '.join(sorted(kwargs)))
+        if use_numpy and numpy is None:
+            raise ImportError('NumPy is required to fill NumPy arrays')
+
+        plans = [self._compile_column_field(self._document, f)
+                 for f in fields]
+
+        queryset = self.clone()
+        queryset._lazy = False
+        queryset.only(*fields)
+        size = queryset.count()
+
+        def allocate(typecode, dtype, size):
+            if use_numpy:
+                return numpy.zeros(size, dtype=dtype)
+            return array.array(typecode, [0]) * size
+
+        def resize(buffer, size):
+            if use_numpy:
+                grown = numpy.zeros(size, dtype=buffer.dtype)
+                grown[:min(size, len(buffer))] = buffer[:size]
+                return grown
+            if size < len(buffer):
+                del buffer[size:]
+            else:
+                buffer.extend(allocate(buffer.typecode, None,
+                                       size - len(buffer)))
+            return buffer
+
+        columns = []
+        for keys, typecode, dtype, convert, default in plans:
+            columns.append([keys, convert, default,
+                            allocate(typecode, dtype, size),
+                            allocate('b', 'bool', size)])
+
+        count = 0
+        if size:
+            for son in queryset._cursor:
+                if count == size:
+                    # More documents matched than were counted
+                    size = size * 2
+                    for column in columns:
+                        column[3] = resize(column[3], size)
+                        column[4] = resize(column[4], size)
+                for keys, convert, default, values, mask in columns:
+                    value = son
+                    for key in keys:
+                        value = value.get(key)
+                        if value is None:
+                            break
+                    if value is None:
+                        value = default() if callable(default) else default
+                    if value is None:
+                        mask[count] = True
+                    else:
+                        values[count] = convert(value)
+                count += 1
+
+        result = {}
+        for name, (keys, convert, default, values, mask) in zip(fields,
+                                                                 columns):
+            if count < size:
+                values, mask = resize(values, count), resize(mask, count)
+            result[name] = Column(values, mask)
+        return result
 
     def _sub_js_fields(self, code):
         """When fields are specified with [~fieldname] syntax, where
@@ -1761,6 +3182,103 @@ class QuerySet(six.Iterator):
         return DeReference()(self, max_depth=max_depth)
 
 
+def _is_operator_query(value):
+    """Whether `value` is a dict of query operators, such as
+    ``{'$gte': 1, '$lt': 5}``, rather than a value to match.
+    """
+    return (isinstance(value, dict) and bool(value) and
+            all(key.startswith('$') for key in value))
+
+
+class PreparedQuery(object):
+    """A query shape compiled by
+    :meth:`~mongoengine.queryset.QuerySet.prepare`. Binding values only
+    converts the bound values with their field's `prepare_query_value`, the
+    Q-object tree, query transformation and queryset cloning all happen once
+    when the query is prepared.
+    """
+
+    def __init__(self, queryset, query):
+        document = queryset._document
+        template = queryset.clone()
+        template._class_check = queryset._class_check
+        if not template._ordering and document._meta['ordering']:
+            template.order_by(*document._meta['ordering'])
+
+        # The part of the query that doesn't depend on the bound values
+        self._static_query = template._query_obj.to_query(document)
+        self._no_match = self._static_query == NO_MATCH_QUERY
+        self._initial_query = {}
+        if template._class_check:
+            self._initial_query = template._initial_query
+
+        plans = QuerySet._query_plan(document, query)
+        self._plan = []
+        self.params = set()
+        for key, value in query.items():
+            if key == '__raw__':
+                raise InvalidQueryError('Prepared queries do not support '
+                                        '__raw__')
+            db_key, field, op, negate = plans[key]
+            if isinstance(value, Param):
+                self.params.add(value.name)
+                self._plan.append((db_key, field, op, negate, value.name,
+                                   None))
+            else:
+                value = QuerySet._prepare_query_value(field, op, negate,
+                                                      value)
+                self._plan.append((db_key, field, op, negate, None, value))
+
+        template._cursor_obj = None
+        self._queryset_class = template.__class__
+        self._template = template.__dict__
+
+    def bind(self, **values):
+        """Return a :class:`~mongoengine.queryset.QuerySet` for the prepared
+        query with the given values bound to its placeholders.
+        """
+        if len(values) != len(self.params) or not self.params.issuperset(
+                values):
+            missing = self.params.difference(values)
+            unknown = set(values).difference(self.params)
+            raise InvalidQueryError(
+                'Missing parameters: %s, unknown parameters: %s'
+                % (', '.join(sorted(missing)) or '-',
+                   ', '.join(sorted(unknown)) or '-'))
+
+        mongo_query = dict(self._static_query)
+        conditions = []
+        for db_key, field, op, negate, name, value in self._plan:
+            if name is not None:
+                value = QuerySet._prepare_query_value(field, op, negate,
+                                                      values[name])
+            if db_key not in mongo_query:
+                mongo_query[db_key] = value
+                continue
+            existing = mongo_query[db_key]
+            if (_is_operator_query(existing) and _is_operator_query(value)
+                    and not set(existing).intersection(value)):
+                merged = dict(existing)
+                merged.update(value)
+                mongo_query[db_key] = merged
+            else:
+                # Both conditions must hold, so AND them rather than letting
+                # one replace the other
+                conditions.append({db_key: value})
+        if conditions:
+            mongo_query['$and'] = mongo_query.get('$and', []) + conditions
+
+        queryset = self._queryset_class.__new__(self._queryset_class)
+        queryset.__dict__.update(self._template)
+        queryset._loaded_fields = copy.copy(queryset._loaded_fields)
+        queryset._query_obj = Q(__raw__=mongo_query)
+        queryset._mongo_query = dict(mongo_query, **self._initial_query)
+        queryset._no_match = self._no_match
+        return queryset
+
+    __call__ = bind
+
+
 class QuerySetManager(object):
 
     get_queryset = None
@@ -22,3 +22,24 @@ pre_delete = _signals.signal('pre_delete')
 post_delete = _signals.signal('post_delete')
 pre_bulk_insert = _signals.signal('pre_bulk_insert')
 post_bulk_insert = _signals.signal('post_bulk_insert')
+pre_bulk_delete = _signals.signal('pre_bulk_delete')
+post_bulk_delete = _signals.signal('post_bulk_delete')
+
+
+def per_document(receiver):
+    """Mark a :data:`pre_delete` or :data:`post_delete` receiver as needing
+    each document that :meth:`~mongoengine.queryset.QuerySet.delete`
+    deletes, rather than the ids :data:`pre_bulk_delete` and
+    :data:`post_bulk_delete` are sent.  Deleting is slower, as the documents
+    are read first.
+    """
+    receiver.per_document = True
+    return receiver
+
+
+def per_document_receivers(signal, sender):
+    """Whether `signal` has receivers for `sender` marked with
+    :func:`per_document`.
+    """
+    return any(getattr(receiver, 'per_document', False)
+               for receiver in signal.receivers_for(sender))
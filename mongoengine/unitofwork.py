@@ -0,0 +1,337 @@
+from __future__ import absolute_import
+
+import threading
+from collections import OrderedDict
+
+import pymongo
+import six
+from bson.objectid import ObjectId
+from pymongo.write_concern import WriteConcern
+
+from . import signals
+from .queryset import OperationError
+
+__all__ = ['session', 'Session']
+
+
+_local = threading.local()
+
+
+def current_session():
+    """Return the innermost :class:`Session` of this thread, or ``None``
+    when there is none or it is being flushed.
+    """
+    sessions = getattr(_local, 'sessions', None)
+    if sessions and not sessions[-1]._flushing:
+        return sessions[-1]
+    return None
+
+
+def session():
+    """Return a :class:`Session` to use as a context manager, eg.::
+
+        with mongoengine.session():
+            post = BlogPost.objects.get(title='Hello')
+            post.comments.append(Comment(text='Hi'))
+            post.save()
+            post.author.name = 'Ross'
+
+    writes both documents when the block ends.
+    """
+    return Session()
+
+
+class Session(object):
+    """A unit of work.  While a session is open in a thread, saving and
+    deleting documents and changing saved documents records them rather than
+    writing them.  :meth:`flush`, or leaving the ``with`` block without an
+    error, writes each document once, with a
+    :meth:`~pymongo.collection.Collection.bulk_write` per collection.
+
+    Collections are written so that referenced documents come before the
+    documents referring to them.  New documents with an
+    :class:`~mongoengine.ObjectIdField` id are given their id when they are
+    saved, as outside a session, so that it can be used and referenced
+    before the flush.  The id is taken back if the document is never
+    inserted.
+
+    :param write_options: the write concern options, such as ``w`` and
+        ``j``, that the documents are written with, as in
+        :meth:`~mongoengine.Document.save`
+    """
+
+    def __init__(self, write_options=None):
+        self.write_options = write_options
+        self._saves = OrderedDict()
+        self._deletes = OrderedDict()
+        # The new documents given ids by add that haven't been inserted
+        self._new = {}
+        self._flushing = False
+
+    def __enter__(self):
+        if not hasattr(_local, 'sessions'):
+            _local.sessions = []
+        _local.sessions.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.sessions.remove(self)
+        if exc_type is None:
+            self.flush()
+        else:
+            _forget_ids(self._new.values())
+            self._new.clear()
+
+    def add(self, document, validate=True, cascade=None):
+        """Record `document` to be saved on :meth:`flush`, as
+        :meth:`~mongoengine.Document.save` does in a session.  Saving a
+        document again only adds to the options it is saved with.
+        """
+        from .base import ObjectIdField
+
+        key = id(document)
+        self._deletes.pop(key, None)
+        if document._path_to_mongo('_id')[0] is None:
+            id_field = document._meta['id_field']
+            if isinstance(document._fields[id_field], ObjectIdField):
+                document[id_field] = ObjectId()
+                self._new[key] = document
+        if key in self._saves:
+            _, validated, cascaded = self._saves[key]
+            validate = validate or validated
+            cascade = cascade or cascaded
+        self._saves[key] = (document, validate, cascade)
+
+    def delete(self, document):
+        """Record `document` to be deleted on :meth:`flush`, as
+        :meth:`~mongoengine.Document.delete` does in a session.
+        """
+        key = id(document)
+        self._saves.pop(key, None)
+        if key in self._new:
+            # Never inserted, so there is nothing to delete
+            _forget_ids([self._new.pop(key)])
+        elif document.pk is not None:
+            self._deletes[key] = document
+
+    def _changed(self, document):
+        """Called when a saved document changes."""
+        key = id(document)
+        if key not in self._saves and key not in self._deletes:
+            self._saves[key] = (document, True, None)
+
+    def flush(self):
+        """Write the recorded documents.  Those not written because of an
+        error stay recorded.
+        """
+        self._flushing = True
+        try:
+            self._flush()
+        finally:
+            self._flushing = False
+
+    def _flush(self):
+        from .base import ObjectIdField
+
+        saves = self._cascade(list(self._saves.values()))
+        for document, validate, cascade in saves:
+            signals.pre_save.send(document.__class__, document=document)
+
+        # New documents get their ids before references to them are
+        # validated and stored
+        created = set()
+        for document, validate, cascade in saves:
+            if id(document) in self._new:
+                created.add(id(document))
+            elif document._path_to_mongo('_id')[0] is None:
+                created.add(id(document))
+                id_field = document._meta['id_field']
+                if isinstance(document._fields[id_field], ObjectIdField):
+                    document[id_field] = ObjectId()
+        try:
+            for document, validate, cascade in saves:
+                if validate:
+                    document.validate()
+        except Exception:
+            self._forget_ids(document for document, _, _ in saves
+                             if id(document) in created)
+            raise
+
+        # Deletes that have to apply delete rules go through the queryset
+        deletes = []
+        for document in list(self._deletes.values()):
+            if document._meta['delete_rules']:
+                document.delete()
+                del self._deletes[id(document)]
+            else:
+                deletes.append(document)
+
+        # Referenced documents, and their collections, are written first
+        documents = [document for document, _, _ in saves] + deletes
+        references = dict(
+            (id(document), [id(reference) for reference in
+                            _references(document)])
+            for document in documents)
+        documents = _references_first(
+            documents, lambda document: references[id(document)], id)
+        collections = OrderedDict()
+        depends = {}
+        for document in documents:
+            collection = document._get_collection()
+            name = collection.full_name
+            collections.setdefault(name, (collection, []))[1].append(
+                document)
+            depends.setdefault(name, set()).update(
+                references[id(document)])
+        names = dict((id(document), document._get_collection().full_name)
+                     for document in documents)
+        order = _references_first(
+            list(collections),
+            lambda name: [names[key] for key in depends[name]
+                          if key in names and names[key] != name])
+        deleted = set(id(document) for document in deletes)
+        for name in order:
+            collection, members = collections[name]
+            self._write(collection, members, created, deleted)
+
+    def _cascade(self, saves):
+        """Add the referenced documents of the saves that cascade."""
+        seen = set(id(document) for document, _, _ in saves)
+        i = 0
+        while i < len(saves):
+            document, validate, cascade = saves[i]
+            i += 1
+            if cascade is None:
+                cascade = document._meta.get('cascade', True)
+            if not cascade:
+                continue
+            for reference in _references(document, cascading=True):
+                if id(reference) not in seen and \
+                        id(reference) not in self._deletes:
+                    seen.add(id(reference))
+                    saves.append((reference, validate, cascade))
+        return saves
+
+    def _write(self, collection, documents, created, deleted):
+        """Write `documents` of `collection` in order."""
+        requests = []
+        written = []
+        for document in documents:
+            son = None
+            object_id = document._path_to_mongo('_id')[0]
+            if id(document) in deleted:
+                signals.pre_delete.send(document.__class__,
+                                        document=document)
+                request = pymongo.DeleteOne(document._update_spec(object_id))
+            elif id(document) in created:
+                son = document.to_mongo()
+                request = pymongo.InsertOne(son)
+            else:
+                request = document._update_request(object_id)
+            if request is not None:
+                requests.append(request)
+            written.append((document, request, son))
+
+        failed = None
+        if requests:
+            if self.write_options:
+                collection = collection.with_options(
+                    write_concern=WriteConcern(**self.write_options))
+            try:
+                collection.bulk_write(requests, ordered=True)
+            except pymongo.errors.BulkWriteError as err:
+                failed = err.details['writeErrors'][0]
+
+        index = -1
+        for document, request, son in written:
+            if request is not None:
+                index += 1
+                if failed is not None and index >= failed['index']:
+                    if id(document) in created:
+                        self._forget_ids([document])
+                    continue
+            key = id(document)
+            if key in deleted:
+                del self._deletes[key]
+                signals.post_delete.send(document.__class__,
+                                         document=document)
+            else:
+                document._mark_saved(son and son['_id'])
+                self._saves.pop(key, None)
+                self._new.pop(key, None)
+                signals.post_save.send(document.__class__, document=document,
+                                       created=key in created)
+        if failed is not None:
+            message = 'Could not save document (%s)'
+            if failed.get('code') == 11000:
+                message = u'Tried to save duplicate unique keys (%s)'
+            raise OperationError(message % failed['errmsg'])
+
+    def _forget_ids(self, documents):
+        """Take back the ids of new `documents` that weren't inserted, they
+        are given new ones when they are flushed again.
+        """
+        for document in documents:
+            self._new.pop(id(document), None)
+            _forget_ids([document])
+
+
+def _forget_ids(documents):
+    """Take back the ids given to new `documents` that weren't inserted."""
+    for document in documents:
+        document._data[document._meta['id_field']] = None
+
+
+def _references(document, cascading=False):
+    """Yield the documents that `document` refers to, or with `cascading`
+    those that :meth:`~mongoengine.Document.cascade_save` would save.
+    References that haven't been dereferenced are left out.
+    """
+    from .document import Document
+    from .fields import ReferenceField, GenericReferenceField
+
+    for name, field in six.iteritems(document._fields):
+        value = dict.get(document._data, name)
+        if isinstance(field, (ReferenceField, GenericReferenceField)):
+            values = [value]
+        elif cascading:
+            continue
+        elif isinstance(value, (list, tuple)):
+            values = value
+        elif isinstance(value, dict):
+            values = value.values()
+        else:
+            continue
+        for value in values:
+            if isinstance(value, Document):
+                yield value
+
+
+def _references_first(nodes, references, key=None):
+    """Order `nodes` so that each comes after the nodes in
+    ``references(node)``, keeping their order otherwise.  Circular
+    references are broken in that order too.  `key` gives the value that
+    the references name a node by.
+    """
+    key = key or (lambda node: node)
+    by_key = dict((key(node), node) for node in nodes)
+    ordered = []
+    seen = set()
+    for node in nodes:
+        if key(node) in seen:
+            continue
+        seen.add(key(node))
+        # Depth first, adding each node after its references
+        stack = [(node, iter(references(node)))]
+        while stack:
+            current, pending = stack[-1]
+            for reference in pending:
+                if reference in by_key and reference not in seen:
+                    seen.add(reference)
+                    target = by_key[reference]
+                    stack.append((target, iter(references(target))))
+                    break
+            else:
+                stack.pop()
+                ordered.append(current)
+    return ordered
@@ -0,0 +1,250 @@
+from __future__ import absolute_import
+
+import atexit
+import threading
+import time
+import warnings
+from collections import deque
+
+import pymongo
+from bson.objectid import ObjectId
+
+from .queryset import OperationError
+
+__all__ = ['WriteBehindQueue', 'write_behind_queue', 'flush_write_behind']
+
+
+BACKPRESSURE_POLICIES = ('block', 'raise', 'drop')
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def write_behind_queue(document):
+    """Return the :class:`WriteBehindQueue` that new documents of the class
+    `document` are saved through, or ``None`` if its meta doesn't set
+    ``write_behind``, eg.::
+
+        class LogEntry(Document):
+            meta = {'write_behind': {'max_batch': 1000, 'max_delay_ms': 50}}
+
+    ``write_behind`` may also be ``True`` to use the defaults.
+    """
+    options = document._meta.get('write_behind')
+    if not options:
+        return None
+    queue = _queues.get(document)
+    if queue is None:
+        with _queues_lock:
+            queue = _queues.get(document)
+            if queue is None:
+                options = {} if options is True else dict(options)
+                queue = _queues[document] = WriteBehindQueue(document,
+                                                             **options)
+    return queue
+
+
+def flush_write_behind(timeout=None):
+    """Write everything queued for the write-behind documents.  Called when
+    the interpreter exits.  Returns ``False`` if `timeout` (in seconds)
+    passed first.
+    """
+    flushed = True
+    for queue in list(_queues.values()):
+        flushed = queue.flush(timeout) and flushed
+    return flushed
+
+
+atexit.register(flush_write_behind)
+
+
+class WriteBehindQueue(object):
+    """Inserts the documents put on it from a background thread, with an
+    unordered :meth:`~pymongo.collection.Collection.insert_many` of up to
+    `max_batch` documents once that many are queued or the oldest has waited
+    `max_delay_ms`.
+
+    At most `max_queue` documents wait to be written.  When the queue is full
+    `backpressure` decides what :meth:`put` does: ``'block'`` waits for room,
+    raising :class:`~mongoengine.queryset.OperationError` after `timeout`
+    seconds if one is given, ``'raise'`` raises straight away and ``'drop'``
+    discards the document.
+
+    Documents that could not be written, or were dropped, are passed to
+    ``on_error(error, sons)``; without a callback a warning is issued.
+    """
+
+    def __init__(self, document, max_batch=1000, max_delay_ms=50,
+                 max_queue=10000, backpressure='block', timeout=None,
+                 on_error=None):
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError('backpressure must be one of %s' %
+                             ', '.join(BACKPRESSURE_POLICIES))
+        if max_batch < 1:
+            raise ValueError('max_batch must be at least 1')
+        if max_queue < 1:
+            raise ValueError('max_queue must be at least 1')
+        self.document = document
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000.0
+        self.max_queue = max_queue
+        self.backpressure = backpressure
+        self.timeout = timeout
+        self.on_error = on_error
+
+        # (time queued, son) pairs
+        self._items = deque()
+        self._writing = 0
+        self._flushing = 0
+        self._condition = threading.Condition()
+        self._thread = None
+
+        self._written = 0
+        self._failed = 0
+        self._dropped = 0
+        self._batches = 0
+        self._flush_time = 0.0
+        self._last_flush = None
+        self._max_flush = None
+
+    def put(self, son):
+        """Queue the SON of a new document, giving it an
+        :class:`~bson.objectid.ObjectId` if it has no ``_id``, which is
+        returned.
+        """
+        if son.get('_id') is None:
+            son['_id'] = ObjectId()
+        with self._condition:
+            if len(self._items) >= self.max_queue and not self._make_room():
+                self._dropped += 1
+                dropped = True
+            else:
+                dropped = False
+                self._items.append((time.time(), son))
+                self._start()
+                self._condition.notify_all()
+        if dropped:
+            self._error(OperationError('Write-behind queue of %s is full' %
+                                       self.document.__name__), [son])
+        return son['_id']
+
+    def _make_room(self):
+        """Wait for room in the queue as the policy says.  Returns ``False``
+        if the document is to be dropped.
+        """
+        if self.backpressure == 'drop':
+            return False
+        message = 'Write-behind queue of %s is full' % self.document.__name__
+        if self.backpressure == 'raise':
+            raise OperationError(message)
+        deadline = self.timeout and time.time() + self.timeout
+        while len(self._items) >= self.max_queue:
+            remaining = deadline and deadline - time.time()
+            if remaining is not None and remaining <= 0:
+                raise OperationError(message)
+            self._condition.wait(remaining)
+        return True
+
+    def flush(self, timeout=None):
+        """Write the queued documents now and wait until they are written.
+        Returns ``False`` if `timeout` (in seconds) passed first.
+        """
+        deadline = timeout and time.time() + timeout
+        with self._condition:
+            self._flushing += 1
+            self._condition.notify_all()
+            try:
+                while self._items or self._writing:
+                    remaining = deadline and deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+            finally:
+                self._flushing -= 1
+        return True
+
+    def metrics(self):
+        """Returns a dict of the queue ``depth``, the number of documents
+        ``written``, ``failed`` and ``dropped``, the number of ``batches``
+        and the ``last``, ``max`` and ``mean`` time a batch took to write in
+        milliseconds.
+        """
+        with self._condition:
+            mean = None
+            if self._batches:
+                mean = self._flush_time / self._batches
+            return {
+                'depth': len(self._items) + self._writing,
+                'written': self._written,
+                'failed': self._failed,
+                'dropped': self._dropped,
+                'batches': self._batches,
+                'last_flush_ms': self._last_flush,
+                'max_flush_ms': self._max_flush,
+                'mean_flush_ms': mean,
+            }
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run,
+                name='write-behind-%s' % self.document.__name__)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._items:
+                    self._condition.wait()
+                # Wait for a full batch until the oldest document is due
+                while len(self._items) < self.max_batch and \
+                        not self._flushing:
+                    remaining = self._items[0][0] + self.max_delay - \
+                        time.time()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                size = min(len(self._items), self.max_batch)
+                batch = [self._items.popleft()[1] for _ in range(size)]
+                self._writing = size
+                self._condition.notify_all()
+
+            started = time.time()
+            error = None
+            failed = []
+            try:
+                self.document._get_collection().insert_many(batch,
+                                                            ordered=False)
+            except pymongo.errors.BulkWriteError as err:
+                error = err
+                failed = [batch[write_error['index']]
+                          for write_error in err.details['writeErrors']]
+            except Exception as err:
+                error = err
+                failed = batch
+            elapsed = (time.time() - started) * 1000
+
+            if error is not None:
+                self._error(error, failed)
+            with self._condition:
+                self._writing = 0
+                self._written += size - len(failed)
+                self._failed += len(failed)
+                self._batches += 1
+                self._flush_time += elapsed
+                self._last_flush = elapsed
+                self._max_flush = max(self._max_flush or 0, elapsed)
+                self._condition.notify_all()
+
+    def _error(self, error, sons):
+        if self.on_error is not None:
+            try:
+                self.on_error(error, sons)
+            except Exception as err:
+                warnings.warn('Write-behind error callback of %s failed: %s'
+                              % (self.document.__name__, err),
+                              RuntimeWarning)
+        else:
+            warnings.warn('Write-behind insert of %s failed: %s'
+                          % (self.document.__name__, error), RuntimeWarning)
@@ -1,5 +1,6 @@
 from __future__ import absolute_import, print_function
 
+import copy
 import pickle
 import pymongo
 import six
@@ -9,6 +10,7 @@ import warnings
 from distutils.version import StrictVersion
 
 from datetime import datetime
+from bson.raw_bson import RawBSONDocument
 
 from .fixtures import Base, PickleEmbedded, PickleTest
 
@@ -16,7 +18,8 @@ from mongoengine import (
     connect, Q, CASCADE, NULLIFY, DENY,
     ValidationError, InvalidCollectionError, OperationError,
     StringField, IntField, BooleanField, DateTimeField, EmailField,
-    ListField, MapField, DictField,
+    ComplexDateTimeField,
+    ListField, SortedListField, MapField, DictField,
     ReferenceField, GenericReferenceField,
     Document, DynamicDocument, EmbeddedDocument, EmbeddedDocumentField)
 from mongoengine.base import NotRegistered, InvalidDocumentError
@@ -725,6 +728,160 @@ class DocumentTest(unittest.TestCase):
         self.assertEqual(person.name, "Test User")
         self.assertEqual(person.age, 30)
 
+    def test_from_son(self):
+        """Ensure that documents built from a SON match those built through
+        __init__.
+        """
+        class Address(EmbeddedDocument):
+            city = StringField()
+
+        class Profile(Document):
+            name = StringField(db_field='n')
+            size = StringField(choices=(('S', 'Small'), ('L', 'Large')))
+            tags = ListField(StringField())
+            scores = ListField(IntField())
+            address = EmbeddedDocumentField(Address, default=Address)
+            created = ComplexDateTimeField()
+            meta = {'allow_inheritance': False}
+
+        son = {'_id': bson.ObjectId(), 'n': 'Ross', 'size': 'L',
+               'tags': ['a', 'b'], 'created': '2012,01,02,03,04,05,000006',
+               'legacy': 1}
+        doc = Profile._from_son(son)
+        expected = Profile._from_son_init(son)
+
+        self.assertTrue(Profile._from_son_plan)
+        self.assertEqual(sorted(doc._data), sorted(expected._data))
+        for name in expected._data:
+            if name != 'address':
+                self.assertEqual(doc._data[name], expected._data[name])
+        self.assertEqual(doc.id, son['_id'])
+        self.assertEqual(doc._id, son['_id'])
+        self.assertEqual(doc.legacy, 1)
+        self.assertEqual(doc.get_size_display(), 'Large')
+        self.assertEqual(doc.created, datetime(2012, 1, 2, 3, 4, 5, 6))
+        self.assertEqual(doc.scores, [])
+        self.assertEqual(doc.address.city, None)
+        self.assertEqual(doc._changed_fields, ['address'])
+        self.assertEqual(expected._changed_fields, ['address'])
+        self.assertFalse(doc._created)
+        self.assertTrue(doc._initialised)
+
+        doc.tags.append('c')
+        self.assertEqual(doc._get_changed_fields(), ['address', 'tags'])
+
+        class Custom(Document):
+            name = StringField()
+
+            def __init__(self, **values):
+                super(Custom, self).__init__(**values)
+                self.seen = True
+
+        self.assertTrue(Custom._from_son({'name': 'x'}).seen)
+        self.assertEqual(Custom._from_son_plan, ())
+
+    def test_to_mongo_serializer(self):
+        """Ensure that the generated to_mongo matches the generic field by
+        field conversion, key order included.
+        """
+        class Address(EmbeddedDocument):
+            city = StringField(db_field='c')
+            meta = {'allow_inheritance': True}
+
+        class PostalAddress(Address):
+            code = IntField()
+
+        class Person(Document):
+            name = StringField(db_field='n')
+            age = IntField(default=30)
+            active = BooleanField()
+            created = DateTimeField(default=datetime.now)
+            address = EmbeddedDocumentField(Address)
+            tags = ListField(StringField())
+            friend = ReferenceField('self')
+
+        class Animal(DynamicDocument):
+            name = StringField()
+            meta = {'allow_inheritance': False}
+
+        Person.drop_collection()
+        friend = Person(name='Bob')
+        friend.save()
+        people = [
+            Person(),
+            Person(name='Ross', age=31, active=True, tags=['a', 'b'],
+                   address=Address(city='Leeds'), friend=friend),
+            Person(name=5, age='31', active=1,
+                   address=PostalAddress(city='Leeds', code=1)),
+            Person(age=True, address=Address()),
+        ]
+        for person in people:
+            son = person.to_mongo()
+            self.assertEqual(list(son.items()),
+                             list(person._generic_to_mongo().items()))
+            self.assertEqual(bson.BSON.encode(son),
+                             bson.BSON.encode(person._generic_to_mongo()))
+        self.assertEqual(people[2].to_mongo()['n'], u'5')
+        self.assertEqual(people[2].to_mongo()['age'], 31)
+        self.assertEqual(people[2].to_mongo()['address'],
+                         {'c': 'Leeds', 'code': 1,
+                          '_cls': 'Address.PostalAddress'})
+        self.assertEqual(type(people[3].to_mongo()['age']), int)
+        self.assertTrue('_to_mongo_serializer' in Address.__dict__)
+        self.assertTrue('_to_mongo_serializer' in PostalAddress.__dict__)
+
+        animal = Animal(name='Rex', legs=4)
+        self.assertEqual(animal.to_mongo(), {'name': 'Rex', 'legs': 4})
+
+    def test_from_raw_son(self):
+        """Ensure that documents built from raw BSON decode their fields
+        when they are first read.
+        """
+        class Comment(EmbeddedDocument):
+            text = StringField()
+
+        class Post(Document):
+            title = StringField(db_field='t')
+            hits = IntField(default=0)
+            tags = ListField(StringField())
+            comments = ListField(EmbeddedDocumentField(Comment))
+            created = ComplexDateTimeField()
+
+        post = Post(id=bson.ObjectId(), title='Lazy', hits=3, tags=['a'],
+                    comments=[Comment(text='First')],
+                    created=datetime(2012, 1, 2))
+        son = post.to_mongo()
+        son['legacy'] = True
+        raw = RawBSONDocument(bson.BSON.encode(son))
+
+        doc = Post._from_son(raw)
+        self.assertTrue(isinstance(doc, Post))
+        self.assertEqual(doc._data.pending,
+                         set(['title', 'hits', 'tags', 'comments']))
+        self.assertEqual(doc.id, post.id)
+        self.assertEqual(doc.legacy, True)
+        self.assertEqual(doc.created, datetime(2012, 1, 2))
+
+        self.assertEqual(doc.title, 'Lazy')
+        self.assertEqual(doc._data.pending, set(['hits', 'tags', 'comments']))
+        doc.hits = 4
+        self.assertEqual(doc._data.pending, set(['tags', 'comments']))
+        self.assertTrue('tags' in doc._data)
+        self.assertEqual(len(doc._data), len(Post._fields))
+
+        del son['legacy']
+        son['hits'] = 4
+        self.assertEqual(doc.to_mongo(), son)
+        self.assertEqual(doc._data.pending, set())
+        self.assertEqual(doc.comments[0].text, 'First')
+        self.assertEqual(doc._get_changed_fields(), ['hits'])
+
+        doc = Post._from_son(raw)
+        self.assertEqual(sorted(dict(doc._data)), sorted(Post._fields))
+        data = copy.copy(Post._from_son(raw)._data)
+        self.assertEqual(type(data), dict)
+        self.assertEqual(data['title'], 'Lazy')
+
     def test_to_dbref(self):
         """Ensure that you can get a dbref of a document"""
         person = self.Person(name="Test User", age=30)
@@ -792,8 +949,8 @@ class DocumentTest(unittest.TestCase):
         doc.embedded_field.dict_field['woot'] = "woot"
 
         self.assertEqual(doc._get_changed_fields(), [
-            'list_field', 'dict_field', 'embedded_field.list_field',
-            'embedded_field.dict_field'])
+            'list_field', 'dict_field.woot', 'embedded_field.list_field',
+            'embedded_field.dict_field.woot'])
         doc.save()
 
         doc = doc.reload(10)
@@ -1026,6 +1183,110 @@ class DocumentTest(unittest.TestCase):
         p1.reload()
         self.assertEqual(p1.name, p.parent.name)
 
+    def test_cascade_save_graph(self):
+        """Ensure that cascading saves write only changed references, once
+        each, with a bulk write per collection.
+        """
+        class Author(Document):
+            name = StringField()
+            mentor = ReferenceField('self')
+
+        class Person(Document):
+            name = StringField()
+            parent = ReferenceField('self')
+            author = ReferenceField(Author)
+
+        Author.drop_collection()
+        Person.drop_collection()
+
+        mentor = Author(name='Mentor')
+        mentor.save()
+        author = Author(name='Author', mentor=mentor)
+        author.save()
+        grandparent = Person(name='Grandparent', author=author)
+        grandparent.save()
+        parent = Person(name='Parent', parent=grandparent, author=author)
+        parent.save()
+        child = Person(name='Child', parent=parent, author=author)
+        child.save()
+
+        writes = []
+        for document in (Author, Person):
+            collection = document._get_collection()
+
+            def bulk_write(requests, _bulk_write=collection.bulk_write,
+                           **kwargs):
+                writes.append([type(r).__name__ for r in requests])
+                return _bulk_write(requests, **kwargs)
+            collection.bulk_write = bulk_write
+
+        saves = []
+
+        def post_save(sender, document, created):
+            saves.append(document.name)
+
+        signals.post_save.connect(post_save)
+        try:
+            grandparent.name = 'Grandma'
+            mentor.name = 'Teacher'
+            child.save(cascade=True)
+        finally:
+            signals.post_save.disconnect(post_save)
+            for document in (Author, Person):
+                del document._get_collection().bulk_write
+
+        self.assertEqual(saves, ['Grandma', 'Teacher', 'Child'])
+        self.assertEqual(writes, [['UpdateOne'], ['UpdateOne']])
+        self.assertEqual(Author.objects.get(pk=mentor.pk).name, 'Teacher')
+        self.assertEqual(Person.objects.get(pk=grandparent.pk).name,
+                         'Grandma')
+        self.assertEqual(grandparent._get_changed_fields(), [])
+
+    def test_cascade_save_options(self):
+        """Ensure that cascading saves use the write options and cascade
+        flag they are given.
+        """
+        class Author(Document):
+            name = StringField()
+            mentor = ReferenceField('self')
+
+        class Person(Document):
+            name = StringField()
+            author = ReferenceField(Author)
+
+        Author.drop_collection()
+        Person.drop_collection()
+
+        mentor = Author(name='Mentor')
+        mentor.save()
+        author = Author(name='Author', mentor=mentor)
+        author.save()
+        person = Person(name='Person', author=author)
+        person.save()
+
+        concerns = []
+        collection = Author._get_collection()
+
+        def with_options(_with_options=collection.with_options, **kwargs):
+            concerns.append(kwargs['write_concern'].document)
+            return _with_options(**kwargs)
+        collection.with_options = with_options
+        try:
+            author.name = 'Writer'
+            mentor.name = 'Teacher'
+            person.save(cascade_kwargs={
+                'cascade': False,
+                'write_options': {'w': 1, 'wtimeout': 1000}})
+        finally:
+            del collection.with_options
+
+        self.assertEqual(concerns, [{'w': 1, 'wtimeout': 1000}])
+        self.assertEqual(Author.objects.get(pk=author.pk).name, 'Writer')
+        self.assertEqual(Author.objects.get(pk=mentor.pk).name, 'Mentor')
+
+        person.save()
+        self.assertEqual(Author.objects.get(pk=mentor.pk).name, 'Teacher')
+
     def test_update(self):
         """Ensure that an existing document is updated instead of be overwritten.
         """
@@ -1705,6 +1966,86 @@ class DocumentTest(unittest.TestCase):
             doc._delta(),
             ({}, {'db_embedded_field.db_list_field.2.db_list_field': 1}))
 
+    def test_changes_reported_upwards(self):
+        """Ensure that embedded documents report their changes to the
+        documents holding them, so unchanged values aren't searched.
+        """
+        class Address(EmbeddedDocument):
+            city = StringField()
+
+        class Profile(EmbeddedDocument):
+            address = EmbeddedDocumentField(Address)
+            tags = ListField(StringField())
+
+        class Comment(EmbeddedDocument):
+            text = StringField()
+
+        class Post(Document):
+            title = StringField()
+            profile = EmbeddedDocumentField(Profile)
+            comments = ListField(EmbeddedDocumentField(Comment))
+            extra = MapField(EmbeddedDocumentField(Comment))
+
+        Post.drop_collection()
+        Post(title='Post', profile=Profile(address=Address(city='Leeds')),
+             comments=[Comment(text=str(i)) for i in range(100)],
+             extra={'a': Comment(text='a'), 'b': Comment(text='b')}).save()
+        post = Post.objects.first()
+
+        searched = []
+        get_changed_fields = Comment._get_changed_fields
+
+        def _get_changed_fields(comment, *args, **kwargs):
+            searched.append(comment)
+            return get_changed_fields(comment, *args, **kwargs)
+
+        Comment._get_changed_fields = _get_changed_fields
+        try:
+            self.assertEqual(post._get_changed_fields(), [])
+            self.assertEqual(searched, [])
+
+            post.comments[50].text = 'changed'
+            post.profile.address.city = 'York'
+            post.extra['b'].text = 'B'
+            self.assertEqual(post._get_changed_fields(),
+                             ['profile.address.city', 'comments.50.text',
+                              'extra.b.text'])
+            self.assertEqual(len(searched), 2)
+
+            # Moved documents are found where they are now
+            comment = post.comments[50]
+            post.comments.insert(0, Comment(text='new'))
+            self.assertEqual(post._get_changed_fields(),
+                             ['comments', 'profile.address.city',
+                              'extra.b.text'])
+            post._changed_fields = []
+            self.assertEqual(post._get_changed_fields(),
+                             ['profile.address.city', 'comments.51.text',
+                              'extra.b.text'])
+            post.comments.remove(comment)
+            post._changed_fields = []
+            self.assertEqual(post._get_changed_fields(),
+                             ['profile.address.city', 'extra.b.text'])
+        finally:
+            Comment._get_changed_fields = get_changed_fields
+
+        # Documents assigned directly are searched once, then linked
+        post = Post.objects.first()
+        address = Address(city='Hull')
+        post.profile.address = address
+        post.profile._changed_fields = []
+        address.city = 'Bath'
+        self.assertEqual(post._get_changed_fields(), ['profile.address.city'])
+        self.assertTrue(address._instance is post.profile)
+        post.profile.tags.append('new')
+        self.assertEqual(post._get_changed_fields(),
+                         ['profile.tags', 'profile.address.city'])
+
+        post.save()
+        post.reload()
+        self.assertEqual(post.profile.address.city, 'Bath')
+        self.assertEqual(post.profile.tags, ['new'])
+
     def test_save_only_changed_fields(self):
         """Ensure save only sets / unsets changed fields
         """
@@ -1734,6 +2075,137 @@ class DocumentTest(unittest.TestCase):
         self.assertEqual(person.age, 21)
         self.assertEqual(person.active, False)
 
+    def test_save_changes_in_one_update(self):
+        """Ensure that saving an existing document converts only the changed
+        values and sends at most one update.
+        """
+        class Comment(EmbeddedDocument):
+            text = StringField()
+
+        class Post(Document):
+            title = StringField()
+            body = StringField()
+            comments = ListField(EmbeddedDocumentField(Comment))
+
+        Post.drop_collection()
+        Post(title='Title', body='Body',
+             comments=[Comment(text='First')]).save()
+        post = Post.objects.get()
+
+        collection = Post.objects._collection
+        updates = []
+        update = collection.update
+
+        def counting_update(spec, document, **kwargs):
+            updates.append(document)
+            return update(spec, document, **kwargs)
+
+        collection.update = counting_update
+        try:
+            post.save()
+            self.assertEqual(updates, [])
+
+            post.title = 'New title'
+            post.body = None
+            post.comments[0].text = 'Changed'
+            post.to_mongo = None
+            post.save()
+            del post.to_mongo
+            self.assertEqual(updates, [{
+                '$set': {'title': 'New title', 'comments.0.text': 'Changed'},
+                '$unset': {'body': 1},
+            }])
+        finally:
+            del collection.update
+
+        son = collection.find_one()
+        self.assertEqual(son['title'], 'New title')
+        self.assertFalse('body' in son)
+        self.assertEqual(son['comments'], [{'_cls': 'Comment',
+                                            'text': 'Changed'}])
+
+    def test_save_list_operations(self):
+        """Ensure that appends, pops and removes are saved as atomic list
+        updates, and that other changes set the whole list.
+        """
+        class Feed(Document):
+            items = ListField(StringField())
+            ranks = SortedListField(IntField())
+
+        Feed.drop_collection()
+        Feed(items=['a', 'b', 'c'], ranks=[2, 1]).save()
+        feed = Feed.objects.get()
+
+        collection = Feed.objects._collection
+        updates = []
+        update = collection.update
+
+        def counting_update(spec, document, **kwargs):
+            updates.append(document)
+            return update(spec, document, **kwargs)
+
+        collection.update = counting_update
+        try:
+            feed.items.append('d')
+            feed.items.extend(['e', 'f'])
+            feed.save()
+            feed.items.pop()
+            feed.save()
+            feed.items.pop(0)
+            feed.save()
+            feed.items.remove('c')
+            feed.items.remove('d')
+            feed.save()
+            feed.items.append('g')
+            feed.items.pop()
+            feed.save()
+            feed.items.append('a')
+            feed.items.sort()
+            feed.ranks.append(0)
+            feed.save()
+            self.assertEqual(updates, [
+                {'$push': {'items': {'$each': ['d', 'e', 'f']}}},
+                {'$pop': {'items': 1}},
+                {'$pop': {'items': -1}},
+                {'$pull': {'items': {'$in': ['c', 'd']}}},
+                {'$set': {'items': ['b', 'e']}},
+                {'$set': {'items': ['a', 'b', 'e'], 'ranks': [0, 1, 2]}},
+            ])
+        finally:
+            del collection.update
+
+        son = collection.find_one()
+        self.assertEqual(son['items'], ['a', 'b', 'e'])
+        self.assertEqual(son['ranks'], [0, 1, 2])
+
+    def test_save_dict_keys(self):
+        """Ensure that changed and removed keys of a dict are saved on their
+        own, and that keys unusable in a field path set the whole dict.
+        """
+        class Stats(Document):
+            counters = MapField(IntField(), db_field='c')
+
+        Stats.drop_collection()
+        Stats(counters={'ross': 1, 'bob': 2, 'alice': 3}).save()
+        stats = Stats.objects.get()
+
+        stats.counters['ross'] += 1
+        stats.counters['bob'] = 0
+        del stats.counters['alice']
+        self.assertEqual(stats._get_changed_fields(),
+                         ['c.ross', 'c.bob', 'c.alice'])
+        self.assertEqual(stats._delta(),
+                         ({'c.ross': 2, 'c.bob': 0}, {'c.alice': 1}))
+        stats.save()
+
+        son = Stats.objects._collection.find_one()
+        self.assertEqual(son['c'], {'ross': 2, 'bob': 0})
+
+        stats = Stats.objects.get()
+        stats.counters.update({'ross': 5, 'a.b': 1})
+        self.assertEqual(stats._delta(),
+                         ({'c': {'ross': 5, 'bob': 0, 'a.b': 1}}, {}))
+
     def test_delete(self):
         """Ensure that document may be deleted using the delete method.
         """
@@ -2090,6 +2562,7 @@ class DocumentTest(unittest.TestCase):
             editor = ReferenceField(Editor)
 
             @classmethod
+            @signals.per_document
             def pre_delete(cls, sender, document, **kwargs):
                 document.editor.update(dec__review_queue=1)
 
@@ -2122,6 +2595,7 @@ class DocumentTest(unittest.TestCase):
             editor = ReferenceField(Editor)
 
             @classmethod
+            @signals.per_document
             def post_delete(cls, sender, document, **kwargs):
                 document.editor.update(dec__review_queue=1)
 
@@ -2153,6 +2627,7 @@ class DocumentTest(unittest.TestCase):
             editor = ReferenceField(Editor)
 
             @classmethod
+            @signals.per_document
             def post_delete(cls, sender, document, **kwargs):
                 # decrement the docs-to-review count
                 document.editor.update(dec__review_queue=1)
@@ -2190,6 +2665,7 @@ class DocumentTest(unittest.TestCase):
             editor = ReferenceField(Editor)
 
             @classmethod
+            @signals.per_document
             def pre_delete(cls, sender, document, **kwargs):
                 document.editor.update(dec__review_queue=1)
 
@@ -2197,6 +2673,7 @@ class DocumentTest(unittest.TestCase):
             blogpost = ReferenceField(BlogPost, reverse_delete_rule=CASCADE)
 
             @classmethod
+            @signals.per_document
             def pre_delete(cls, sender, document, **kwargs):
                 document.blogpost.editor.update(dec__comments_to_review=1)
 
@@ -2238,6 +2715,7 @@ class DocumentTest(unittest.TestCase):
             blogpost = ReferenceField(BlogPost, reverse_delete_rule=CASCADE)
 
             @classmethod
+            @signals.per_document
             def pre_delete(cls, sender, document, **kwargs):
                 # decrement the comments-to-review count
                 document.blogpost.editor.update(dec__comments_to_review=1)
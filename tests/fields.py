@@ -1788,6 +1788,35 @@ class FieldTest(unittest.TestCase):
         c = self.db['mongoengine.counters'].find_one({'_id': 'person.id'})
         self.assertEqual(c['next'], 10)
 
+    def test_sequence_field_block_size(self):
+        """Ensure that sequence values are reserved a block at a time."""
+        class Ticket(Document):
+            number = SequenceField(block_size=5)
+
+        self.db['mongoengine.counters'].drop()
+        Ticket.drop_collection()
+
+        for x in range(7):
+            Ticket().save()
+        c = self.db['mongoengine.counters'].find_one({'_id': 'ticket.number'})
+        self.assertEqual(c['next'], 10)
+
+        Ticket.number.reserve(20)
+        c = self.db['mongoengine.counters'].find_one({'_id': 'ticket.number'})
+        self.assertEqual(c['next'], 27)
+        for x in range(20):
+            Ticket().save()
+        c = self.db['mongoengine.counters'].find_one({'_id': 'ticket.number'})
+        self.assertEqual(c['next'], 27)
+
+        numbers = sorted(Ticket.objects.scalar('number'))
+        self.assertEqual(numbers, list(range(1, 28)))
+
+        self.assertRaises(ValueError, SequenceField, block_size=0)
+        field = SequenceField('counters', 'default', 1, 10)
+        self.assertEqual((field.min_value, field.max_value, field.block_size),
+                         (1, 10, 1))
+
     def test_multiple_sequence_fields(self):
         class Person(Document):
             id = SequenceField(primary_key=True)
@@ -1,21 +1,27 @@
 # -*- coding: utf-8 -*-
+import threading
+import time
 import unittest
 import pymongo
 import six
 from bson import ObjectId
+from bson.raw_bson import RawBSONDocument
 from datetime import datetime, timedelta
+from decimal import Decimal
 
 from mongoengine.queryset import (QuerySet, QuerySetManager,
                                   MultipleObjectsReturned, DoesNotExist,
-                                  QueryFieldList)
+                                  QueryFieldList, QueryPlanCache,
+                                  query_plan_cache, ADAPTIVE_BATCH_BYTES,
+                                  _AdaptiveBatchSize)
 from mongoengine import (
-    connect, Q, queryset_manager, CASCADE, NULLIFY, DENY,
+    connect, Q, Param, queryset_manager, CASCADE, NULLIFY, DENY,
     StringField, IntField, BooleanField, DateTimeField,
-    DecimalField, GeoPointField, ObjectIdField,
+    DecimalField, FloatField, GeoPointField, ObjectIdField,
     ListField, MapField, DictField,
     ReferenceField, GenericReferenceField,
     Document, EmbeddedDocument, EmbeddedDocumentField,
-    OperationError, InvalidQueryError)
+    OperationError, InvalidQueryError, ValidationError, signals)
 from mongoengine.connection import get_connection, register_db
 from mongoengine.tests import query_counter
 
@@ -57,6 +63,244 @@ class QuerySetTest(unittest.TestCase):
         self.assertEqual(QuerySet._transform_query(name__exists=True),
                          {'name': {'$exists': True}})
 
+    def test_query_plan_cache(self):
+        """Ensure that compiled query plans are cached per query shape and
+        that cached plans still convert each call's values.
+        """
+        class BlogPost(Document):
+            title = StringField(db_field='t')
+            hits = IntField(db_field='h')
+            meta = {'ordering': ['-hits'], 'allow_inheritance': False}
+
+        query_plan_cache.clear()
+        query = QuerySet._transform_query(BlogPost, title='a', hits__gte='5')
+        self.assertEqual(query, {'t': 'a', 'h': {'$gte': 5}})
+        misses = query_plan_cache.info().misses
+
+        query = QuerySet._transform_query(BlogPost, hits__gte='7', title='b')
+        self.assertEqual(query, {'t': 'b', 'h': {'$gte': 7}})
+        info = query_plan_cache.info()
+        self.assertEqual(info.misses, misses)
+        self.assertEqual(info.hits, 1)
+
+        update = QuerySet._transform_update(BlogPost, dec__hits=2)
+        self.assertEqual(update, {'$inc': {'h': -2}})
+        update = QuerySet._transform_update(BlogPost, dec__hits=3)
+        self.assertEqual(update, {'$inc': {'h': -3}})
+
+        self.assertEqual(BlogPost.objects.order_by('title')._ordering,
+                         [('t', pymongo.ASCENDING)])
+        hits = query_plan_cache.info().hits
+        self.assertEqual(BlogPost.objects.order_by('title')._ordering,
+                         [('t', pymongo.ASCENDING)])
+        self.assertEqual(query_plan_cache.info().hits, hits + 1)
+
+        self.assertEqual(BlogPost.objects.only('title')._loaded_fields.fields,
+                         set(['t']))
+
+    def test_query_plan_cache_eviction(self):
+        """Ensure that the query plan cache evicts the least recently used
+        plans once it is full.
+        """
+        cache = QueryPlanCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.info(), (3, 1, 2, 2))
+
+    def test_lookup_field_trie(self):
+        """Ensure that field paths are resolved through the per class trie
+        and that the trie is reset when new documents are registered.
+        """
+        class TrieComment(EmbeddedDocument):
+            text = StringField(db_field='t')
+
+        class TriePost(Document):
+            comments = ListField(EmbeddedDocumentField(TrieComment),
+                                 db_field='c')
+            extra = DictField()
+            parent = EmbeddedDocumentField('TrieParent')
+
+        trie = TriePost._field_path_trie
+        fields = QuerySet._lookup_field(TriePost, ['comments', '0', 'text'])
+        self.assertEqual(fields, [TriePost.comments, '0',
+                                  TrieComment._fields['text']])
+        self.assertEqual(len(trie), 3)
+        self.assertEqual(
+            QuerySet._lookup_field(TriePost, ['comments', '0', 'text']),
+            fields)
+        # All list indexes share the same path
+        self.assertEqual(
+            QuerySet._lookup_field(TriePost, ['comments', '12', 'text']),
+            [TriePost.comments, '12', TrieComment._fields['text']])
+        self.assertEqual(len(trie), 3)
+        self.assertEqual(
+            QuerySet._translate_field_name(TriePost, 'comments.text'), 'c.t')
+        self.assertEqual(len(trie), 4)
+        for i in range(10):
+            self.assertEqual(
+                QuerySet._lookup_field(TriePost, ['extra', 'key%d' % i,
+                                                  'sub'])[0],
+                TriePost.extra)
+        self.assertEqual(
+            QuerySet._translate_field_name(TriePost, 'extra.key'),
+            'extra.key')
+        self.assertEqual(len(trie), 5)
+        self.assertRaises(InvalidQueryError, QuerySet._lookup_field,
+                          TriePost, ['missing'])
+        self.assertFalse('missing' in trie.root.children)
+
+        # Every document class resolves paths in its own trie
+        self.assertFalse(TrieComment._field_path_trie is trie)
+
+        class TrieParent(EmbeddedDocument):
+            name = StringField(db_field='n')
+
+        self.assertEqual(
+            QuerySet._translate_field_name(TriePost, 'parent.name'), 'parent.n')
+        self.assertEqual(len(trie), 2)
+
+    def test_prepared_query(self):
+        """Ensure that prepared queries bind values to their placeholders.
+        """
+        self.Person.drop_collection()
+        for name, age in [('A', 20), ('B', 30), ('C', 40), ('D', 40)]:
+            self.Person(name=name, age=age).save()
+
+        prepared = self.Person.objects(age__gte=30).order_by('-name').prepare(
+            age__lte=Param('max_age'), name__in=Param('names'))
+        self.assertEqual(prepared.params, set(['max_age', 'names']))
+
+        people = prepared.bind(max_age='40', names=['A', 'B', 'D'])
+        self.assertTrue(isinstance(people, QuerySet))
+        self.assertEqual(people._query['age'], {'$gte': 30, '$lte': 40})
+        self.assertEqual([p.name for p in people], ['D', 'B'])
+
+        people = prepared.bind(max_age=35, names=['A', 'B', 'C'])
+        self.assertEqual([p.name for p in people], ['B'])
+        people = prepared.bind(max_age=35, names=['A', 'B', 'C'])
+        self.assertEqual(people.only('age').first().name, None)
+        people = prepared.bind(max_age=35, names=['A', 'B', 'C'])
+        self.assertEqual(people.filter(name='C').count(), 0)
+        self.assertEqual(prepared.bind(max_age=35, names=['B']).first().name,
+                         'B')
+
+        prepared = self.Person.objects.prepare(name=Param('name'), age=40)
+        self.assertEqual(prepared.bind(name='C').count(), 1)
+        self.assertEqual(prepared.bind(name='B').count(), 0)
+
+        self.assertRaises(InvalidQueryError, prepared.bind)
+        self.assertRaises(InvalidQueryError, prepared.bind, name='C', age=1)
+        self.assertRaises(InvalidQueryError, self.Person.objects.prepare,
+                          unknown=Param('unknown'))
+
+        self.Person.drop_collection()
+
+    def test_prepared_query_same_field(self):
+        """Ensure that bound conditions on a field the prepared query already
+        filters are combined with the existing condition, not replace it.
+        """
+        self.Person.drop_collection()
+        for name, age in [('A', 20), ('B', 30), ('C', 40), ('D', 40)]:
+            self.Person(name=name, age=age).save()
+
+        prepared = self.Person.objects(age__gte=30).prepare(age=Param('a'))
+        people = prepared.bind(a=20)
+        self.assertEqual(people._query['$and'], [{'age': 20}])
+        self.assertEqual(people.count(), 0)
+        self.assertEqual(prepared.bind(a=40).count(), 2)
+
+        prepared = self.Person.objects(age=40).prepare(age__lte=Param('a'))
+        self.assertEqual(prepared.bind(a=30).count(), 0)
+        self.assertEqual(prepared.bind(a=40).count(), 2)
+
+        prepared = self.Person.objects(name__in=['A', 'B', 'C']).prepare(
+            name__in=Param('names'))
+        people = prepared.bind(names=['B', 'C', 'D'])
+        self.assertEqual(people._query['name'], {'$in': ['A', 'B', 'C']})
+        self.assertEqual(sorted(p.name for p in people), ['B', 'C'])
+
+        self.Person.drop_collection()
+
+    def test_lazy(self):
+        """Ensure that lazy querysets fetch raw BSON and return the same
+        documents.
+        """
+        class LazyPost(Document):
+            title = StringField()
+            hits = IntField()
+            meta = {'lazy_decode': True}
+
+        LazyPost.drop_collection()
+        LazyPost(title='A', hits=1).save()
+        LazyPost(title='B', hits=2).save()
+
+        queryset = LazyPost.objects.order_by('title')
+        self.assertTrue(queryset._lazy)
+        self.assertTrue(queryset.clone()._lazy)
+        codec_options = queryset._cursor.collection.codec_options
+        self.assertTrue(codec_options.document_class is RawBSONDocument)
+        self.assertEqual([(p.title, p.hits) for p in queryset],
+                         [('A', 1), ('B', 2)])
+        self.assertEqual(queryset[1].title, 'B')
+
+        post = LazyPost.objects.get(title='A')
+        post.hits = 5
+        post.save()
+        self.assertEqual(LazyPost.objects.lazy(False).get(title='A').hits, 5)
+        self.assertFalse(self.Person.objects._lazy)
+        self.assertTrue(self.Person.objects.lazy()._lazy)
+
+        LazyPost.drop_collection()
+
+    def test_as_pymongo(self):
+        """Ensure that querysets can return plain dicts.
+        """
+        class Account(Document):
+            name = StringField(db_field='n')
+            balance = DecimalField(db_field='b')
+            tags = ListField(StringField())
+            meta = {'allow_inheritance': False}
+
+        Account.drop_collection()
+        alice = Account(name='Alice', balance='1.5', tags=['a'])
+        alice.save()
+        bob = Account(name='Bob', balance='2', tags=['b'])
+        bob.save()
+        Account(name='Carol', balance='3', tags=['c']).save()
+
+        results = list(Account.objects.order_by('name').as_pymongo())
+        self.assertEqual(results[0], {'_id': alice.id, 'n': 'Alice',
+                                      'b': '1.5', 'tags': ['a']})
+        self.assertEqual(len(results), 3)
+
+        queryset = Account.objects.order_by('-name').only('name', 'balance')
+        queryset = queryset.as_pymongo(field_names=True, to_python=True)
+        self.assertEqual(queryset.skip(1).limit(1)[0],
+                         {'id': bob.id, 'name': 'Bob',
+                          'balance': Decimal('2')})
+        self.assertEqual(
+            Account.objects.exclude('tags', 'balance').as_pymongo().first(),
+            {'_id': alice.id, 'n': 'Alice'})
+        self.assertEqual(Account.objects(name='Bob').as_pymongo(
+            field_names=True).get()['name'], 'Bob')
+        self.assertEqual(
+            Account.objects.as_pymongo().in_bulk([alice.id, bob.id]),
+            {alice.id: {'_id': alice.id, 'n': 'Alice', 'b': '1.5',
+                        'tags': ['a']},
+             bob.id: {'_id': bob.id, 'n': 'Bob', 'b': '2', 'tags': ['b']}})
+
+        queryset = Account.objects.as_pymongo().batch_size(1)
+        self.assertEqual(len(list(queryset.clone())), 3)
+        self.assertTrue(isinstance(
+            queryset.as_pymongo(enabled=False).first(), Account))
+
+        Account.drop_collection()
+
     def test_transform_update_push(self):
         """Ensure the differences in behvaior between 'push' and 'push_all'"""
         class BlogPost(Document):
@@ -545,7 +789,10 @@ class QuerySetTest(unittest.TestCase):
             self.assertEqual(q, 1)  # 1 for the insert
 
             Blog.objects.insert(blogs)
-            self.assertEqual(q, 3)  # 1 insert, 1 for in bulk fetch (3 total)
+            self.assertEqual(q, 2)  # 1 insert, not read back (2 total)
+
+            Blog.objects.insert([Blog(title="reloaded")], reload=True)
+            self.assertEqual(q, 4)  # 1 insert, 1 for in bulk fetch (4 total)
 
         Blog.drop_collection()
 
@@ -593,6 +840,152 @@ class QuerySetTest(unittest.TestCase):
         obj_id = Blog.objects.insert(blog1, load_bulk=False)
         self.assertEqual(obj_id.__class__.__name__, 'ObjectId')
 
+    def test_bulk_insert_returns_documents(self):
+        """Ensure that the inserted documents are returned with their ids
+        rather than read back, unless asked to.
+        """
+        class Blog(Document):
+            title = StringField()
+            tags = ListField(StringField())
+
+        Blog.drop_collection()
+
+        blogs = [Blog(title='first'), Blog(title='second')]
+        inserted = Blog.objects.insert(blogs)
+        self.assertEqual([id(blog) for blog in inserted],
+                         [id(blog) for blog in blogs])
+        self.assertEqual([blog.pk for blog in inserted],
+                         [blog.pk for blog in Blog.objects.order_by('title')])
+        self.assertFalse(blogs[0]._created)
+
+        blogs[0].tags.append('saved')
+        self.assertEqual(blogs[0]._get_changed_fields(), ['tags'])
+        blogs[0].save()
+        self.assertEqual(Blog.objects.get(title='first').tags, ['saved'])
+
+        # List operations logged before the insert aren't replayed
+        blog = Blog(title='items', tags=['a'])
+        blog.tags.append('b')
+        Blog.objects.insert(blog)
+        blog.tags.append('c')
+        blog.save()
+        self.assertEqual(Blog.objects.get(title='items').tags,
+                         ['a', 'b', 'c'])
+
+        blog = Blog(title='third')
+        reloaded = Blog.objects.insert(blog, reload=True)
+        self.assertFalse(reloaded is blog)
+        self.assertEqual(reloaded.pk, blog.pk)
+
+    def test_bulk_save(self):
+        """Ensure that new and changed documents are saved in one bulk write
+        and that documents that can't be saved are reported.
+        """
+        class Blog(Document):
+            title = StringField(required=True)
+            tags = ListField(StringField())
+
+        Blog.drop_collection()
+        collection = Blog.objects._collection
+        collection.create_index('title', unique=True)
+        Blog(title='existing').save()
+        Blog(title='taken').save()
+
+        writes = []
+        bulk_write = collection.bulk_write
+
+        def counting_bulk_write(requests, **kwargs):
+            writes.append(len(requests))
+            return bulk_write(requests, **kwargs)
+
+        saves = []
+
+        def post_save(sender, document, created):
+            saves.append((document.title, created))
+
+        collection.bulk_write = counting_bulk_write
+        signals.post_save.connect(post_save)
+        try:
+            existing = Blog.objects.get(title='existing')
+            existing.tags.append('changed')
+            blogs = [existing, Blog(title='new'), Blog(),
+                     Blog(title='taken'), Blog(title='last')]
+            result = Blog.objects.bulk_save(blogs)
+            self.assertEqual(writes, [4])
+
+            # Ordered saves stop at the first error, batches are written
+            # apart
+            Blog.objects(title='last').delete()
+            ordered = [Blog(title='one'), Blog(title='taken'),
+                       Blog(title='last')]
+            ordered_result = Blog.objects.bulk_save(
+                iter(ordered), ordered=True, batch_size=1)
+            self.assertEqual(writes, [4, 1, 1])
+        finally:
+            signals.post_save.disconnect(post_save)
+            del collection.bulk_write
+
+        self.assertEqual(result.saved, [blogs[0], blogs[1], blogs[4]])
+        self.assertEqual([doc for doc, error in result.errors],
+                         [blogs[2], blogs[3]])
+        self.assertTrue(isinstance(result.errors[0][1], ValidationError))
+        self.assertTrue(isinstance(result.errors[1][1], OperationError))
+        self.assertEqual(saves, [('existing', False), ('new', True),
+                                 ('last', True), ('one', True)])
+        self.assertEqual(existing._get_changed_fields(), [])
+        self.assertEqual(Blog.objects.get(title='new').pk, blogs[1].pk)
+        self.assertEqual(Blog.objects.get(title='existing').tags,
+                         ['changed'])
+
+        self.assertEqual(ordered_result.saved, ordered[:1])
+        self.assertEqual([doc for doc, error in ordered_result.errors],
+                         ordered[1:])
+        self.assertEqual(Blog.objects(title='last').count(), 0)
+        self.assertEqual(Blog.objects.count(), 4)
+
+    def test_insert_iter(self):
+        """Ensure that documents from an iterable are inserted lazily in
+        batches cut by count and size.
+        """
+        class Blog(Document):
+            title = StringField()
+
+        Blog.drop_collection()
+
+        batches = []
+
+        def pre_bulk_insert(sender, documents):
+            batches.append(len(documents))
+
+        taken = []
+
+        def blogs(count, title=u'post'):
+            for i in range(count):
+                taken.append(i)
+                yield Blog(title=title)
+
+        signals.pre_bulk_insert.connect(pre_bulk_insert)
+        try:
+            ids = Blog.objects.insert_iter(blogs(25), batch_size=10)
+            self.assertEqual(taken, [])
+            first = next(ids)
+            self.assertEqual(len(taken), 11)
+            ids = [first] + list(ids)
+            self.assertEqual(batches, [10, 10, 5])
+            self.assertEqual(len(set(ids)), 25)
+            self.assertEqual(Blog.objects(id__in=ids).count(), 25)
+
+            del batches[:]
+            ids = list(Blog.objects.insert_iter(
+                blogs(5, u'x' * 100), batch_bytes=300, overlap=True))
+            self.assertEqual(batches, [2, 2, 1])
+            self.assertEqual(Blog.objects(id__in=ids).count(), 5)
+        finally:
+            signals.pre_bulk_insert.disconnect(pre_bulk_insert)
+
+        self.assertRaises(OperationError, list,
+                          Blog.objects.insert_iter([Blog(id=ids[0])]))
+
     def test_repeated_iteration(self):
         """Ensure that QuerySet rewinds itself one iteration finishes.
         """
@@ -1385,6 +1778,68 @@ class QuerySetTest(unittest.TestCase):
 
         self.assertRaises(OperationError, self.Person.objects.delete)
 
+    def test_reverse_delete_rule_plan(self):
+        """Ensure that delete rules are planned across levels before
+        anything is deleted, in chunks, and reported by a dry run.
+        """
+        class BlogPost(Document):
+            author = ReferenceField(self.Person, reverse_delete_rule=CASCADE)
+
+        class Comment(Document):
+            post = ReferenceField(BlogPost, reverse_delete_rule=CASCADE)
+
+        class Like(Document):
+            comment = ReferenceField(Comment, reverse_delete_rule=NULLIFY)
+
+        documents = [BlogPost, Comment, Like]
+        for document in documents:
+            document.drop_collection()
+
+        try:
+            me = self.Person(name='Test User')
+            me.save()
+            someoneelse = self.Person(name='Some-one Else')
+            someoneelse.save()
+            for author in (me, me, me, someoneelse):
+                post = BlogPost(author=author)
+                post.save()
+                for i in range(2):
+                    comment = Comment(post=post)
+                    comment.save()
+                    Like(comment=comment).save()
+
+            plan = self.Person.objects(name='Test User').delete(dry_run=True,
+                                                                  chunk_size=2)
+            self.assertEqual(
+                [(step.document, step.field, step.rule, step.count)
+                 for step in plan],
+                [(self.Person, None, CASCADE, 1),
+                 (BlogPost, 'author', CASCADE, 3),
+                 (Comment, 'post', CASCADE, 6),
+                 (Like, 'comment', NULLIFY, 6)])
+            self.assertEqual(self.Person.objects.count(), 2)
+            self.assertEqual(Comment.objects.count(), 8)
+
+            self.Person.objects(name='Test User').delete(chunk_size=2)
+            self.assertEqual(self.Person.objects.count(), 1)
+            self.assertEqual(BlogPost.objects.count(), 1)
+            self.assertEqual(Comment.objects.count(), 2)
+            self.assertEqual(Like.objects.count(), 8)
+            self.assertEqual(Like.objects(comment=None).count(), 6)
+
+            class Vote(Document):
+                comment = ReferenceField(Comment, reverse_delete_rule=DENY)
+
+            documents.append(Vote)
+            Vote.drop_collection()
+            Vote(comment=Comment.objects.first()).save()
+            self.assertRaises(OperationError, self.Person.objects.delete)
+            self.assertEqual(self.Person.objects.count(), 1)
+            self.assertEqual(BlogPost.objects.count(), 1)
+        finally:
+            for document in documents:
+                document.drop_collection()
+
     def test_update(self):
         """Ensure that atomic updates work properly.
         """
@@ -2809,6 +3264,135 @@ class QuerySetTest(unittest.TestCase):
                           (u'Wilson Jr', 19, u'Corumba-GO'),
                           (u'Gabriel Falcao', 23, u'New York')])
 
+    def test_scalar_from_son(self):
+        """Ensure that scalar values are read straight from the documents
+        returned by the database when possible.
+        """
+        class Profile(EmbeddedDocument):
+            name = StringField(db_field='n')
+            age = IntField(default=18)
+
+        class Person(Document):
+            name = StringField()
+            profile = EmbeddedDocumentField(Profile, db_field='p')
+            friends = ListField(StringField())
+            created = DateTimeField(default=datetime.now)
+
+        Person.drop_collection()
+        Person(name='Wilson', profile=Profile(name='Jr', age=19),
+               friends=['Bob'], created=datetime(2012, 1, 1)).save()
+        Person(name='Tayza').save()
+        Person._get_collection().update({'name': 'Tayza'},
+                                        {'$unset': {'created': 1}})
+
+        queryset = Person.objects.order_by('name').scalar(
+            'pk', 'profile__name', 'profile__age', 'created')
+        self.assertEqual(len(queryset._scalar_plan), 4)
+        tayza, wilson = list(queryset)
+        self.assertEqual(wilson[1:], ('Jr', 19, datetime(2012, 1, 1)))
+        # Fields of a missing embedded document are None, not defaults
+        self.assertEqual(tayza[1:3], (None, None))
+        self.assertTrue(isinstance(tayza[3], datetime))
+        self.assertEqual(wilson[0], Person.objects.get(name='Wilson').pk)
+
+        rows = list(Person.objects.order_by('name').values_list(
+            'name', 'profile__age', named=True))
+        self.assertEqual(rows[0].name, 'Tayza')
+        self.assertEqual(rows[1].profile__age, 19)
+        self.assertEqual(rows[1], ('Wilson', 19))
+        row = Person.objects(name='Tayza').scalar('name', named=True).first()
+        self.assertEqual(row.name, 'Tayza')
+
+        # Fields that need their descriptors still go through documents
+        queryset = Person.objects.order_by('name').scalar('name', 'friends')
+        self.assertEqual(queryset._scalar_plan, None)
+        self.assertEqual(list(queryset), [('Tayza', []),
+                                          ('Wilson', ['Bob'])])
+        row = Person.objects(name='Wilson').scalar(
+            'friends', named=True).get()
+        self.assertEqual(row.friends, ['Bob'])
+
+        # Both ways give the same values for a missing embedded document
+        fast = Person.objects(name='Tayza').scalar('profile__age')
+        slow = Person.objects(name='Tayza').scalar('profile__age', 'friends')
+        self.assertNotEqual(fast._scalar_plan, None)
+        self.assertEqual(slow._scalar_plan, None)
+        self.assertEqual(fast.get(), None)
+        self.assertEqual(slow.get(), (None, []))
+
+        self.assertRaises(TypeError, Person.objects.scalar, 'name', tuple=1)
+
+    def test_to_columns(self):
+        """Ensure that fields can be read into typed column buffers.
+        """
+        from mongoengine.queryset import numpy, INT64_TYPECODE
+
+        class Stats(EmbeddedDocument):
+            score = FloatField(db_field='s')
+
+        class Sale(Document):
+            price = IntField()
+            paid = BooleanField()
+            created = DateTimeField()
+            stats = EmbeddedDocumentField(Stats)
+            rank = IntField(default=3)
+            name = StringField()
+
+        Sale.drop_collection()
+        Sale(price=10, paid=True, created=datetime(2012, 1, 1, 0, 0, 1),
+             stats=Stats(score=1.5), rank=1).save()
+        Sale(price=20, paid=False).save()
+        Sale(created=datetime(1969, 12, 31, 23, 59, 59, 500000)).save()
+        Sale._get_collection().update({'price': 20}, {'$unset': {'rank': 1}})
+
+        queryset = Sale.objects.order_by('created', 'price')
+        columns = queryset.to_columns('price', 'paid', 'created',
+                                      'stats__score', 'rank', numpy=False)
+        self.assertEqual(list(columns), ['price', 'paid', 'created',
+                                         'stats__score', 'rank'])
+        price, paid, created, score, rank = columns.values()
+        self.assertEqual(price.values.typecode, INT64_TYPECODE)
+        self.assertEqual(list(price.values), [20, 0, 10])
+        self.assertEqual(list(price.mask), [0, 1, 0])
+        self.assertEqual(list(paid.values), [0, 0, 1])
+        self.assertEqual(list(paid.mask), [0, 1, 0])
+        self.assertEqual(list(created.values), [0, -500, 1325376001000])
+        self.assertEqual(list(created.mask), [1, 0, 0])
+        self.assertEqual(score.values.typecode, 'd')
+        self.assertEqual(list(score.values), [0.0, 0.0, 1.5])
+        self.assertEqual(list(score.mask), [1, 1, 0])
+        self.assertEqual(list(rank.values), [3, 3, 1])
+        self.assertEqual(list(rank.mask), [0, 0, 0])
+
+        columns = Sale.objects(price__gt=100).to_columns('price',
+                                                         numpy=False)
+        self.assertEqual(len(columns['price'].values), 0)
+        columns = Sale.objects.limit(2).to_columns('price', numpy=False)
+        self.assertEqual(len(columns['price'].values), 2)
+
+        # More documents arrive than were counted, the buffers grow
+        count = QuerySet.count
+        QuerySet.count = lambda self, *args, **kwargs: 1
+        try:
+            columns = queryset.to_columns('price', 'stats__score',
+                                          numpy=False)
+        finally:
+            QuerySet.count = count
+        self.assertEqual(list(columns['price'].values), [20, 0, 10])
+        self.assertEqual(list(columns['price'].mask), [0, 1, 0])
+        self.assertEqual(list(columns['stats__score'].mask), [1, 1, 0])
+
+        self.assertRaises(InvalidQueryError, queryset.to_columns, 'name')
+        self.assertRaises(InvalidQueryError, queryset.to_columns, 'stats')
+
+        if numpy is not None:
+            columns = queryset.to_columns('price', 'created', numpy=True)
+            self.assertEqual(columns['price'].values.tolist(), [20, 0, 10])
+            self.assertEqual(columns['price'].mask.tolist(),
+                             [False, True, False])
+            self.assertEqual(columns['created'].values[2],
+                             numpy.datetime64('2012-01-01T00:00:01'))
+
     def test_scalar_decimal(self):
         from decimal import Decimal
 
@@ -2993,6 +3577,88 @@ class QuerySetTest(unittest.TestCase):
             "%s" % sorted(
                 self.Person.objects.scalar('name').in_bulk(list(pks)).values()))
 
+    def test_prefetch(self):
+        """Ensure that prefetched iteration returns every result and stops
+        its thread when iteration stops early.
+        """
+        class A(Document):
+            n = IntField()
+
+        A.drop_collection()
+        A.objects.insert([A(n=i) for i in range(50)])
+
+        qs = A.objects.order_by('n').batch_size(7).prefetch(depth=2)
+        self.assertEqual([a.n for a in qs], list(range(50)))
+        self.assertEqual([a.n for a in qs], list(range(50)))
+        self.assertEqual(list(qs.clone().scalar('n'))[:3], [0, 1, 2])
+
+        threads = threading.active_count()
+        for a in qs:
+            if a.n == 3:
+                break
+        self.assertEqual(qs._prefetcher, None)
+        for _ in range(50):
+            if threading.active_count() <= threads:
+                break
+            time.sleep(0.02)
+        self.assertEqual(threading.active_count(), threads)
+
+        self.assertEqual([a.n for a in qs.limit(5)], list(range(5)))
+        self.assertEqual(next(qs).n, 0)
+        prefetcher = qs._prefetcher
+        qs.rewind()
+        self.assertEqual(qs._prefetcher, None)
+        del prefetcher, qs
+        for _ in range(50):
+            if threading.active_count() <= threads:
+                break
+            time.sleep(0.02)
+        self.assertEqual(threading.active_count(), threads)
+
+    def test_adaptive_batch_size(self):
+        """Ensure that adaptive batches grow while the consumer keeps up,
+        up to the bytes aimed for, and shrink when it is slow.
+        """
+        sizer = _AdaptiveBatchSize(initial=10, batch_bytes=64000)
+        self.assertEqual(sizer.size, 10)
+        sizes = []
+        for _ in range(5):
+            sizer.fetched(1000, 0.01)
+            sizer.consumed(0.001)
+            sizes.append(sizer.size)
+        self.assertEqual(sizes, [20, 40, 64, 64, 64])
+
+        sizer.fetched(4000, 0.01)
+        sizer.consumed(0.001)
+        self.assertEqual(sizer.size, 36)
+
+        sizes = []
+        for _ in range(3):
+            sizer.fetched(4000, 0.01)
+            sizer.consumed(1)
+            sizes.append(sizer.size)
+        self.assertEqual(sizes, [18, 10, 10])
+        sizer.reset()
+        self.assertEqual(sizer.size, 10)
+
+        qs = self.Person.objects.adaptive_batch_size(initial=5)
+        self.assertEqual(qs.clone()._adaptive_batch,
+                         (5, ADAPTIVE_BATCH_BYTES))
+        self.assertEqual(qs.batch_size(10)._adaptive_batch, None)
+
+    def test_adaptive_batch_size_iteration(self):
+        """Ensure that iterating with adaptive batches returns every
+        document while the batches grow.
+        """
+        self.Person.drop_collection()
+        self.Person.objects.insert([self.Person(name='Person %d' % i, age=i)
+                                    for i in range(300)])
+        qs = self.Person.objects.adaptive_batch_size(initial=2)
+        ages = [person.age for person in qs]
+        self.assertEqual(sorted(ages), list(range(300)))
+        self.assertTrue(qs._cursor._sizer.size > 2)
+        self.Person.drop_collection()
+
     def test_batch_size(self):
         """Ensure that batch_size works."""
         class A(Document):
@@ -3102,10 +3768,14 @@ class QTest(unittest.TestCase):
 
         # Check than an error is raised when conflicting queries are anded
         def invalid_combination():
-            query = Q(x__lt=7) & Q(x__lt=3)
+            query = Q(x__ne=7) & Q(x__ne=3)
             query.to_query(TestDoc)
         self.assertRaises(InvalidQueryError, invalid_combination)
 
+        # Redundant range bounds are merged rather than rejected
+        query = Q(x__lt=7) & Q(x__lt=3)
+        self.assertEqual(query.to_query(TestDoc), {'x': {'$lt': 3}})
+
         # Check normal cases work without an error
         query = Q(x__lt=7) & Q(x__gt=3)
 
@@ -3215,6 +3885,115 @@ class QTest(unittest.TestCase):
         self.assertEqual(test2.count(), 1)
         self.assertEqual(test.count(), 3)
 
+    def test_optimized_queries(self):
+        """Ensure that the query optimizer rewrites queries into simpler ones.
+        """
+        class TestDoc(Document):
+            x = IntField()
+            y = StringField()
+            tags = ListField(StringField())
+
+        def to_query(q):
+            return q.to_query(TestDoc)
+
+        self.assertEqual(to_query(Q(x=1) | Q(x=2) | Q(x__in=[3, 4])),
+                         {'x': {'$in': [1, 2, 3, 4]}})
+        self.assertEqual(to_query(Q(tags='a') | Q(tags='b')),
+                         {'tags': {'$in': ['a', 'b']}})
+        self.assertEqual(to_query(Q(x__in=[1, 2, 3]) & Q(x__in=[2, 3, 4])),
+                         {'x': {'$in': [2, 3]}})
+        self.assertEqual(to_query(Q(x__in=[1, 5, 9]) & Q(x__gt=4)),
+                         {'x': {'$in': [5, 9]}})
+        self.assertEqual(to_query(Q(x__gte=3) & Q(x__gt=3) & Q(x__lt=9)),
+                         {'x': {'$gt': 3, '$lt': 9}})
+        self.assertEqual(to_query((Q(x=1) | Q()) & (Q() & Q(y='a'))),
+                         {'x': 1, 'y': 'a'})
+
+        # Contradictions compile into a query that can't match
+        no_match = {'_id': {'$in': []}}
+        self.assertEqual(to_query(Q(x__in=[])), no_match)
+        self.assertEqual(to_query(Q(x__gt=5) & Q(x__lt=3)), no_match)
+        self.assertEqual(to_query(Q(x__gte=3, x__lt=3)), no_match)
+        self.assertEqual(to_query((Q(x=1) | Q(x=2)) & Q(x=3)), no_match)
+        self.assertEqual(to_query(Q(x=1) & Q(x=2) | Q(y='a') & Q(y='b')),
+                         no_match)
+        self.assertEqual(to_query((Q(x=1) & Q(x=2)) | Q(y='a')), {'y': 'a'})
+
+        # Array fields may hold several values at once
+        self.assertRaises(InvalidQueryError, to_query,
+                          Q(tags='a') & Q(tags='b'))
+        self.assertEqual(to_query(Q(tags__not__in=[])),
+                         {'tags': {'$not': {'$in': []}}})
+
+    def test_optimized_query_results(self):
+        """Ensure that optimized queries match the same documents as the
+        conditions they were built from.
+        """
+        class TestDoc(Document):
+            x = IntField()
+            y = StringField()
+            tags = ListField(StringField())
+
+        TestDoc.drop_collection()
+        for i in range(10):
+            TestDoc(x=i, y='abcde'[i % 5], tags=['t%s' % (i % 3),
+                                                 't%s' % (i % 4)]).save()
+
+        matrix = [
+            (Q(x=1) | Q(x=2) | Q(x=3),
+             lambda d: d.x in (1, 2, 3)),
+            (Q(x=1) | Q(x__in=[4, 5]) | Q(y='a'),
+             lambda d: d.x in (1, 4, 5) or d.y == 'a'),
+            (Q(x__in=[1, 2, 3, 4]) & Q(x__in=[3, 4, 5]),
+             lambda d: d.x in (3, 4)),
+            (Q(x__in=[1, 2, 3, 4]) & Q(x__gte=2) & Q(x__lt=4),
+             lambda d: 2 <= d.x < 4),
+            (Q(x__gt=2) & Q(x__gt=4) & Q(x__lte=8) & Q(x__lt=8),
+             lambda d: 4 < d.x < 8),
+            (Q(x=3) & Q(x__gte=3),
+             lambda d: d.x == 3),
+            (Q(y__gte='b') & Q(y__lt='d') & Q(y__gt='a'),
+             lambda d: 'b' <= d.y < 'd'),
+            ((Q(x=1) | Q(x=2)) & (Q(x=2) | Q(x=3)),
+             lambda d: d.x == 2),
+            ((Q(x__lt=5) | Q(y='e')) & Q(x__gt=3),
+             lambda d: (d.x < 5 or d.y == 'e') and d.x > 3),
+            (Q(tags='t0') | Q(tags='t3'),
+             lambda d: 't0' in d.tags or 't3' in d.tags),
+            (Q(tags='t1') & Q(x__gt=2) & Q(x__gt=0),
+             lambda d: 't1' in d.tags and d.x > 2),
+            (Q() | Q(x__in=[7, 8]) & Q(),
+             lambda d: d.x in (7, 8)),
+            (Q(x__in=[]) | Q(x=4),
+             lambda d: d.x == 4),
+            (Q(x__gt=5) & Q(x__lt=5),
+             lambda d: False),
+            (Q(x__in=[1, 2]) & Q(x__in=[3]),
+             lambda d: False),
+            (Q(x=1) & Q(x=2) | Q(y='c') & Q(y='d'),
+             lambda d: False),
+        ]
+
+        docs = list(TestDoc.objects)
+        for q_obj, predicate in matrix:
+            expected = sorted(d.x for d in docs if predicate(d))
+            results = sorted(d.x for d in TestDoc.objects(q_obj))
+            self.assertEqual(results, expected)
+            self.assertEqual(TestDoc.objects(q_obj).count(), len(expected))
+
+        # Impossible queries don't need the database
+        queryset = TestDoc.objects(x__gt=5, x__lt=5)
+        self.assertTrue(queryset._matches_nothing)
+        self.assertEqual(queryset.count(), 0)
+        self.assertEqual(list(queryset), [])
+        self.assertEqual(queryset.distinct('x'), [])
+        self.assertEqual(queryset.update(set__y='z'), 0)
+        self.assertRaises(IndexError, lambda: queryset[0])
+        self.assertEqual(queryset.first(), None)
+        queryset.delete()
+        self.assertEqual(TestDoc.objects.count(), 10)
+        self.assertFalse(TestDoc.objects(x__gt=5)._matches_nothing)
+
 
 class QueryFieldListTest(unittest.TestCase):
     def test_empty(self):
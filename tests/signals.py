@@ -141,6 +141,14 @@ class DocumentSignalTests(BaseSignalTests):
                     signal_output.append('Is loaded')
                 else:
                     signal_output.append('Not loaded')
+
+            @classmethod
+            def pre_bulk_delete(cls, sender, ids, **kwargs):
+                signal_output.append('pre_bulk_delete signal, %s' % len(ids))
+
+            @classmethod
+            def post_bulk_delete(cls, sender, ids, **kwargs):
+                signal_output.append('post_bulk_delete signal, %s' % len(ids))
         self.Author = Author
 
         @six.python_2_unicode_compatible
@@ -194,6 +202,8 @@ class DocumentSignalTests(BaseSignalTests):
             len(signals.post_delete.receivers),
             len(signals.pre_bulk_insert.receivers),
             len(signals.post_bulk_insert.receivers),
+            len(signals.pre_bulk_delete.receivers),
+            len(signals.post_bulk_delete.receivers),
         )
 
         signals.pre_init.connect(Author.pre_init, sender=Author)
@@ -204,6 +214,8 @@ class DocumentSignalTests(BaseSignalTests):
         signals.post_delete.connect(Author.post_delete, sender=Author)
         signals.pre_bulk_insert.connect(Author.pre_bulk_insert, sender=Author)
         signals.post_bulk_insert.connect(Author.post_bulk_insert, sender=Author)
+        signals.pre_bulk_delete.connect(Author.pre_bulk_delete, sender=Author)
+        signals.post_bulk_delete.connect(Author.post_bulk_delete, sender=Author)
 
         signals.pre_init.connect(Another.pre_init, sender=Another)
         signals.post_init.connect(Another.post_init, sender=Another)
@@ -221,6 +233,8 @@ class DocumentSignalTests(BaseSignalTests):
         signals.pre_save.disconnect(self.Author.pre_save)
         signals.pre_bulk_insert.disconnect(self.Author.pre_bulk_insert)
         signals.post_bulk_insert.disconnect(self.Author.post_bulk_insert)
+        signals.pre_bulk_delete.disconnect(self.Author.pre_bulk_delete)
+        signals.post_bulk_delete.disconnect(self.Author.post_bulk_delete)
 
         signals.pre_init.disconnect(self.Another.pre_init)
         signals.post_init.disconnect(self.Another.post_init)
@@ -239,6 +253,8 @@ class DocumentSignalTests(BaseSignalTests):
             len(signals.post_delete.receivers),
             len(signals.pre_bulk_insert.receivers),
             len(signals.post_bulk_insert.receivers),
+            len(signals.pre_bulk_delete.receivers),
+            len(signals.post_bulk_delete.receivers),
         )
 
         self.assertEqual(self.pre_signals, post_signals)
@@ -306,6 +322,46 @@ class DocumentSignalTests(BaseSignalTests):
 
         self.Author.objects.delete()
 
+    def test_bulk_delete_signals(self):
+        """Queryset deletes should send the bulk delete signals once per
+        chunk, and the delete signals to receivers that want each document.
+        """
+        self.Author.drop_collection()
+        self.Another.drop_collection()
+        for name in ('Bill', 'Ben', 'Bob'):
+            self.Author(name=name).save()
+            self.Another(name=name).save()
+
+        self.assertEqual(
+            self.get_signal_output(self.Author.objects.delete, chunk_size=2),
+            ['pre_bulk_delete signal, 2', 'post_bulk_delete signal, 2',
+             'pre_bulk_delete signal, 1', 'post_bulk_delete signal, 1'])
+        self.assertEqual(self.Author.objects.count(), 0)
+
+        self.assertEqual(
+            self.get_signal_output(self.Another.objects(name='Bill').delete),
+            [])
+
+        @signals.per_document
+        def pre_delete(sender, document, **kwargs):
+            signal_output.append('per document, %s' % document)
+
+        signals.pre_delete.connect(pre_delete, sender=self.Another)
+        try:
+            output = self.get_signal_output(self.Another.objects.delete)
+        finally:
+            signals.pre_delete.disconnect(pre_delete, sender=self.Another)
+        self.assertEqual(sorted(line for line in output
+                                if 'delete' in line or 'document' in line), [
+            'per document, Ben',
+            'per document, Bob',
+            'post_delete Another signal, Ben',
+            'post_delete Another signal, Bob',
+            'pre_delete Another signal, Ben',
+            'pre_delete Another signal, Bob',
+        ])
+        self.assertEqual(self.Another.objects.count(), 0)
+
 
 if __name__ == '__main__':
     unittest.main()
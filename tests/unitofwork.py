@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from mongoengine import (
+    connect, session, signals, Document, EmbeddedDocument,
+    EmbeddedDocumentField, ListField, ReferenceField, StringField,
+    ValidationError)
+from mongoengine.connection import register_db
+
+
+class SessionTest(unittest.TestCase):
+
+    def setUp(self):
+        connect(alias='default', host='mongo')
+        register_db('mongoenginetest')
+
+        class Author(Document):
+            name = StringField(required=True)
+
+        class Comment(EmbeddedDocument):
+            text = StringField()
+
+        class Post(Document):
+            title = StringField()
+            author = ReferenceField(Author)
+            comments = ListField(EmbeddedDocumentField(Comment))
+
+        Author.drop_collection()
+        Post.drop_collection()
+        self.Author = Author
+        self.Comment = Comment
+        self.Post = Post
+
+        self.writes = []
+        for document in (Author, Post):
+            collection = document._get_collection()
+            collection.bulk_write = self._counting(collection)
+
+    def tearDown(self):
+        for document in (self.Author, self.Post):
+            del document._get_collection().bulk_write
+
+    def _counting(self, collection):
+        bulk_write = collection.bulk_write
+
+        def counting_bulk_write(requests, **kwargs):
+            self.writes.append((collection.name,
+                                [type(r).__name__ for r in requests]))
+            return bulk_write(requests, **kwargs)
+        return counting_bulk_write
+
+    def test_flush_on_exit(self):
+        """Ensure that saves in a session are written once on exit, new
+        referenced documents first.
+        """
+        saves = []
+
+        def post_save(sender, document, created):
+            saves.append((sender.__name__, created))
+
+        signals.post_save.connect(post_save)
+        try:
+            with session():
+                author = self.Author(name='Ross')
+                post = self.Post(title='Hello', author=author)
+                post.save()
+                post.comments.append(self.Comment(text='First'))
+                post.save()
+                self.assertEqual(self.writes, [])
+                self.assertEqual(self.Post.objects.count(), 0)
+        finally:
+            signals.post_save.disconnect(post_save)
+
+        self.assertEqual(self.writes, [('author', ['InsertOne']),
+                                       ('post', ['InsertOne'])])
+        self.assertEqual(saves, [('Author', True), ('Post', True)])
+        post = self.Post.objects.get()
+        self.assertEqual(post.author.pk, author.pk)
+        self.assertEqual(post.comments[0].text, 'First')
+        self.assertEqual(post._get_changed_fields(), [])
+
+    def test_changes_and_deletes(self):
+        """Ensure that saved documents changed in a session are written
+        without being saved, and that deletes are grouped with them.
+        """
+        author = self.Author(name='Ross')
+        author.save()
+        self.Post(title='First', author=author).save()
+        self.Post(title='Second', author=author).save()
+
+        with session() as current:
+            first = self.Post.objects.get(title='First')
+            second = self.Post.objects.get(title='Second')
+            first.comments.append(self.Comment(text='Hi'))
+            first.author.name = 'Bob'
+            second.delete()
+
+            current.flush()
+            self.assertEqual(self.writes, [('author', ['UpdateOne']),
+                                           ('post', ['UpdateOne',
+                                                     'DeleteOne'])])
+            first.title = 'Changed'
+
+        self.assertEqual(self.writes[2:], [('post', ['UpdateOne'])])
+        self.assertEqual(self.Post.objects.count(), 1)
+        post = self.Post.objects.get()
+        self.assertEqual(post.title, 'Changed')
+        self.assertEqual(post.comments[0].text, 'Hi')
+        self.assertEqual(post.author.name, 'Bob')
+
+    def test_ids_on_save(self):
+        """Ensure that new documents saved in a session get their ids
+        straight away, and lose them if they are never inserted.
+        """
+        with session():
+            author = self.Author(name='Ross')
+            author.save()
+            self.assertNotEqual(author.pk, None)
+            author_id = author.pk
+
+            removed = self.Author(name='Bob')
+            removed.save()
+            self.assertNotEqual(removed.pk, None)
+            removed.delete()
+            self.assertEqual(removed.pk, None)
+
+        self.assertEqual(self.writes, [('author', ['InsertOne'])])
+        self.assertEqual(author.pk, author_id)
+        self.assertEqual(self.Author.objects.get().pk, author_id)
+
+    def test_error_discards(self):
+        """Ensure that nothing is written when the block raises, and that
+        invalid documents are kept without their ids.
+        """
+        author = self.Author(name='Ross')
+        try:
+            with session():
+                author.save()
+                raise ValueError()
+        except ValueError:
+            pass
+        self.assertEqual(author.pk, None)
+        self.assertEqual(self.writes, [])
+
+        author = self.Author()
+        with self.assertRaises(ValidationError):
+            with session():
+                author.save()
+        self.assertEqual(author.pk, None)
+        self.assertEqual(self.writes, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
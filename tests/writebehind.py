@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from mongoengine import (
+    connect, write_behind_queue, Document, IntField, OperationError,
+    WriteBehindQueue)
+from mongoengine.connection import register_db
+
+
+class WriteBehindTest(unittest.TestCase):
+
+    def setUp(self):
+        connect(alias='default', host='mongo')
+        register_db('mongoenginetest')
+        self.errors = []
+
+    def _log_entry(self, **options):
+        options.setdefault('on_error',
+                           lambda error, sons: self.errors.append(
+                               (type(error).__name__, len(sons))))
+
+        class LogEntry(Document):
+            number = IntField()
+            meta = {'write_behind': options}
+
+        LogEntry.drop_collection()
+        return LogEntry
+
+    def test_save_queues_inserts(self):
+        """Ensure that new documents are inserted in batches in the
+        background, and that updates are written straight away.
+        """
+        LogEntry = self._log_entry(max_batch=3, max_delay_ms=10000)
+        queue = write_behind_queue(LogEntry)
+        self.assertEqual(write_behind_queue(LogEntry), queue)
+
+        entries = [LogEntry(number=i) for i in range(7)]
+        for entry in entries:
+            entry.save()
+        self.assertTrue(all(entry.pk is not None for entry in entries))
+        self.assertEqual(entries[0]._get_changed_fields(), [])
+
+        self.assertTrue(queue.flush(timeout=10))
+        self.assertEqual(LogEntry.objects.count(), 7)
+        self.assertEqual(sorted(LogEntry.objects.scalar('number')),
+                         list(range(7)))
+        metrics = queue.metrics()
+        self.assertEqual(metrics['depth'], 0)
+        self.assertEqual(metrics['written'], 7)
+        self.assertEqual(metrics['batches'], 3)
+        self.assertTrue(metrics['max_flush_ms'] >= metrics['last_flush_ms'])
+
+        entries[0].number = 10
+        entries[0].save()
+        self.assertEqual(LogEntry.objects.with_id(entries[0].pk).number, 10)
+        self.assertEqual(queue.metrics()['batches'], 3)
+        self.assertEqual(self.errors, [])
+
+    def test_backpressure(self):
+        """Ensure that a full queue raises or drops as configured."""
+        LogEntry = self._log_entry(max_batch=10, max_delay_ms=10000,
+                                   max_queue=2, backpressure='raise')
+        LogEntry(number=1).save()
+        LogEntry(number=2).save()
+        self.assertRaises(OperationError, LogEntry(number=3).save)
+        self.assertTrue(write_behind_queue(LogEntry).flush(timeout=10))
+        self.assertEqual(LogEntry.objects.count(), 2)
+
+        LogEntry = self._log_entry(max_batch=10, max_delay_ms=10000,
+                                   max_queue=2, backpressure='drop')
+        for i in range(3):
+            LogEntry(number=i).save()
+        queue = write_behind_queue(LogEntry)
+        self.assertTrue(queue.flush(timeout=10))
+        self.assertEqual(LogEntry.objects.count(), 2)
+        self.assertEqual(queue.metrics()['dropped'], 1)
+        self.assertEqual(self.errors, [('OperationError', 1)])
+
+        LogEntry = self._log_entry(max_queue=2, timeout=0.01,
+                                   max_delay_ms=10000, max_batch=10)
+        LogEntry(number=1).save()
+        LogEntry(number=2).save()
+        self.assertRaises(OperationError, LogEntry(number=3).save)
+
+        self.assertRaises(ValueError, WriteBehindQueue, LogEntry, max_batch=0)
+        self.assertRaises(ValueError, WriteBehindQueue, LogEntry, max_queue=0)
+        self.assertRaises(ValueError, WriteBehindQueue, LogEntry,
+                          backpressure='wait')
+
+    def test_insert_errors(self):
+        """Ensure that documents that could not be inserted are passed to
+        the error callback.
+        """
+        LogEntry = self._log_entry(max_delay_ms=10000)
+        entry = LogEntry(number=1)
+        entry.save()
+        queue = write_behind_queue(LogEntry)
+        queue.flush(timeout=10)
+
+        LogEntry(pk=entry.pk, number=2).save(force_insert=True)
+        LogEntry(number=3).save()
+        self.assertTrue(queue.flush(timeout=10))
+        self.assertEqual(LogEntry.objects.count(), 2)
+        self.assertEqual(self.errors, [('BulkWriteError', 1)])
+        metrics = queue.metrics()
+        self.assertEqual((metrics['written'], metrics['failed']), (2, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()